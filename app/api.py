@@ -1,21 +1,433 @@
-from fastapi import FastAPI
+import asyncio
+import hmac
+import ipaddress
+import itertools
+from collections import deque
+import json
+import os
+from contextlib import asynccontextmanager, contextmanager
+from time import perf_counter
+from fastapi import Depends, FastAPI, Header, HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import FileResponse, JSONResponse, Response, StreamingResponse
 from pydantic import BaseModel
-from typing import Optional
-from .main import JobRecommender
+from typing import List, Literal, Optional
+from .cache import text_key
+from .index import INDEX_SNAPSHOT_DIR, snapshot_meta
+from .main import CursorExpired, DatabaseUnavailable, InvalidCursor, JobRecommender
+from .metrics import Collected, RequestMetrics, domain_label, registry, timed, track
+from .pdf import PdfBusy, PdfExtractor, PdfInvalid, PdfTimeout, PdfTooLarge
+from .profiler import Profiler, profiled
+from .refresh import CorpusRefresher
+from .workers import PoolBusy, PoolTimeout, ScoringPool
+
+# Largest number of CVs accepted by one /match/batch call
+MAX_BATCH_SIZE = int(os.getenv("MAX_BATCH_SIZE", "5000"))
+# CVs per /match/batch task: one pool request (or threadpool call) each
+MATCH_BATCH_CHUNK = int(os.getenv("MATCH_BATCH_CHUNK", "200"))
+
+# If set, /admin endpoints require a matching X-Admin-Token header; if not, they only answer loopback clients
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN")
 
-app = FastAPI(title="Profiled API")
 reco = JobRecommender()
+pool = ScoringPool(reco)  # MATCH_WORKERS=0 keeps scoring in this process
+refresher = CorpusRefresher(reco, on_refresh=pool.prepare)  # warms the pool for a new corpus
+pdf = PdfExtractor()  # PDF_WORKERS=0 keeps extraction in this process
+profiler = Profiler()  # PROFILE_SAMPLE_RATE / PROFILE_SLOW_MS turn it on
+
+# Gauges and cache/pool counters for /metrics, read from their owners at scrape time
+def _caches():
+    return [("profile", reco.profile_cache.stats()), ("ranking", reco.ranking_cache.stats()),
+            ("pdf", pdf.cache.stats())]
+
+def _pools():
+    return [("match", pool.status()), ("pdf", pdf.status())]
+
+registry.add(Collected("profiled_ready", "1 once a corpus is loaded.", "gauge", (),
+                       lambda: [((), int(reco.ready))]))
+registry.add(Collected("profiled_corpus_jobs", "Jobs in the served corpus.", "gauge", (),
+                       lambda: [((), reco.index.size)]))
+registry.add(Collected("profiled_corpus_info", "Version and source of the served corpus.", "gauge",
+                       ("version", "source"), lambda: [((str(reco.index.version), str(reco.index_source)), 1)]))
+registry.add(Collected("profiled_cache_entries", "Entries held per cache (API process).", "gauge", ("cache",),
+                       lambda: [((name,), s["entries"]) for name, s in _caches()]))
+for _key in ("hits", "misses", "evictions"):
+    registry.add(Collected(f"profiled_cache_{_key}_total", f"Cache {_key} (API process).", "counter", ("cache",),
+                           lambda key=_key: [((name,), s[key]) for name, s in _caches()]))
+registry.add(Collected("profiled_pool_workers", "Worker processes per pool (0 = in-process).", "gauge", ("pool",),
+                       lambda: [((name,), s["workers"]) for name, s in _pools()]))
+registry.add(Collected("profiled_pool_pending", "Requests queued or running per pool.", "gauge", ("pool",),
+                       lambda: [((name,), s["pending"]) for name, s in _pools()]))
+for _key in ("rejected", "timeouts"):
+    registry.add(Collected(f"profiled_pool_{_key}_total", f"Requests {_key} per pool.", "counter", ("pool",),
+                           lambda key=_key: [((name,), s[key]) for name, s in _pools()]))
+registry.add(Collected("profiled_profiles_captured_total", "Request profiles saved, by reason (sampled or slow).",
+                       "counter", ("reason",), lambda: [((k,), v) for k, v in profiler.captured.items()]))
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    refresher.start()
+    await run_in_threadpool(pool.start)
+    await run_in_threadpool(pdf.start)
+    yield
+    await run_in_threadpool(pdf.shutdown)
+    await run_in_threadpool(pool.shutdown)
+    refresher.stop()
+
+app = FastAPI(title="Profiled API", lifespan=lifespan)
+
+def is_loopback(host: Optional[str]) -> bool:
+    try:
+        return host is not None and ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        return False
+
+def require_admin(request: Request, x_admin_token: Optional[str] = Header(None)):
+    if ADMIN_TOKEN:
+        if x_admin_token is None or not hmac.compare_digest(x_admin_token.encode(), ADMIN_TOKEN.encode()):
+            raise HTTPException(status_code=403, detail="Invalid admin token")
+    elif not is_loopback(request.client.host if request.client else None):
+        raise HTTPException(status_code=403, detail="Set ADMIN_TOKEN to use /admin endpoints from another host")
 
 class MatchRequest(BaseModel):
     cv_text: str
     top_k: int = 5
     domain: Optional[str] = None  # New optional field to capture user domain choice
+    # "semantic" blends in embedding similarity; "prefilter" only scores the jobs the database returns
+    mode: Literal["keyword", "semantic", "prefilter"] = "keyword"
+
+class MatchPageRequest(MatchRequest):
+    # Left out when paging with a cursor while the ranking is still held
+    cv_text: Optional[str] = None
+    # A previous response's next_cursor: the next top_k jobs of the same ranking
+    cursor: Optional[str] = None
+    # Answer in NDJSON: the profile, one line per job in rank order, then next_cursor
+    stream: bool = False
+
+class BatchMatchRequest(BaseModel):
+    cvs: List[MatchRequest]
 
 @app.get("/health")
-def health():
+@app.get("/health/live")
+async def health():
+    """Liveness: the process is up and the event loop responds."""
     return {"status": "ok"}
 
+@app.get("/health/ready")
+async def health_ready():
+    """Readiness: a corpus is loaded (and the scoring pool, if any, is up)."""
+    snapshot = snapshot_meta(INDEX_SNAPSHOT_DIR)
+    body = {
+        "status": "ready" if reco.ready else "loading",
+        "source": reco.index_source,
+        "corpus_version": reco.index.version,
+        "jobs": reco.index.size,
+        "snapshot_version": snapshot["version"] if snapshot else None,
+        "snapshot_built_at": snapshot["built_at"] if snapshot else None,
+        "load_error": reco.load_error,
+    }
+    if not reco.ready:
+        raise HTTPException(status_code=503, detail=body)
+    return body
+
+def check_ready():
+    if not reco.ready:
+        raise HTTPException(status_code=503, detail="Job corpus is not loaded yet", headers={"Retry-After": "5"})
+
+def check_mode(mode: str):
+    if mode == "semantic" and reco.corpus_mode == "database":
+        raise HTTPException(status_code=400, detail="Semantic mode is unavailable with CORPUS_MODE=database")
+    if mode == "semantic" and reco.semantic is None:
+        raise HTTPException(status_code=400, detail="Semantic mode is unavailable: embeddings have not been built")
+
+def domain_of(domain: Optional[str]) -> str:
+    return domain_label(domain, reco.domain_rules.presets)
+
+@contextmanager
+def cursor_errors():
+    try:
+        yield
+    except InvalidCursor as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except CursorExpired:
+        raise HTTPException(status_code=410, detail="The ranking behind this cursor has expired; "
+                                                    "send cv_text along with the cursor to rebuild it")
+
+@contextmanager
+def database_errors():
+    try:
+        yield
+    except DatabaseUnavailable as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "5"})
+
+@contextmanager
+def pool_errors():
+    try:
+        yield
+    except PoolBusy:
+        raise HTTPException(status_code=503, detail="Too many requests in flight", headers={"Retry-After": "1"})
+    except PoolTimeout:
+        raise HTTPException(status_code=504, detail=f"Scoring took longer than {pool.timeout:g}s")
+
+def stream_started(**kwargs):
+    """reco.stream(**kwargs) with its first item (the profile and ranking) already computed."""
+    items = reco.stream(**kwargs)
+    return itertools.chain([next(items)], items)
+
+async def score(kwargs, m: RequestMetrics, streamed: bool = False):
+    """
+    reco.page(**kwargs) on the threadpool or the scoring pool. With `streamed`,
+    an iterator over the reco.stream items: in the API process only the first
+    is computed here (and timed), the jobs as the client reads them.
+    """
+    t0 = perf_counter()
+    watch = profiler.watch()
+    with cursor_errors(), database_errors():
+        if not pool.enabled:
+            fn = stream_started if streamed else reco.page
+            result, stages, capture = await run_in_threadpool(profiled, watch, fn, **kwargs)
+        else:
+            with pool_errors():
+                result, stages, capture = await pool.run(watch, streamed, **kwargs)
+    # Waiting for a thread or worker (and, with a pool, shipping the request and result)
+    m.add("queue", max(perf_counter() - t0 - sum(s for _, s in stages), 0.0))
+    m.extend(stages)
+    if capture is not None:
+        cv_text = kwargs.get("cv_text")
+        meta = {
+            "endpoint": m.endpoint, "domain": kwargs["domain"], "mode": kwargs["mode"], "top_k": kwargs["top_k"],
+            "cursor": kwargs.get("cursor"),
+            "cv_sha256": text_key(cv_text) if cv_text is not None else None,
+            "cv_chars": len(cv_text) if cv_text is not None else None,
+            "corpus_version": reco.index.version, "stages_ms": {k: round(v * 1000, 3) for k, v in stages},
+        }
+        # Written off the event loop and off the response's critical path
+        asyncio.get_running_loop().run_in_executor(None, profiler.save, capture, meta)
+    return result
+
+def respond(body, m: RequestMetrics) -> JSONResponse:
+    """The JSON response, with the request's stages in a Server-Timing header."""
+    t0 = perf_counter()
+    response = JSONResponse(body)
+    m.add("serialize", perf_counter() - t0)
+    response.headers["Server-Timing"] = m.server_timing()
+    return response
+
+async def stream_page(kwargs, m: RequestMetrics) -> StreamingResponse:
+    """
+    NDJSON page: jobs are built as the client reads them (in a scoring worker,
+    all at once). The profile and ranking are computed before the body starts,
+    so errors still get a status code and their stages go in Server-Timing.
+    """
+    items = iter(await score(kwargs, m, streamed=True))
+    response = StreamingResponse((json.dumps(item) + "\n" for item in items), media_type="application/x-ndjson")
+    response.headers["Server-Timing"] = m.server_timing()
+    return response
+
 @app.post("/match")
-def match(req: MatchRequest):
-    # Pass the domain to the compute engine in main.py
-    return reco.compute(req.cv_text, top_k=req.top_k, domain=req.domain)
\ No newline at end of file
+async def match(req: MatchPageRequest):
+    with track("/match", domain_of(req.domain)) as m:
+        check_ready()
+        check_mode(req.mode)
+        if req.cv_text is None and req.cursor is None:
+            raise HTTPException(status_code=422, detail="Send cv_text (or a cursor from a previous page)")
+        # Pass the domain to the compute engine in main.py
+        kwargs = {"cv_text": req.cv_text, "top_k": req.top_k, "domain": req.domain, "mode": req.mode,
+                  "cursor": req.cursor}
+        if req.stream:
+            return await stream_page(kwargs, m)
+        return respond(await score(kwargs, m), m)
+
+async def read_pdf(request: Request) -> bytes:
+    """The raw request body (the PDF itself), refused as soon as it exceeds PDF_MAX_BYTES."""
+    try:
+        if request.headers.get("content-length"):
+            pdf.check_size(int(request.headers["content-length"]))
+        body = bytearray()
+        async for chunk in request.stream():
+            body += chunk
+            pdf.check_size(len(body))
+    except PdfTooLarge:
+        raise HTTPException(status_code=413, detail=f"PDF larger than {pdf.max_bytes} bytes")
+    if not body:
+        raise HTTPException(status_code=400, detail="Empty upload: send the PDF file as the request body")
+    return bytes(body)
+
+async def extract_pdf(data: bytes, m: RequestMetrics):
+    t0 = perf_counter()
+    try:
+        result = await pdf.extract(data)
+    except PdfInvalid as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except PdfBusy:
+        raise HTTPException(status_code=503, detail="Too many PDFs being extracted", headers={"Retry-After": "1"})
+    except PdfTimeout:
+        raise HTTPException(status_code=504, detail=f"PDF extraction took longer than {pdf.timeout:g}s")
+    finally:
+        m.add("pdf", perf_counter() - t0)
+    if not result["text"].strip():
+        raise HTTPException(status_code=422, detail="No text found in the PDF (is it a scanned image?)")
+    return result
+
+@app.post("/extract")
+async def extract(request: Request):
+    """Resume text of a PDF sent as the raw request body (Content-Type: application/pdf)."""
+    with track("/extract", "none") as m:
+        return respond(await extract_pdf(await read_pdf(request), m), m)
+
+@app.post("/match/pdf")
+async def match_pdf(request: Request, top_k: int = 5, domain: Optional[str] = None,
+                    mode: Literal["keyword", "semantic", "prefilter"] = "keyword"):
+    """/match for a PDF resume sent as the raw request body; options go in the query string."""
+    with track("/match/pdf", domain_of(domain)) as m:
+        check_ready()
+        check_mode(mode)
+        extracted = await extract_pdf(await read_pdf(request), m)
+        result = await score({"cv_text": extracted["text"], "top_k": top_k, "domain": domain, "mode": mode}, m)
+        return respond({**result, "pdf": {k: v for k, v in extracted.items() if k != "text"}}, m)
+
+async def score_batch(chunk):
+    """(list(reco.compute_batch(chunk)), stage timings) on the threadpool or the scoring pool."""
+    t0 = perf_counter()
+    with database_errors():
+        if not pool.enabled:
+            results, stages = await run_in_threadpool(timed, lambda: list(reco.compute_batch(chunk)))
+        else:
+            with pool_errors():
+                results, stages = await pool.run_batch(chunk)
+    return results, [("queue", max(perf_counter() - t0 - sum(s for _, s in stages), 0.0))] + stages
+
+async def batch_lines(req: BatchMatchRequest, m: RequestMetrics):
+    """
+    NDJSON lines of a batch, in input order. The CVs are scored in chunks of
+    MATCH_BATCH_CHUNK with one chunk in flight per worker, and the request is
+    tracked (counters, stage histograms) until its last line is sent.
+    """
+    with m:
+        if len(req.cvs) > MAX_BATCH_SIZE:
+            raise HTTPException(status_code=413, detail=f"At most {MAX_BATCH_SIZE} CVs per batch")
+        check_ready()
+        for c in req.cvs:
+            check_mode(c.mode)
+        cvs = [{"cv_text": c.cv_text, "top_k": c.top_k, "domain": c.domain, "mode": c.mode} for c in req.cvs]
+        size = max(MATCH_BATCH_CHUNK, 1)
+        chunks = iter([cvs[i:i + size] for i in range(0, len(cvs), size)])
+
+        in_flight = deque(asyncio.ensure_future(score_batch(c)) for c in itertools.islice(chunks, max(pool.workers, 1)))
+        totals = {}  # stages summed over the chunks: one observation per stage, as for /match
+        index = 0
+        try:
+            while in_flight:
+                results, stages = await in_flight.popleft()
+                for chunk in itertools.islice(chunks, 1):
+                    in_flight.append(asyncio.ensure_future(score_batch(chunk)))
+                for name, seconds in stages:
+                    totals[name] = totals.get(name, 0.0) + seconds
+                for result in results:
+                    yield json.dumps({"index": index, **result}) + "\n"
+                    index += 1
+        finally:
+            for task in in_flight:
+                task.cancel()
+            m.extend(totals.items())
+
+@app.post("/match/batch")
+async def match_batch(req: BatchMatchRequest):
+    """Rank many CVs in one call; streams one NDJSON line per CV, in input order."""
+    domains = {domain_of(c.domain) for c in req.cvs}
+    label = domains.pop() if len(domains) == 1 else ("mixed" if domains else "none")
+    lines = batch_lines(req, track("/match/batch", label))
+    # The first chunk runs before the response starts: bad input, a busy
+    # pool or a timeout there still get a status code
+    try:
+        first = [await lines.__anext__()]
+    except StopAsyncIteration:
+        first = []
+
+    async def body():
+        for line in first:
+            yield line
+        async for line in lines:
+            yield line
+
+    return StreamingResponse(body(), media_type="application/x-ndjson")
+
+
+@app.get("/metrics")
+def metrics():
+    """Prometheus metrics: request/error counters, stage latency histograms, corpus, caches and pools."""
+    return Response(registry.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+
+@app.get("/jobs/{job_id}")
+def job_details(job_id: int):
+    """One job with its full description (fetched from the database, not kept in memory)."""
+    check_ready()
+    try:
+        job = reco.job_details(job_id)
+    except Exception as e:
+        raise HTTPException(status_code=503, detail=f"Could not load the job description: {e}")
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+
+@app.post("/admin/refresh", dependencies=[Depends(require_admin)])
+def admin_refresh(full: bool = False):
+    """Pull new/changed jobs now (full=true reloads the whole table)."""
+    try:
+        changed = refresher.refresh_now(full=full)
+    except Exception as e:
+        raise HTTPException(status_code=503, detail=f"Refresh failed: {e}")
+    return {"changed": changed, **reco.corpus_info()}
+
+@app.get("/admin/corpus", dependencies=[Depends(require_admin)])
+def admin_corpus():
+    """Current corpus version, refresher state and resident memory of the job store."""
+    return {**reco.corpus_info(), "refresher": refresher.status(), "memory": reco.memory_info()}
+
+
+@app.get("/admin/workers", dependencies=[Depends(require_admin)])
+def admin_workers():
+    """Scoring pool size, queue occupancy and rejected/timed-out counters."""
+    return pool.status()
+
+
+@app.get("/admin/pdf", dependencies=[Depends(require_admin)])
+def admin_pdf():
+    """PDF extraction limits, pool occupancy, rejected/timed-out counters and cache hits."""
+    return pdf.status()
+
+
+@app.get("/admin/cache", dependencies=[Depends(require_admin)])
+def admin_cache():
+    """Hit/miss counters for the CV profile and ranking caches."""
+    return reco.cache_stats()
+
+
+@app.post("/admin/profiler", dependencies=[Depends(require_admin)])
+def admin_profiler(rate: Optional[float] = None, slow_ms: Optional[float] = None):
+    """Set the profiled fraction of /match requests and/or the slow-request threshold (0 turns either off)."""
+    profiler.configure(rate=rate, slow_ms=slow_ms)
+    return profiler.status()
+
+
+@app.get("/admin/profiles", dependencies=[Depends(require_admin)])
+def admin_profiles(limit: int = 100):
+    """Profiler settings and the newest captured request profiles (metadata)."""
+    return {**profiler.status(), "profiles": profiler.list(limit)}
+
+
+@app.get("/admin/profiles/merged", dependencies=[Depends(require_admin)])
+def admin_profiles_merged(limit: int = 100):
+    """The newest `limit` profiles summed, as collapsed stacks: one flame graph of recent traffic."""
+    return Response(profiler.merged(limit), media_type="text/plain")
+
+
+@app.get("/admin/profiles/{name}", dependencies=[Depends(require_admin)])
+def admin_profile(name: str):
+    """One captured profile as collapsed stacks (flamegraph.pl / speedscope input)."""
+    path = profiler.path(name)
+    if path is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return FileResponse(path, media_type="text/plain", filename=name + ".folded")
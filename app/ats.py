@@ -1,74 +1,107 @@
-import os
-
-def load_skills_vocab():
-    """Load the universal skills list to use for scoring."""
-    # Assuming the file is at project_root/data/skills_dict.txt
-    # and this file is at project_root/app/ats.py
-    path = os.path.join(os.path.dirname(__file__), "..", "data", "skills_dict.txt")
-    try:
-        with open(path, "r", encoding="utf-8") as f:
-            return set(s.strip().lower() for s in f if s.strip())
-    except Exception:
-        return set()
-
-# Load once at module level
-SKILLS_DB = load_skills_vocab()
+from typing import Dict, List, Optional, Tuple
+
+from .skills import SkillMatcher, get_skill_matcher, split_runs
+
+SECTIONS = {"experience", "education", "skills", "projects", "certifications", "summary", "objective"}
+
+# Leadership & initiative
+ACTION_VERBS = {
+    "led", "managed", "developed", "designed", "implemented", "created",
+    "analyzed", "optimized", "achieved", "improved", "collaborated",
+    "coordinated", "established", "negotiated", "supervised", "trained"
+}
+
+BULLET_CHARS = ("•", "➢")
+BULLET_MARKERS = ("- ", "* ")
+NOISE_MARKERS = ("====", "****")  # "____" is made of word characters, see below
+EMAIL_DOMAINS = ("com", "in", "org")
+
+
+# Points per tier: those of the first (threshold, points) the count exceeds
+LENGTH_TIERS = ((1800, 0.20), (900, 0.15), (500, 0.10), (-1, 0.05))  # ideal: 1000-3000 chars
+VERB_TIERS = ((10, 0.15), (5, 0.10), (2, 0.05))
+SKILL_TIERS = ((15, 0.25), (10, 0.20), (5, 0.15), (2, 0.05))
+BULLET_TIERS = ((15, 0.10), (5, 0.05))
+
+
+def analyze_cv(text: str, matcher: Optional[SkillMatcher] = None) -> Tuple[Dict, List[str]]:
+    """
+    ATS breakdown plus the dictionary skills found, from one tokenization
+    of the CV (see `ats_breakdown`).
+    """
+    t = text.lower() if isinstance(text, str) else ""
+    signals, skills = _signals(t, matcher or get_skill_matcher())
+    components = _components(signals)
+    score = max(0.0, min(1.0, sum(components.values())))
+    breakdown = {
+        "score": round(score, 4),
+        "components": {k: round(v, 4) for k, v in components.items()},
+        "signals": signals,
+    }
+    return breakdown, skills
+
+
+def _signals(t: str, matcher: SkillMatcher) -> Tuple[Dict, List[str]]:
+    """The raw counts the score is built from, and the skills found, for a lowercased CV."""
+    # Every signal comes from the same word/non-word runs. Markers never
+    # straddle two runs, so counting them per run equals counting them in t
+    runs = split_runs(t)
+    words = runs[1::2]
+    gaps = runs[0::2]
+    gaps[-1] = gaps[-1][:-1]  # drop the end padding ("... -" is not a bullet)
+    skills = matcher.find_in_runs(runs)
+
+    # Bullets, noise and "@" live in the (short) punctuation runs
+    punct = "\x00".join(gaps)
+    has_email = "@" in punct and any(
+        gap.endswith(".") and word.startswith(EMAIL_DOMAINS) for gap, word in zip(gaps, words)
+    )
+    signals = {
+        "characters": len(t),
+        "sections": sorted(SECTIONS.intersection(words)),
+        "verbs": sorted(ACTION_VERBS.intersection(words)),
+        "skills": len(skills),
+        "bullets": sum(punct.count(c) for c in BULLET_CHARS) + sum(punct.count(m) for m in BULLET_MARKERS),
+        "email": has_email,
+        "phone_digits": any(c.isdigit() for w in words if not w.isalpha() for c in w),
+        "noise": sum(punct.count(m) for m in NOISE_MARKERS) + sum(w.count("____") for w in words if "_" in w),
+    }
+    return signals, skills
+
+
+def _tier(count: int, tiers) -> float:
+    return next((points for threshold, points in tiers if count > threshold), 0.0)
+
+
+def _components(signals: Dict) -> Dict[str, float]:
+    """Points per component for the signals of `_signals`."""
+    return {
+        # 1. Length Check
+        "length": _tier(signals["characters"], LENGTH_TIERS),
+        # 2. Essential Sections
+        "sections": min(0.20, len(signals["sections"]) * 0.05),
+        # 3. Action Verbs (whole words)
+        "verbs": _tier(len(signals["verbs"]), VERB_TIERS),
+        # 4. Universal Skill Density (whole-word matches against the skills dictionary)
+        "skill_density": _tier(signals["skills"], SKILL_TIERS),
+        # 5. Formatting (Bullet Points)
+        "formatting": _tier(signals["bullets"], BULLET_TIERS),
+        # 6. Contact Info Check (Bonus); digits: crude phone check
+        "contact": (0.05 if signals["email"] else 0.0) + (0.05 if signals["phone_digits"] else 0.0),
+        # 7. Penalties (Formatting Noise)
+        "penalties": -0.10 if signals["noise"] > 5 else 0.0,
+    }
+
+
+def ats_breakdown(text: str, matcher: Optional[SkillMatcher] = None) -> Dict:
+    """
+    ATS score with its per-component points (length, sections, verbs,
+    skill_density, formatting, contact, penalties) and the raw signals
+    behind them.
+    """
+    return analyze_cv(text, matcher)[0]
+
 
 def ats_score(text: str) -> float:
-    t = text.lower()
-    score = 0.0
-
-    # 1. Length Check (Ideal: 1000–3000 chars)
-    length = len(t)
-    if length > 2800: score += 0.20
-    elif length > 1800: score += 0.20
-    elif length > 900: score += 0.15
-    elif length > 500: score += 0.10
-    else: score += 0.05
-
-    # 2. Essential Sections
-    sections = ["experience", "education", "skills", "projects", "certifications", "summary", "objective"]
-    hits = sum(1 for s in sections if s in t)
-    score += min(0.20, hits * 0.05)
-
-    # 3. Action Verbs (Leadership & Initiative)
-    action_verbs = [
-        "led", "managed", "developed", "designed", "implemented", "created",
-        "analyzed", "optimized", "achieved", "improved", "collaborated",
-        "coordinated", "established", "negotiated", "supervised", "trained"
-    ]
-    verb_hits = sum(1 for v in action_verbs if v in t)
-    if verb_hits > 10: score += 0.15
-    elif verb_hits > 5: score += 0.10
-    elif verb_hits > 2: score += 0.05
-
-    # 4. Universal Skill Density (The Fix)
-    # Instead of hardcoded tech words, we check against the full skills database
-    skill_hits = 0
-    for skill in SKILLS_DB:
-        # Word boundary check is expensive, simple substring check is faster for scoring
-        if skill in t:
-            skill_hits += 1
-            
-    # Adjust thresholds based on finding ANY relevant skills
-    if skill_hits > 15: score += 0.25
-    elif skill_hits > 10: score += 0.20
-    elif skill_hits > 5: score += 0.15
-    elif skill_hits > 2: score += 0.05
-
-    # 5. Formatting (Bullet Points)
-    bullets = t.count("•") + t.count("- ") + t.count("* ") + t.count("➢")
-    if bullets > 15: score += 0.10
-    elif bullets > 5: score += 0.05
-
-    # 6. Contact Info Check (Bonus)
-    if "@" in t and any(x in t for x in [".com", ".in", ".org"]):
-        score += 0.05
-    if any(c.isdigit() for c in t): # Crude phone check
-        score += 0.05
-
-    # 7. Penalties (Formatting Noise)
-    noise = t.count("====") + t.count("****") + t.count("____")
-    if noise > 5: score -= 0.10
-
-    return max(0.0, min(1.0, score))
\ No newline at end of file
+    """ATS score in [0, 1]."""
+    return ats_breakdown(text)["score"]
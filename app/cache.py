@@ -0,0 +1,130 @@
+import hashlib
+import os
+import pickle
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+# --- Cache configuration (0 entries disables caching) ---
+CACHE_MAX_ENTRIES = int(os.getenv("MATCH_CACHE_SIZE", "1024"))
+CACHE_TTL_SECONDS = int(os.getenv("MATCH_CACHE_TTL", "600"))
+# Optional shared backend, e.g. "redis://localhost:6379/0"
+CACHE_BACKEND_URL = os.getenv("MATCH_CACHE_URL")
+
+
+def text_key(text: str) -> str:
+    """Content hash of a CV. Exact text: ATS length/bullet counts depend on whitespace."""
+    return hashlib.sha256(text.encode("utf-8", "surrogatepass")).hexdigest()
+
+
+class RedisBackend:
+    """Shared cache tier for running several API workers; needs the `redis` package."""
+
+    def __init__(self, url: str, ttl_seconds: int, prefix: str = "profiled:"):
+        try:
+            import redis
+        except ImportError:
+            raise RuntimeError("MATCH_CACHE_URL is set but the 'redis' package is not installed")
+        self.client = redis.Redis.from_url(url)
+        self.ttl = ttl_seconds
+        self.prefix = prefix
+
+    def get(self, key: str) -> Optional[Any]:
+        raw = self.client.get(self.prefix + key)
+        return pickle.loads(raw) if raw is not None else None
+
+    def set(self, key: str, value: Any):
+        self.client.set(self.prefix + key, pickle.dumps(value), ex=self.ttl or None)
+
+
+def make_backend(url: Optional[str] = CACHE_BACKEND_URL, ttl_seconds: int = CACHE_TTL_SECONDS, prefix: str = "profiled:"):
+    if not url:
+        return None
+    if url.startswith(("redis://", "rediss://", "unix://")):
+        return RedisBackend(url, ttl_seconds, prefix)
+    raise ValueError(f"Unsupported cache backend URL: {url}")
+
+
+class LRUCache:
+    """
+    Thread-safe in-process LRU cache with a per-entry TTL.
+
+    An optional shared `backend` (anything with get/set) is consulted
+    on a local miss and written through on every set, so several API
+    processes can share work. Hit/miss counters are kept for /admin/cache.
+    """
+
+    def __init__(self, max_entries: int = CACHE_MAX_ENTRIES, ttl_seconds: int = CACHE_TTL_SECONDS, backend=None):
+        self.max_entries = max_entries
+        self.ttl = ttl_seconds
+        self.backend = backend
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.backend_hits = 0
+        self.evictions = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0
+
+    def get(self, key: str) -> Optional[Any]:
+        if not self.enabled:
+            return None
+        now = time.monotonic()
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None:
+                expires, value = entry
+                if not self.ttl or expires > now:
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._data[key]
+
+        value = self.backend.get(key) if self.backend is not None else None
+        with self._lock:
+            if value is None:
+                self.misses += 1
+                return None
+            self.backend_hits += 1
+            self.hits += 1
+        self._store(key, value)
+        return value
+
+    def set(self, key: str, value: Any):
+        if not self.enabled:
+            return
+        self._store(key, value)
+        if self.backend is not None:
+            self.backend.set(key, value)
+
+    def _store(self, key: str, value: Any):
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        """Drop local entries (shared entries are versioned and expire on their own)."""
+        with self._lock:
+            self._data.clear()
+
+    def stats(self) -> Dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._data),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "backend_hits": self.backend_hits,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "shared_backend": type(self.backend).__name__ if self.backend is not None else None,
+            }
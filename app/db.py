@@ -1,6 +1,6 @@
 import os
 import pandas as pd
-from sqlalchemy import create_engine
+from sqlalchemy import bindparam, create_engine, inspect, text
 from sqlalchemy.orm import sessionmaker
 
 # --- CHANGE 1: Get DATABASE_URL from environment (Render sets this automatically) ---
@@ -16,15 +16,106 @@ DATABASE_URL = os.getenv(
 if DATABASE_URL.startswith("postgres://"):
     DATABASE_URL = DATABASE_URL.replace("postgres://", "postgresql://", 1)
 
-# --- UNCHANGED: Create engine ---
-engine = create_engine(DATABASE_URL)
+# --- Create engine on first use: importing the API must not need the database
+# (it can start from the index snapshot and reach the DB later) ---
+_engine = None
+
+def get_engine():
+    global _engine
+    if _engine is None:
+        _engine = create_engine(DATABASE_URL)
+    return _engine
 
 # --- CHANGE 3: Add SessionLocal for better connection management ---
-SessionLocal = sessionmaker(bind=engine)
+SessionLocal = sessionmaker()
+
+def _select_list(columns=None):
+    """SELECT list for `columns` (case-insensitive, missing ones skipped); '*' for all."""
+    if columns is None:
+        return "*"
+    engine = get_engine()
+    actual = {c["name"].lower(): c["name"] for c in inspect(engine).get_columns("linkedin_jobs")}
+    quote = engine.dialect.identifier_preparer.quote
+    return ", ".join(quote(actual[c]) for c in columns if c in actual)
+
+# --- Load jobs (optionally only some columns, optionally as an iterator of chunks) ---
+def load_jobs_df(columns=None, chunksize=None):
+    return pd.read_sql(text(f"SELECT {_select_list(columns)} FROM linkedin_jobs"), get_engine(), chunksize=chunksize)
+
+def load_jobs_since(watermark, columns=None):
+    """Rows inserted or updated after `watermark` (uses the loaded_at column)."""
+    return pd.read_sql(
+        text(f"SELECT {_select_list(columns)} FROM linkedin_jobs WHERE loaded_at > :watermark"),
+        get_engine(),
+        params={"watermark": watermark},
+    )
+
+def load_descriptions(job_ids):
+    """{id: description} for the given job IDs (descriptions are not kept in memory)."""
+    if not job_ids:
+        return {}
+    query = text("SELECT id, description FROM linkedin_jobs WHERE id IN :ids").bindparams(
+        bindparam("ids", expanding=True)
+    )
+    rows = pd.read_sql(query, get_engine(), params={"ids": [int(i) for i in job_ids]})
+    return dict(zip(rows["id"].astype(int), rows["description"].fillna("")))
+
+def load_skill_ids(names):
+    """{name: id} from the skills dictionary table for the given skill names."""
+    if not names:
+        return {}
+    query = text("SELECT name, id FROM skills WHERE name IN :names").bindparams(bindparam("names", expanding=True))
+    with get_engine().connect() as conn:
+        return {name: int(i) for name, i in conn.execute(query, {"names": sorted(set(names))})}
+
+def prefilter_jobs(skill_ids, limit, title_keywords=(), reject_keywords=(), with_descriptions=False):
+    """
+    Jobs sharing at least one of `skill_ids` (via job_skills), or whose title
+    contains one of `title_keywords`, with their precomputed `overlap` and
+    `skill_count`; titles containing a `reject_keywords` entry are left out.
+    The `limit` rows kept are the best for the keyword scorer: title matches
+    first (the 0.7 domain boost outweighs any skill ratio), then by
+    overlap / skill_count, ties by id. Only these rows leave the database.
+    Title keywords are a LIKE scan of the table (an index-backed skill
+    lookup otherwise).
+    """
+    engine = get_engine()
+    hits = "SELECT job_id, COUNT(*) AS overlap FROM job_skills WHERE skill_id IN :skill_ids GROUP BY job_id"
+    params = {"skill_ids": [int(i) for i in skill_ids], "limit": int(limit)}
+
+    def any_title(keywords, prefix):
+        likes = []
+        for i, k in enumerate(keywords):
+            params[f"{prefix}_{i}"] = "%" + k.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+            likes.append(f"LOWER(COALESCE(j.title, '')) LIKE :{prefix}_{i} ESCAPE '\\'")
+        return "(" + " OR ".join(likes) + ")"
+
+    boosted = f"CASE WHEN {any_title(title_keywords, 'title')} THEN 1 ELSE 0 END" if title_keywords else "0"
+    where = [f"(h.job_id IS NOT NULL OR {any_title(title_keywords, 'title')})"] if title_keywords else []
+    if reject_keywords:
+        where.append(f"NOT {any_title(reject_keywords, 'reject')}")
+    columns = ", ".join(f"j.{c}" for c in ("id", "title", "company", "location", "url", "skills_required", "loaded_at")
+                        + (("description",) if with_descriptions else ()))
+    # skill_count is read from the primary key, for the candidate rows only
+    query = text(f"""
+        SELECT * FROM (
+            SELECT {columns}, COALESCE(h.overlap, 0) AS overlap,
+                   (SELECT COUNT(*) FROM job_skills s WHERE s.job_id = j.id) AS skill_count,
+                   {boosted} AS boosted
+            FROM linkedin_jobs j {"LEFT JOIN" if title_keywords else "JOIN"} ({hits}) h ON h.job_id = j.id
+            {"WHERE " + " AND ".join(where) if where else ""}
+        ) c
+        ORDER BY boosted DESC,
+                 CASE WHEN skill_count > 0 THEN CAST(overlap AS FLOAT) / skill_count ELSE 0 END DESC, id
+        LIMIT :limit
+    """).bindparams(bindparam("skill_ids", expanding=True))
+    return pd.read_sql(query, engine, params=params)
 
-# --- UNCHANGED: Load jobs function ---
-def load_jobs_df():
-    return pd.read_sql("SELECT * FROM linkedin_jobs", engine)
+def load_job(job_id):
+    """One job row with its description (None if there is no such id)."""
+    query = text("SELECT id, title, company, location, url, skills_required, description FROM linkedin_jobs WHERE id = :id")
+    rows = pd.read_sql(query, get_engine(), params={"id": int(job_id)})
+    return None if rows.empty else rows.iloc[0].to_dict()
 
 # --- CHANGE 4: Add session management function (best practice for production) ---
 def get_db():
@@ -32,7 +123,7 @@ def get_db():
     Database session generator for FastAPI dependency injection.
     Ensures connections are properly closed after use.
     """
-    db = SessionLocal()
+    db = SessionLocal(bind=get_engine())
     try:
         yield db
     finally:
@@ -0,0 +1,94 @@
+import json
+import os
+from typing import Dict, Iterable, Optional
+
+from .cache import LRUCache
+
+# Declarative boost/reject rules per domain (see data/domain_rules.json)
+DOMAIN_RULES_PATH = os.getenv(
+    "DOMAIN_RULES_PATH", os.path.join(os.path.dirname(__file__), "..", "data", "domain_rules.json")
+)
+# Compiled free-text domains (and their job masks, per index) kept at once
+DOMAIN_CACHE_SIZE = int(os.getenv("DOMAIN_CACHE_SIZE", "256"))
+
+
+class DomainRule:
+    """The compiled rule of one (lowercased) domain: title keywords that boost and that reject a job."""
+
+    __slots__ = ("domain", "boost", "reject")
+
+    def __init__(self, domain: str, boost: Iterable[str], reject: Iterable[str]):
+        self.domain = domain
+        self.boost = tuple(dict.fromkeys(boost))  # deduplicated, first-seen order
+        self.reject = tuple(dict.fromkeys(reject))
+
+    def boosts(self, title_low: str) -> bool:
+        return any(k in title_low for k in self.boost)
+
+    def rejects(self, title_low: str) -> bool:
+        return any(k in title_low for k in self.reject)
+
+    def __repr__(self):
+        return f"DomainRule({self.domain!r}, boost={list(self.boost)}, reject={list(self.reject)})"
+
+
+class DomainRules:
+    """
+    The rule table, compiled. A domain boosts job titles containing any of
+    its words plus the `boost` keywords of every rule it matches, and
+    rejects titles containing any `reject` keyword of those rules; a rule
+    matches when the domain contains one of its `when` strings. Preset
+    domains (the dashboard's) are compiled at load, free-text ones on first
+    use and then kept in an LRU.
+    """
+
+    def __init__(self, table: Dict):
+        sets = table.get("keyword_sets", {})
+
+        def keywords(items):
+            out = []
+            for k in items:
+                out += sets[k[1:]] if k.startswith("@") else [k]
+            return [k.lower() for k in out]
+
+        self.rules = [
+            ([w.lower() for w in r["when"]], keywords(r.get("boost", [])), keywords(r.get("reject", [])))
+            for r in table.get("rules", [])
+        ]
+        self.presets = {d.lower(): self._compile(d.lower()) for d in table.get("presets", [])}
+        self._compiled = LRUCache(max_entries=DOMAIN_CACHE_SIZE, ttl_seconds=0)
+
+    @classmethod
+    def load(cls, path: str = DOMAIN_RULES_PATH) -> "DomainRules":
+        with open(path, encoding="utf-8") as f:
+            return cls(json.load(f))
+
+    def _compile(self, domain: str) -> DomainRule:
+        boost, reject = domain.split(), []
+        for when, extra_boost, extra_reject in self.rules:
+            if any(w in domain for w in when):
+                boost += extra_boost
+                reject += extra_reject
+        return DomainRule(domain, boost, reject)
+
+    def get(self, domain: Optional[str]) -> Optional[DomainRule]:
+        """Compiled rule for a domain (None for no domain / general mode)."""
+        domain = (domain or "").lower()
+        if not domain:
+            return None
+        rule = self.presets.get(domain) or self._compiled.get(domain)
+        if rule is None:
+            rule = self._compile(domain)
+            self._compiled.set(domain, rule)
+        return rule
+
+
+_domain_rules: Optional[DomainRules] = None
+
+
+def get_domain_rules() -> DomainRules:
+    """The process-wide rule table, loaded on first use."""
+    global _domain_rules
+    if _domain_rules is None:
+        _domain_rules = DomainRules.load()
+    return _domain_rules
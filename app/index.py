@@ -0,0 +1,392 @@
+import hashlib
+import json
+import os
+import re
+import shutil
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .cache import LRUCache
+from .domains import DOMAIN_CACHE_SIZE, DomainRule
+
+# Seniority words say nothing about what a job is (dropped from the BM25 index)
+GENERIC_TITLE_WORDS = ["senior", "junior", "lead", "manager", "associate", "intern"]
+
+# --- BM25 text index (general mode): title + description ---
+BM25_K1 = 1.2
+BM25_B = 0.75
+TITLE_WEIGHT = 3  # a title word counts as this many description words
+STOPWORDS = set(GENERIC_TITLE_WORDS) | {
+    "a", "an", "and", "are", "as", "at", "be", "by", "for", "from", "has", "have", "in", "is", "it",
+    "its", "of", "on", "or", "our", "that", "the", "their", "this", "to", "was", "we", "will", "with",
+    "you", "your", "who", "all", "any", "can", "not", "but", "more", "other", "into", "across", "etc",
+}
+_TOKEN_RE = re.compile(r"\w+")
+
+# --- Prebuilt index snapshot (written at ingest, memory-mapped at startup) ---
+INDEX_SNAPSHOT_DIR = os.getenv(
+    "INDEX_SNAPSHOT_DIR", os.path.join(os.path.dirname(__file__), "..", "data", "index_snapshot")
+)
+SNAPSHOT_FORMAT = 2
+_SNAPSHOT_ARRAYS = (
+    "skill_indptr", "skill_indices", "skill_post_ptr", "skill_post_jobs",
+    "doc_lengths", "text_post_ptr", "text_post_jobs", "text_post_impacts",
+)
+_SNAPSHOT_LISTS = ("job_ids", "titles", "companies", "locations", "urls", "titles_low", "skill_names", "text_term_list")
+
+
+def clean_text(value) -> str:
+    """str() for a cell value, treating NULL/NaN as empty instead of 'nan'."""
+    if value is None or (isinstance(value, float) and np.isnan(value)):
+        return ""
+    return str(value)
+
+
+def split_skills(value) -> List[str]:
+    """Parse a `skills_required` cell ("python;sql;...") into lowercase skills."""
+    return [s.strip().lower() for s in clean_text(value).split(";") if s.strip()]
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase word tokens for the BM25 index (stopwords and 1-char tokens dropped)."""
+    return [t for t in _TOKEN_RE.findall(text.lower()) if len(t) > 1 and t not in STOPWORDS]
+
+
+def index_signature(skills_vocab: Optional[List[str]]) -> str:
+    """Hash of everything besides the corpus that shapes an index (skills dictionary, BM25 setup)."""
+    digest = hashlib.sha1("\n".join(sorted(set(skills_vocab or []))).encode("utf-8"))
+    digest.update(repr((BM25_K1, BM25_B, TITLE_WEIGHT, sorted(STOPWORDS))).encode("utf-8"))
+    return digest.hexdigest()[:12]
+
+
+def snapshot_meta(path: str = INDEX_SNAPSHOT_DIR) -> Optional[Dict]:
+    """meta.json of the on-disk index snapshot (None if there is none)."""
+    try:
+        with open(os.path.join(path, "meta.json"), encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def corpus_watermark(jobs: pd.DataFrame):
+    """Latest `loaded_at` in the corpus (None when the column is missing/empty)."""
+    if "loaded_at" not in jobs.columns or jobs.empty:
+        return None
+    latest = pd.to_datetime(jobs["loaded_at"]).max()
+    return None if pd.isna(latest) else latest.to_pydatetime()
+
+
+def corpus_version(jobs: pd.DataFrame) -> str:
+    """Short content hash of the corpus; identical data gives the same version."""
+    keys = [c for c in ("id", "url", "loaded_at", "title", "skills_required") if c in jobs.columns]
+    digest = hashlib.sha1(str(len(jobs)).encode())
+    if keys and len(jobs):
+        digest.update(pd.util.hash_pandas_object(jobs[keys].astype(str), index=False).values.tobytes())
+    return digest.hexdigest()[:12]
+
+
+def _csr(rows: List[List[int]], dtype=np.int32):
+    """Build (indptr, indices) CSR arrays from per-row lists of column IDs."""
+    counts = np.fromiter((len(r) for r in rows), dtype=np.int64, count=len(rows))
+    indptr = np.zeros(len(rows) + 1, dtype=np.int64)
+    np.cumsum(counts, out=indptr[1:])
+    indices = np.fromiter((c for r in rows for c in r), dtype=dtype, count=int(indptr[-1]))
+    return indptr, indices
+
+
+def _postings(indptr, indices, n_cols: int):
+    """Transpose CSR (job -> IDs) into posting lists (ID -> job positions)."""
+    rows = np.repeat(np.arange(len(indptr) - 1, dtype=np.int32), np.diff(indptr))
+    order = np.argsort(indices, kind="stable")
+    ptr = np.zeros(n_cols + 1, dtype=np.int64)
+    np.cumsum(np.bincount(indices, minlength=n_cols), out=ptr[1:])
+    return ptr, rows[order]
+
+
+def _csr_matmat(indptr, indices, X: np.ndarray) -> np.ndarray:
+    """(rows x cols CSR) @ X.T for a dense (m x cols) X, returned as (m x rows)."""
+    counts = np.diff(indptr)
+    out = np.zeros((X.shape[0], len(counts)))
+    nonempty = np.flatnonzero(counts)
+    if len(nonempty):
+        # reduceat sums each row's slice; empty rows are skipped because
+        # reduceat would return the next element for them instead of 0
+        out[:, nonempty] = np.add.reduceat(X[:, indices], indptr[nonempty], axis=1)
+    return out
+
+
+def _gather(ptr, jobs, ids) -> np.ndarray:
+    """Concatenate the posting lists of `ids`."""
+    if len(ids) == 0:
+        return np.zeros(0, dtype=np.int32)
+    return np.concatenate([jobs[ptr[i]:ptr[i + 1]] for i in ids])
+
+
+def max_normalize(scores: np.ndarray) -> np.ndarray:
+    """Scale scores (per row) so the best job gets 1.0."""
+    if scores.shape[-1] == 0:
+        return scores
+    top = scores.max(axis=-1, keepdims=True)
+    return np.divide(scores, top, out=np.zeros(scores.shape), where=top > 0)
+
+
+class JobIndex:
+    """
+    Read-only matching index over the job corpus, built once at load.
+
+    Job skills are stored as a CSR job x skill matrix (`skill_indptr`,
+    `skill_indices`) over integer skill IDs, also kept transposed as an
+    inverted index (skill ID -> posting list of job positions). Titles and
+    descriptions go into a BM25 inverted index whose postings carry
+    precomputed term impacts. A request only touches the jobs that share
+    something with the CV.
+
+    The index is never mutated after construction: a corpus refresh builds a
+    new JobIndex and swaps it in, and `version` identifies its content.
+    """
+
+    def __init__(self, jobs, skills_vocab: Optional[List[str]] = None):
+        """`jobs` is a JobStore, or a raw jobs frame (projected into one here)."""
+        from .store import JobStore  # the store tokenizes with this module's tokenizer
+
+        store = jobs if isinstance(jobs, JobStore) else JobStore.from_frame(jobs)
+        jobs = store.frame
+        n = len(jobs)
+        self.size = n
+        self.version = corpus_version(jobs)
+        self.watermark = corpus_watermark(jobs)
+        self.signature = index_signature(skills_vocab)
+
+        def column(name, default):
+            if name not in jobs.columns:
+                return [default] * n
+            return [default if clean_text(v) == "" else v for v in jobs[name].tolist()]
+
+        # --- Display metadata (only what a response needs) ---
+        self.job_ids = [int(v) for v in column("id", 0)]
+        self._job_positions: Optional[Dict[int, int]] = None
+        self.titles = column("title", "Unknown Role")
+        self.companies = column("company", "Unknown Company")
+        self.locations = column("location", "India")
+        self.urls = column("url", "#")
+
+        raw_titles = jobs["title"].tolist() if "title" in jobs.columns else [""] * n
+        self.titles_low = [clean_text(t).lower() for t in raw_titles]
+
+        # --- Skill ID map + CSR job x skill matrix ---
+        raw_skills = jobs["skills_required"].tolist() if "skills_required" in jobs.columns else [""] * n
+        job_skills = [set(split_skills(v)) for v in raw_skills]
+        names = set(skills_vocab or [])
+        for s in job_skills:
+            names.update(s)
+        # IDs follow alphabetical order, so sorted IDs give sorted skill names
+        self.skill_names = sorted(names)
+        self.skill_ids: Dict[str, int] = {s: i for i, s in enumerate(self.skill_names)}
+        self.skill_indptr, self.skill_indices = _csr(
+            [sorted(self.skill_ids[s] for s in skills) for skills in job_skills]
+        )
+        self.skill_counts = np.diff(self.skill_indptr)
+        self.skill_post_ptr, self.skill_post_jobs = _postings(
+            self.skill_indptr, self.skill_indices, len(self.skill_names)
+        )
+
+        # --- BM25 postings over title + description ---
+        # The store keeps descriptions only as term counts (tokenized at load)
+        term_ids: Dict[str, int] = {}
+        doc_rows = []
+        doc_tfs = []
+        for title_low, counts in zip(self.titles_low, store.description_terms()):
+            for tok in tokenize(title_low):
+                counts[tok] = counts.get(tok, 0) + TITLE_WEIGHT
+            doc_rows.append([term_ids.setdefault(t, len(term_ids)) for t in counts])
+            doc_tfs.append(list(counts.values()))
+        self.text_terms = term_ids
+        text_indptr, text_indices = _csr(doc_rows)
+        tfs = np.fromiter((c for r in doc_tfs for c in r), dtype=np.float64, count=len(text_indices))
+        self.doc_lengths = np.bincount(
+            np.repeat(np.arange(n), np.diff(text_indptr)), weights=tfs, minlength=n
+        )
+        avgdl = self.doc_lengths.mean() if n else 0.0
+        df = np.bincount(text_indices, minlength=len(term_ids))
+        idf = np.log(1.0 + (n - df + 0.5) / (df + 0.5))
+
+        # BM25 impact of each (job, term) pair, computed once at load
+        dl = np.repeat(self.doc_lengths, np.diff(text_indptr))
+        norm = BM25_K1 * (1.0 - BM25_B + BM25_B * dl / avgdl) if avgdl else np.full(len(tfs), BM25_K1)
+        impacts = idf[text_indices] * tfs * (BM25_K1 + 1.0) / (tfs + norm)
+        self.text_post_ptr, self.text_post_jobs = _postings(text_indptr, text_indices, len(term_ids))
+        order = np.argsort(text_indices, kind="stable")
+        self.text_post_impacts = impacts[order].astype(np.float32)
+
+        self._domain_masks = LRUCache(max_entries=DOMAIN_CACHE_SIZE, ttl_seconds=0)
+
+    # --- Snapshot ---
+    @property
+    def text_term_list(self) -> List[str]:
+        terms = [""] * len(self.text_terms)
+        for t, i in self.text_terms.items():
+            terms[i] = t
+        return terms
+
+    def save(self, path: str = INDEX_SNAPSHOT_DIR, store=None) -> Dict:
+        """
+        Write the built index to `path`:
+
+            meta.json      format, corpus version/watermark, build signature
+            <array>.npy    CSR matrices, posting lists and BM25 impacts
+            strings.json   display metadata, lowercased titles, skill names, BM25 terms
+            store*         the JobStore it was built from, if given (JobStore.save):
+                           lets a refresh merge new rows instead of reloading the table
+
+        The snapshot is written next to `path` and renamed into place, so a
+        running API never reads a partial one.
+        """
+        final_dir = os.path.normpath(path)
+        out_dir = final_dir + ".building"
+        shutil.rmtree(out_dir, ignore_errors=True)
+        os.makedirs(out_dir)
+
+        for name in _SNAPSHOT_ARRAYS:
+            np.save(os.path.join(out_dir, name + ".npy"), getattr(self, name))
+        with open(os.path.join(out_dir, "strings.json"), "w", encoding="utf-8") as f:
+            json.dump({name: getattr(self, name) for name in _SNAPSHOT_LISTS}, f, ensure_ascii=False)
+        if store is not None:
+            store.save(out_dir)
+        meta = {
+            "format": SNAPSHOT_FORMAT,
+            "version": self.version,
+            "watermark": self.watermark.isoformat() if self.watermark else None,
+            "size": self.size,
+            "signature": self.signature,
+            "store": store is not None,
+            "built_at": datetime.now(timezone.utc).isoformat(),
+        }
+        with open(os.path.join(out_dir, "meta.json"), "w", encoding="utf-8") as f:
+            json.dump(meta, f, indent=2)
+
+        old_dir = final_dir + ".old"
+        shutil.rmtree(old_dir, ignore_errors=True)
+        if os.path.exists(final_dir):
+            os.rename(final_dir, old_dir)
+        os.rename(out_dir, final_dir)
+        shutil.rmtree(old_dir, ignore_errors=True)  # open mmaps keep their (unlinked) files
+        return meta
+
+    @classmethod
+    def load(cls, path: str = INDEX_SNAPSHOT_DIR, skills_vocab: Optional[List[str]] = None) -> Optional["JobIndex"]:
+        """
+        The snapshot at `path` with its arrays memory-mapped, or None when it
+        is missing, from another format, or was built with a different
+        skills dictionary / BM25 setup.
+        """
+        meta = snapshot_meta(path)
+        if meta is None:
+            return None
+        if meta.get("format") != SNAPSHOT_FORMAT or meta.get("signature") != index_signature(skills_vocab):
+            print(f"[WARN] Index snapshot at {path} is stale (format/skills changed); ignoring it")
+            return None
+
+        index = cls.__new__(cls)
+        index.size = meta["size"]
+        index.version = meta["version"]
+        index.watermark = datetime.fromisoformat(meta["watermark"]) if meta["watermark"] else None
+        index.signature = meta["signature"]
+        for name in _SNAPSHOT_ARRAYS:
+            setattr(index, name, np.load(os.path.join(path, name + ".npy"), mmap_mode="r"))
+        with open(os.path.join(path, "strings.json"), encoding="utf-8") as f:
+            strings = json.load(f)
+        for name in _SNAPSHOT_LISTS[:-1]:  # text_term_list is derived from text_terms
+            setattr(index, name, strings[name])
+        index.skill_ids = {s: i for i, s in enumerate(index.skill_names)}
+        index.skill_counts = np.diff(index.skill_indptr)
+        index.text_terms = {t: i for i, t in enumerate(strings["text_term_list"])}
+        index._job_positions = None
+        index._domain_masks = LRUCache(max_entries=DOMAIN_CACHE_SIZE, ttl_seconds=0)
+        return index
+
+    # --- Per-request vectors ---
+    def skill_vector(self, skills: List[str]) -> np.ndarray:
+        """Boolean candidate vector over skill IDs."""
+        vec = np.zeros(len(self.skill_names), dtype=bool)
+        ids = [self.skill_ids[s] for s in skills if s in self.skill_ids]
+        vec[ids] = True
+        return vec
+
+    def skill_postings(self, cand_vec: np.ndarray) -> np.ndarray:
+        """Job positions requiring each candidate skill (one entry per shared skill)."""
+        return _gather(self.skill_post_ptr, self.skill_post_jobs, np.flatnonzero(cand_vec))
+
+    def query_terms(self, cv_text: str) -> List[int]:
+        """IDs of the distinct indexed terms in a CV (tokenized once)."""
+        return sorted({self.text_terms[t] for t in tokenize(cv_text) if t in self.text_terms})
+
+    def text_postings(self, term_ids: List[int]):
+        """(job positions, BM25 impacts) for the postings of `term_ids`."""
+        jobs = _gather(self.text_post_ptr, self.text_post_jobs, term_ids)
+        if len(term_ids) == 0:
+            return jobs, np.zeros(0, dtype=np.float32)
+        impacts = np.concatenate([self.text_post_impacts[self.text_post_ptr[i]:self.text_post_ptr[i + 1]] for i in term_ids])
+        return jobs, impacts
+
+    def skill_overlap_matrix(self, cand_vecs: np.ndarray) -> np.ndarray:
+        """Skill overlap counts for m candidates x all jobs (CSR mat-mat)."""
+        return _csr_matmat(self.skill_indptr, self.skill_indices, cand_vecs.astype(np.int32))
+
+    def text_score_matrix(self, cv_texts: List[str]) -> np.ndarray:
+        """BM25 scores for m CVs x all jobs, normalized so each CV's best job gets 1.0."""
+        out = np.zeros((len(cv_texts), self.size))
+        for i, cv_text in enumerate(cv_texts):
+            jobs, impacts = self.text_postings(self.query_terms(cv_text))
+            out[i] = np.bincount(jobs, weights=impacts, minlength=self.size)
+        return max_normalize(out)
+
+    def domain_masks(self, rule: DomainRule) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        (boost mask, reject mask, boosted positions) of a domain over every
+        job: one pass over the titles per domain, then cached per index.
+        """
+        masks = self._domain_masks.get(rule.domain)
+        if masks is None:
+            boost = np.fromiter((rule.boosts(t) for t in self.titles_low), dtype=bool, count=self.size)
+            reject = np.fromiter((rule.rejects(t) for t in self.titles_low), dtype=bool, count=self.size)
+            masks = (boost, reject, np.flatnonzero(boost).astype(np.int32))
+            self._domain_masks.set(rule.domain, masks)
+        return masks
+
+    def compile_domains(self, rules: Iterable[DomainRule]):
+        """Precompute the masks of known domains (the dashboard presets) before serving."""
+        for rule in rules:
+            self.domain_masks(rule)
+
+    # --- Result materialization ---
+    def position(self, job_id: int) -> Optional[int]:
+        """Row of a job ID, or None; the ID -> row map is built on first use (snapshot boots skip it)."""
+        if self._job_positions is None:
+            self._job_positions = {j: i for i, j in enumerate(self.job_ids)}
+        return self._job_positions.get(job_id)
+
+    def job_skills(self, pos: int) -> List[str]:
+        """Required skills of one job, sorted."""
+        return [self.skill_names[i] for i in self.skill_indices[self.skill_indptr[pos]:self.skill_indptr[pos + 1]]]
+
+    def job_skill_split(self, pos: int, cand_vec: np.ndarray):
+        """(overlap, gap) skill names for one job, both sorted."""
+        ids = self.skill_indices[self.skill_indptr[pos]:self.skill_indptr[pos + 1]]
+        have = cand_vec[ids]
+        return [self.skill_names[i] for i in ids[have]], [self.skill_names[i] for i in ids[~have]]
+
+    def job_result(self, pos: int, score: float, cand_vec: np.ndarray) -> Dict:
+        overlap, gap = self.job_skill_split(pos, cand_vec)
+        return {
+            "job_id": self.job_ids[pos],
+            "title": self.titles[pos],
+            "company": self.companies[pos],
+            "location": self.locations[pos],
+            "url": self.urls[pos],
+            "fit_score": float(score),
+            "overlap_skills": overlap,
+            "gap_skills": gap
+        }
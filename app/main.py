@@ -1,42 +1,257 @@
-import re
+import base64
+import heapq
+import json
+import os
+import threading
+from datetime import datetime, timedelta, timezone
+import numpy as np
 import pandas as pd
-from typing import List, Dict
-from .db import load_jobs_df
-from .ats import ats_score
+from typing import List, Dict, Iterator, Optional, Union
+from sqlalchemy.exc import SQLAlchemyError
+from .db import load_descriptions, load_job, load_jobs_df, load_jobs_since, load_skill_ids, prefilter_jobs
+from .ats import analyze_cv
+from .cache import LRUCache, make_backend, text_key
+from .domains import get_domain_rules
+from .index import (INDEX_SNAPSHOT_DIR, JobIndex, clean_text, corpus_version, max_normalize, snapshot_meta,
+                    split_skills)
+from .metrics import stage
+from .semantic import load_semantic_index, semantic_built_at
+from .skills import get_skill_matcher
+from .store import (DESCRIPTION_COLUMN, STORE_CHUNK_ROWS, STORE_COLUMNS, JobStore, has_changes, process_rss_bytes,
+                    saved_keys)
+
+# Upper bound on candidate x job cells scored at once by compute_batch
+BATCH_CELLS = int(os.getenv("BATCH_CELLS", "4000000"))
+
+# How many ranked jobs to cache per CV/domain, so other top_k values are a slice
+RANK_CACHE_DEPTH = int(os.getenv("MATCH_CACHE_DEPTH", "100"))
+# Depth ranked (and held) once a page goes past MATCH_CACHE_DEPTH, so paging on rarely re-ranks
+MATCH_PAGE_DEPTH = int(os.getenv("MATCH_PAGE_DEPTH", "1000"))
+
+# Semantic mode: weight of embedding similarity in fit_score, ANN fan-out
+MATCH_MODES = ("keyword", "semantic", "prefilter")
+SEMANTIC_WEIGHT = float(os.getenv("SEMANTIC_WEIGHT", "0.3"))
+SEMANTIC_CANDIDATES = int(os.getenv("SEMANTIC_CANDIDATES", "200"))
+SEMANTIC_NPROBE = int(os.getenv("SEMANTIC_NPROBE", "8"))
+
+# "memory": hold the whole corpus (snapshot or table) in the API process;
+# "database": keep it in the database and serve keyword requests in prefilter mode
+CORPUS_MODE = os.getenv("CORPUS_MODE", "memory")
+# Prefilter mode: most jobs the database hands back per request (best keyword score first)
+PREFILTER_LIMIT = int(os.getenv("PREFILTER_LIMIT", "2000"))
+# Same without a domain: BM25 on the descriptions decides, and the database can only
+# order by skill overlap, so it hands back more rows (with their descriptions)
+PREFILTER_TEXT_LIMIT = int(os.getenv("PREFILTER_TEXT_LIMIT", str(PREFILTER_LIMIT * 4)))
+
+# Re-read rows this far behind the watermark on refresh (late commits)
+REFRESH_OVERLAP_SECONDS = int(os.getenv("REFRESH_OVERLAP_SECONDS", "300"))
+
+# Columns read from linkedin_jobs (descriptions are tokenized, then dropped)
+LOAD_COLUMNS = STORE_COLUMNS + (DESCRIPTION_COLUMN,)
+# Descriptions fetched for GET /jobs/{id} kept per process
+DESCRIPTION_CACHE_SIZE = int(os.getenv("DESCRIPTION_CACHE_SIZE", "256"))
+
+class InvalidCursor(ValueError):
+    """A cursor that was not issued by `page` (or belongs to another CV)."""
+
+
+class CursorExpired(Exception):
+    """The ranking a cursor points into is no longer held (TTL, eviction, corpus refresh); resend the CV."""
+
+
+class DatabaseUnavailable(Exception):
+    """A request that needs the database (prefilter mode) could not reach it; retry later."""
 
-SKILL_PATH = "data/skills_dict.txt"
 
 class JobRecommender:
-    def __init__(self):
+    def __init__(self, jobs: Optional[Union[pd.DataFrame, JobStore]] = None):
+        """
+        Index `jobs` (a frame, or a JobStore already built, e.g. from chunks), or (when None) memory-map the prebuilt index snapshot,
+        falling back to the database when there is no usable snapshot. A
+        database error leaves an empty, not-ready index for the refresher to
+        fill instead of failing the import. With CORPUS_MODE=database nothing
+        is loaded: every request is prefiltered in the database.
+        """
         print("Loading skills dictionary...")
-        self.skills_vocab = self._load_skills()
-
-        print("Loading jobs from PostgreSQL...")
-        self.jobs = load_jobs_df()
-        # Normalize columns
-        self.jobs.columns = [c.lower() for c in self.jobs.columns]
-        print(f"Loaded {len(self.jobs)} jobs.")
-
-    def _load_skills(self):
-        try:
-            with open(SKILL_PATH, "r", encoding="utf-8") as f:
-                return [s.strip().lower() for s in f if s.strip()]
-        except Exception as e:
-            print(f"Error loading skills: {e}")
-            return []
+        self.skill_matcher = get_skill_matcher()
+        self.skills_vocab = self.skill_matcher.skills
+        self.domain_rules = get_domain_rules()
+
+        self.jobs: Optional[JobStore] = None  # None while serving a snapshot
+        self.index = None
+        self.index_source = None
+        self.load_error = None
+        self.corpus_mode = CORPUS_MODE if jobs is None else "memory"
+        if self.corpus_mode == "database":
+            self.index = JobIndex(pd.DataFrame(), self.skills_vocab)
+            self.index_source = "prefilter"
+            print("CORPUS_MODE=database: jobs stay in the database (prefilter mode).")
+        elif jobs is None:
+            try:
+                self.index = JobIndex.load(INDEX_SNAPSHOT_DIR, self.skills_vocab)
+            except Exception as e:
+                print(f"[WARN] Could not load index snapshot: {e}")
+            if self.index is not None:
+                self.index_source = "snapshot"
+                print(f"Loaded index snapshot: {self.index.size} jobs (version {self.index.version}).")
+        if self.index is None:
+            try:
+                if jobs is None:
+                    print("Loading jobs from PostgreSQL...")
+                    self.jobs = load_job_store()
+                elif isinstance(jobs, JobStore):
+                    self.jobs = jobs
+                else:
+                    self.jobs = JobStore.from_frame(jobs)
+                print(f"Loaded {len(self.jobs)} jobs.")
+                print("Building job index...")
+                self.index = JobIndex(self.jobs, self.skills_vocab)
+                self.index_source = "database"
+            except Exception as e:
+                print(f"[WARN] Could not load jobs: {e}")
+                self.load_error = str(e)
+                self.index = JobIndex(pd.DataFrame(), self.skills_vocab)
+        self.index.compile_domains(self.domain_rules.presets.values())
+        self.refreshed_at = datetime.now(timezone.utc)
+        self._refresh_lock = threading.Lock()
+
+        # Optional embedding index for mode="semantic" (built at ingest)
+        self.semantic = load_semantic_index()
+        self._alignment = None
+
+        # Extracted skills + ATS per CV, and ranked jobs per CV/domain/corpus version
+        backend = make_backend()
+        self.profile_cache = LRUCache(backend=backend)
+        self.ranking_cache = LRUCache(backend=backend)
+        self.description_cache = LRUCache(max_entries=DESCRIPTION_CACHE_SIZE)
+
+    def refresh(self, full: bool = False) -> bool:
+        """
+        Pull new/changed jobs from PostgreSQL and swap in a rebuilt index.
+
+        Only rows with `loaded_at` past the current watermark (minus
+        REFRESH_OVERLAP_SECONDS, to catch late-committing ingests) are
+        fetched. The new JobIndex is built off to the side and published with
+        a single attribute assignment, so in-flight requests keep using the
+        snapshot they started with. When serving an index snapshot, the rows
+        are merged into the job store saved with it (read from disk the first
+        time something changed). Falls back to a full reload when the table
+        has no `loaded_at` column, and for a snapshot saved without its
+        store. Returns True if the corpus changed.
+        """
+        if self.corpus_mode == "database":
+            return False  # nothing held in memory
+        with self._refresh_lock:
+            self._reload_semantic()
+            watermark = self.index.watermark
+            snapshot = self.jobs is None and self.index_source == "snapshot"
+            if full or watermark is None or (self.jobs is None and not snapshot):
+                jobs = load_job_store()
+            else:
+                since = watermark - timedelta(seconds=REFRESH_OVERLAP_SECONDS)
+                delta = load_jobs_since(since, columns=LOAD_COLUMNS)
+                base = self.jobs
+                if snapshot:
+                    # Only the snapshot's ids and timestamps are read until something changed
+                    meta = snapshot_meta(INDEX_SNAPSHOT_DIR)
+                    known = saved_keys(INDEX_SNAPSHOT_DIR) if meta and meta["version"] == self.index.version else None
+                    if known is not None and not has_changes(delta, known):
+                        return False
+                    base = self._snapshot_store()
+                jobs = base.upsert(delta) if base is not None else load_job_store()
+                if jobs is None:
+                    return False
+
+            index = JobIndex(jobs, self.skills_vocab)
+            self.jobs = jobs
+            self.load_error = None
+            if index.version == self.index.version and self.ready:
+                return False
+            index.compile_domains(self.domain_rules.presets.values())
+            self.index = index  # atomic swap
+            self.index_source = "database"
+            self.ranking_cache.clear()  # keys are versioned; this just frees memory
+            self.refreshed_at = datetime.now(timezone.utc)
+            print(f"Corpus refreshed: {index.size} jobs (version {index.version}).")
+            return True
+
+    def _snapshot_store(self) -> Optional[JobStore]:
+        """The job store saved with the served snapshot (None if it has none or it does not match)."""
+        store = JobStore.load(INDEX_SNAPSHOT_DIR)
+        if store is None or corpus_version(store.frame) != self.index.version:
+            print("[WARN] Index snapshot has no matching job store; refreshing from the whole table")
+            return None
+        return store
+
+    def _reload_semantic(self):
+        """Pick up embeddings rebuilt by the ingest job since they were loaded."""
+        loaded = self.semantic.meta["built_at"] if self.semantic is not None else None
+        built_at = semantic_built_at()
+        if built_at is not None and built_at != loaded:
+            self.semantic = load_semantic_index()
+            self._alignment = None
+
+    @property
+    def ready(self) -> bool:
+        """Whether a corpus has been loaded (from the snapshot or the database)."""
+        return self.index_source is not None
+
+    def memory_info(self) -> Dict:
+        """Resident size of the job store, plus this process's RSS."""
+        return {
+            "store": self.jobs.memory_usage() if self.jobs is not None else None,
+            "process_rss_bytes": process_rss_bytes(),
+        }
+
+    def job_details(self, job_id: int) -> Optional[Dict]:
+        """Display fields plus the full description (read from the database on demand)."""
+        if self.corpus_mode == "database":
+            job = load_job(job_id)
+            if job is None:
+                return None
+            return {
+                "job_id": int(job["id"]),
+                **{c: clean_text(job[c]) for c in ("title", "company", "location", "url")},
+                "skills_required": sorted(set(split_skills(job["skills_required"]))),
+                "description": clean_text(job["description"]),
+            }
+        index = self.index
+        pos = index.position(job_id)
+        if pos is None:
+            return None
+        description = self.description_cache.get(str(job_id))
+        if description is None:
+            description = load_descriptions([job_id]).get(job_id, "")
+            self.description_cache.set(str(job_id), description)
+        return {
+            "job_id": job_id,
+            "title": index.titles[pos],
+            "company": index.companies[pos],
+            "location": index.locations[pos],
+            "url": index.urls[pos],
+            "skills_required": index.job_skills(pos),
+            "description": description,
+        }
+
+    def corpus_info(self) -> Dict:
+        index = self.index
+        return {
+            "version": index.version,
+            "source": self.index_source,
+            "corpus_mode": self.corpus_mode,
+            "load_error": self.load_error,
+            "jobs": index.size,
+            "watermark": index.watermark.isoformat() if index.watermark else None,
+            "refreshed_at": self.refreshed_at.isoformat(),
+            "semantic": self.semantic.meta if self.semantic is not None else None,
+        }
 
     def extract_skills(self, text: str) -> List[str]:
-        text_low = text.lower()
-        skills_found = []
-        for skill in sorted(self.skills_vocab, key=len, reverse=True):
-            if re.search(r"\b" + re.escape(skill) + r"\b", text_low):
-                skills_found.append(skill)
-        return sorted(list(set(skills_found)))
-
-    def compute_match_score(self, cv_text, candidate_skills, job_row, user_domain=None):
+        return self.skill_matcher.find_all(text)
+
+    def compute_match_score(self, cv_text, candidate_skills, job_row, user_domain=None, text_score=0.0):
         # 1. SKILL SCORE
-        skills_str = str(job_row.get("skills_required", ""))
-        job_skills = [s.strip().lower() for s in skills_str.split(";") if s.strip()]
+        job_skills = split_skills(job_row.get("skills_required", ""))
         
         set_c = set(candidate_skills)
         set_j = set(job_skills)
@@ -46,45 +261,29 @@ class JobRecommender:
         skill_score = len(overlap) / len(set_j) if len(set_j) > 0 else 0.0
 
         # 2. TITLE MATCH
-        title = str(job_row.get("title", "")).lower()
+        title = clean_text(job_row.get("title", "")).lower()
         
         # 3. DOMAIN ENFORCEMENT (THE FIX)
         domain_score = 0.0
-        
-        if user_domain:
-            user_domain = user_domain.lower()
-            
+        rule = self.domain_rules.get(user_domain)  # compiled once per domain
+
+        if rule is not None:
             # A. HARD REJECT LOGIC (Anti-False Positive)
-            # If user wants Food/Bio, reject tech keywords immediately
-            if "food" in user_domain or "bio" in user_domain:
-                tech_keywords = ["data scientist", "software", "full stack", "react", "python", "java developer", "ai engineer"]
-                if any(k in title for k in tech_keywords):
-                    return -1.0, [], [] # Kill this match immediately
-            
-            # If user wants Core Engineering, reject IT keywords
-            if "civil" in user_domain or "mechanical" in user_domain or "electrical" in user_domain:
-                it_keywords = ["software", "web", "frontend", "backend", "data", "cloud"]
-                if any(k in title for k in it_keywords):
-                    return -1.0, [], [] # Kill match
+            # e.g. Food/Bio rejects tech titles, Core Engineering rejects IT titles
+            if rule.rejects(title):
+                return -1.0, [], [] # Kill this match immediately
 
             # B. POSITIVE BOOSTING
-            # Check if any word from the selected domain matches the job title
+            # Check if any word from the selected domain (or a rule's extra
+            # keyword) matches the job title
             # e.g. User: "Food Technologist", Job: "Food Safety Officer" -> Match on "Food"
-            domain_keywords = user_domain.split()
-            matches = sum(1 for k in domain_keywords if k in title)
-            
-            if matches > 0:
+            if rule.boosts(title):
                 domain_score = 1.0 # High boost for relevant title matches
-            elif "technologist" in title and "food" in user_domain: # Specific override
-                domain_score = 1.0
 
         else:
-            # No domain selected? Fall back to basic title matching
-            generic_words = ["senior", "junior", "lead", "manager", "associate", "intern"]
-            title_keywords = [w for w in re.split(r'\W+', title) if w and w not in generic_words and len(w) > 2]
-            
-            matches = sum(1 for w in title_keywords if w in cv_text.lower())
-            domain_score = matches / len(title_keywords) if len(title_keywords) > 0 else 0.0
+            # No domain selected? Use the job's BM25 relevance to the CV
+            # (title + description, normalized so the best job gets 1.0)
+            domain_score = text_score
 
         # 4. FINAL WEIGHTED SCORE
         # Domain matching is king (70%), Skills are secondary (30%)
@@ -92,31 +291,390 @@ class JobRecommender:
 
         return final_score, sorted(list(overlap)), sorted(list(gap))
 
-    def compute(self, cv_text: str, top_k: int = 5, domain: str = None) -> Dict:
-        ats = ats_score(cv_text)
-        candidate_skills = self.extract_skills(cv_text)
-
-        results = []
-        for _, row in self.jobs.iterrows():
-            score, overlap, gap = self.compute_match_score(cv_text, candidate_skills, row, domain)
-            
-            # Filter out garbage/rejected matches
-            if score > 0.01: 
-                results.append({
-                    "job_id": int(row.get("id", 0)),
-                    "title": row.get("title", "Unknown Role"),
-                    "company": row.get("company", "Unknown Company"),
-                    "location": row.get("location", "India"),
-                    "url": row.get("url", "#"),
-                    "fit_score": score,
-                    "overlap_skills": overlap,
-                    "gap_skills": gap
-                })
-
-        top_jobs = sorted(results, key=lambda x: x["fit_score"], reverse=True)[:top_k]
+    def score_candidates(self, index: JobIndex, cv_text: str, cand_vec: np.ndarray, user_domain: str = None,
+                         extra: Optional[np.ndarray] = None, overlap: Optional[np.ndarray] = None):
+        """
+        Vectorized `compute_match_score` restricted to candidate jobs.
+
+        Candidates are the union of the posting lists of the CV's skills and
+        of its BM25 terms (or, with a domain, of the domain keywords). Every other job scores exactly 0 and is dropped by the
+        `score > 0.01` cutoff anyway. `extra` positions are scored as well.
+        `overlap` (skills shared with the CV, per job, as counted by the
+        prefilter query) replaces the walk over the skill postings.
+        Returns (positions, scores), positions ascending; rejected jobs
+        score -1.0.
+        """
+        skill_hits = index.skill_postings(cand_vec) if overlap is None else np.flatnonzero(overlap)
+        parts = [skill_hits]
+        if extra is not None:
+            parts.append(extra)
+
+        rule = self.domain_rules.get(user_domain)
+        if rule is not None:
+            boost_mask, reject_mask, boost_jobs = index.domain_masks(rule)
+            parts.append(boost_jobs)
+        else:
+            text_jobs, impacts = index.text_postings(index.query_terms(cv_text))
+            parts.append(text_jobs)
+
+        cands = np.unique(np.concatenate(parts))
+        shared = _sum_in(cands, skill_hits) if overlap is None else overlap[cands]
+        skill_score = _ratio(shared, index.skill_counts[cands])
+        reject = np.zeros(len(cands), dtype=bool)
+
+        if rule is not None:
+            reject = reject_mask[cands]
+            domain_score = boost_mask[cands].astype(float)
+        else:
+            domain_score = max_normalize(_sum_in(cands, text_jobs, impacts))
+
+        final_score = (domain_score * 0.7) + (skill_score * 0.3)
+        final_score[reject] = -1.0
+        return cands, final_score
+
+    def semantic_scores(self, index: JobIndex, cv_text: str, cand_vec: np.ndarray, domain: str = None):
+        """
+        Keyword scores blended with embedding similarity.
+
+        The CV is embedded once; its approximate nearest jobs (IVF search over
+        the memory-mapped job embeddings) join the keyword candidates, and
+        each candidate's fit becomes
+        (1 - SEMANTIC_WEIGHT) * keyword fit + SEMANTIC_WEIGHT * cosine.
+        Domain-rejected jobs stay at -1.0.
+        """
+        semantic = self.semantic
+        rows_for_pos, pos_for_row = self._embedding_alignment(index)
+        query = semantic.encode_query(cv_text)
+
+        nn_rows, _ = semantic.search(query, SEMANTIC_CANDIDATES, SEMANTIC_NPROBE)
+        nn_pos = pos_for_row[nn_rows]
+        positions, scores = self.score_candidates(index, cv_text, cand_vec, domain, extra=nn_pos[nn_pos >= 0])
+
+        sims = np.zeros(len(positions))
+        rows = rows_for_pos[positions]
+        embedded = rows >= 0
+        sims[embedded] = np.clip(semantic.similarity(rows[embedded], query), 0.0, 1.0)
+
+        blended = (1 - SEMANTIC_WEIGHT) * scores + SEMANTIC_WEIGHT * sims
+        blended[scores < 0] = -1.0
+        return positions, blended
+
+    def _embedding_alignment(self, index: JobIndex):
+        """(embedding row per job position, job position per embedding row), -1 if absent."""
+        cached = self._alignment
+        if cached is not None and cached[0] == index.version:
+            return cached[1], cached[2]
+        row_of_url = {u: i for i, u in enumerate(self.semantic.urls)}
+        rows_for_pos = np.array([row_of_url.get(str(u), -1) for u in index.urls], dtype=np.int64)
+        pos_for_row = np.full(self.semantic.size, -1, dtype=np.int64)
+        found = np.flatnonzero(rows_for_pos >= 0)
+        pos_for_row[rows_for_pos[found]] = found
+        self._alignment = (index.version, rows_for_pos, pos_for_row)
+        return rows_for_pos, pos_for_row
+
+    def prefilter(self, cv_text: str, candidate_skills: List[str], domain: str = None, depth: int = 0):
+        """
+        Keyword scoring over only the jobs the database prefilters:
+        `prefilter_jobs` returns the (at most max(PREFILTER_LIMIT, depth))
+        best jobs sharing a skill with the CV, plus, with a domain, those
+        whose title holds a boost keyword, without the rejected titles. A
+        throwaway JobIndex over just those rows is scored with
+        `score_candidates`, reusing the database's overlap counts. With a
+        domain the database orders rows exactly as the scorer does, so the
+        best jobs match keyword mode even when the limit cuts; without one,
+        it can only order by skill overlap, so PREFILTER_TEXT_LIMIT rows are
+        fetched instead, BM25 statistics are those of the prefiltered jobs
+        and jobs matching only on text are not fetched.
+        Returns (index, positions, scores, truncated); raises
+        DatabaseUnavailable when the database cannot be queried.
+        """
+        rule = self.domain_rules.get(domain)
+        limit = max(PREFILTER_LIMIT if rule else PREFILTER_TEXT_LIMIT, depth)
+        with stage("prefilter"):
+            try:
+                skill_ids = load_skill_ids(candidate_skills)
+                jobs = prefilter_jobs(skill_ids.values(), limit, rule.boost if rule else (),
+                                      rule.reject if rule else (), with_descriptions=rule is None)
+            except SQLAlchemyError as e:
+                raise DatabaseUnavailable(f"Could not query the jobs database: {getattr(e, 'orig', None) or e}")
+        with stage("rank"):
+            jobs = jobs.sort_values("id", kind="stable")  # the index's corpus order, so `overlap` lines up
+            index = JobIndex(jobs.drop(columns=["overlap", "skill_count", "boosted"]))
+            positions, scores = self.score_candidates(index, cv_text, index.skill_vector(candidate_skills), domain,
+                                                      overlap=jobs["overlap"].to_numpy(dtype=np.int64))
+        return index, positions, scores, len(jobs) >= limit
+
+    def rank(self, index: JobIndex, cv_text: str, cand_vec: np.ndarray, domain: str, depth: int,
+             mode: str = "keyword"):
+        """
+        Best `depth` matches as (positions, scores, complete), where complete
+        means no further job passed the cutoff.
+        """
+        if mode == "semantic":
+            positions, scores = self.semantic_scores(index, cv_text, cand_vec, domain)
+        else:
+            positions, scores = self.score_candidates(index, cv_text, cand_vec, domain)
+
+        return _best(positions, scores, depth)
+
+    def profile(self, cv_text: str, key: str):
+        """(ATS breakdown, candidate_skills) for a CV, cached by content hash."""
+        profile = self.profile_cache.get("ats:" + key)
+        if profile is None:
+            profile = analyze_cv(cv_text, self.skill_matcher)
+            self.profile_cache.set("ats:" + key, profile)
+        return profile
+
+    def compute(self, cv_text: str, top_k: int = 5, domain: str = None, mode: str = "keyword") -> Dict:
+        """ATS profile of a CV and its best `top_k` jobs."""
+        result = self.page(cv_text, top_k, domain, mode)
+        del result["next_cursor"]
+        return result
+
+    def page(self, cv_text: Optional[str] = None, top_k: int = 5, domain: str = None, mode: str = "keyword",
+             cursor: Optional[str] = None) -> Dict:
+        """
+        `compute` plus a `next_cursor` (None after the last match). Passing
+        it back returns the next `top_k` jobs of the same ranking, sliced from
+        the ranking cache: the CV is not scored again and its text may be
+        left out. The cursor carries the CV's hash, domain and mode, which
+        override the arguments. Raises CursorExpired when the ranking is no
+        longer held and no text was sent to rebuild it.
+        """
+        index, (ats, candidate_skills), cand_vec, positions, scores, next_cursor = self._page(
+            cv_text, top_k, domain, mode, cursor)
+        with stage("results"):
+            top_jobs = [index.job_result(p, s, cand_vec) for p, s in zip(positions, scores)]
 
         return {
-            "ats_score": ats,
-            "candidate_skills": candidate_skills,
+            "ats_score": ats["score"],
+            "ats_breakdown": ats,
+            "candidate_skills": list(candidate_skills),
             "top_jobs": top_jobs,
-        }
\ No newline at end of file
+            "next_cursor": next_cursor,
+        }
+
+    def stream(self, cv_text: Optional[str] = None, top_k: int = 5, domain: str = None, mode: str = "keyword",
+               cursor: Optional[str] = None) -> Iterator[Dict]:
+        """
+        `page` as a sequence of dicts: the profile (ats_score, ats_breakdown,
+        candidate_skills), then one per job in rank order with its `rank`
+        (1-based over the whole ranking), each built only when the consumer
+        asks for it, and last {"next_cursor": ...}.
+        """
+        index, (ats, candidate_skills), cand_vec, positions, scores, next_cursor = self._page(
+            cv_text, top_k, domain, mode, cursor)
+        yield {"ats_score": ats["score"], "ats_breakdown": ats, "candidate_skills": list(candidate_skills)}
+        first = decode_cursor(cursor)["offset"] + 1 if cursor else 1
+        for rank, (p, s) in enumerate(zip(positions, scores), first):
+            yield {"rank": rank, **index.job_result(p, s, cand_vec)}
+        yield {"next_cursor": next_cursor}
+
+    def _mode(self, mode: str) -> str:
+        """The mode a request actually runs in (ValueError if unavailable)."""
+        if mode not in MATCH_MODES:
+            raise ValueError(f"Unknown mode {mode!r}; expected one of {', '.join(MATCH_MODES)}")
+        if self.corpus_mode == "database":
+            if mode == "semantic":
+                raise ValueError("Semantic mode is unavailable with CORPUS_MODE=database")
+            mode = "prefilter"
+        if mode == "semantic" and self.semantic is None:
+            raise ValueError("Semantic mode is unavailable: run scripts/build_embeddings.py first")
+        return mode
+
+    def _page(self, cv_text: Optional[str], top_k: int, domain: Optional[str], mode: str, cursor: Optional[str]):
+        """(index, profile, cand_vec, positions, scores, next_cursor) of one page of a CV's ranking."""
+        offset = 0
+        if cursor is not None:
+            state = decode_cursor(cursor)
+            key, domain, mode, offset = state["key"], state["domain"], state["mode"], state["offset"]
+            if cv_text is not None and text_key(cv_text) != key:
+                raise InvalidCursor("The cursor belongs to a different CV")
+        elif cv_text is None:
+            raise ValueError("Send cv_text (or a cursor from a previous page)")
+        else:
+            key = text_key(cv_text)
+        mode = self._mode(mode)
+
+        index = self.index  # one corpus snapshot for the whole request
+        end = offset + max(top_k, 0)
+        with stage("profile"):  # skill extraction + ATS, or a profile cache hit
+            if cv_text is not None:
+                ats, candidate_skills = self.profile(cv_text, key)
+            else:
+                profile = self.profile_cache.get("ats:" + key)
+                if profile is None:
+                    raise CursorExpired()
+                ats, candidate_skills = profile
+        if mode == "prefilter":
+            # Not cached: the prefiltered jobs follow the database, not a corpus version
+            if cv_text is None:
+                raise CursorExpired()
+            index, positions, scores, truncated = self.prefilter(cv_text, candidate_skills, domain, end)
+            cand_vec = index.skill_vector(candidate_skills)
+            positions, scores, complete = _best(positions, scores, end)
+            complete = complete and not truncated
+        else:
+            with stage("rank"):  # candidate scoring + top-k, or a ranking cache hit
+                cand_vec = index.skill_vector(candidate_skills)
+
+                # Cached per corpus version, so a refresh invalidates it automatically;
+                # a different top_k, or the next page, is just a slice of the cached ranking
+                mode_key = f"semantic@{self.semantic.meta['built_at']}" if mode == "semantic" else mode
+                rank_key = f"rank:{index.version}:{mode_key}:{(domain or '').lower()}:{key}"
+                ranking = self.ranking_cache.get(rank_key)
+                if ranking is None or (len(ranking[0]) < end and not ranking[2]):
+                    if cv_text is None:
+                        raise CursorExpired()
+                    if not self.ranking_cache.enabled:
+                        depth = end
+                    else:
+                        depth = max(end, RANK_CACHE_DEPTH if end <= RANK_CACHE_DEPTH else MATCH_PAGE_DEPTH)
+                    ranking = self.rank(index, cv_text, cand_vec, domain, depth, mode)
+                    self.ranking_cache.set(rank_key, ranking)
+                positions, scores, complete = ranking
+
+        more = end > offset and (end < len(positions) or not complete)
+        next_cursor = encode_cursor({"key": key, "domain": domain, "mode": mode, "offset": end}) if more else None
+        return index, (ats, candidate_skills), cand_vec, positions[offset:end], scores[offset:end], next_cursor
+
+    def cache_stats(self) -> Dict:
+        return {"profile": self.profile_cache.stats(), "ranking": self.ranking_cache.stats()}
+
+    def compute_batch(self, cvs: List[Dict]) -> Iterator[Dict]:
+        """
+        Rank many CVs at once. Each item is a dict with `cv_text` and optional
+        `top_k` / `domain` / `mode`; yields one `compute`-style result per CV,
+        in order.
+
+        Keyword-mode CVs are scored in chunks as a candidate x job matrix (one
+        CSR mat-mat for skill overlap plus BM25 rows), sized so a
+        chunk's score matrix stays around BATCH_CELLS cells. Semantic- and prefilter-mode
+        CVs (every CV with CORPUS_MODE=database) go through `compute` one by one.
+        """
+        index = self.index
+        chunk_size = max(1, BATCH_CELLS // max(index.size, len(index.skill_indices), 1))
+
+        pending = []
+        for c in cvs:
+            mode = c.get("mode") or "keyword"
+            if mode == "keyword" and self.corpus_mode != "database":
+                pending.append(c)
+                if len(pending) == chunk_size:
+                    yield from self._batch_keyword(index, pending)
+                    pending = []
+            else:
+                yield from self._batch_keyword(index, pending)
+                pending = []
+                yield self.compute(c["cv_text"], top_k=c.get("top_k", 5), domain=c.get("domain"), mode=mode)
+        yield from self._batch_keyword(index, pending)
+
+    def _batch_keyword(self, index: JobIndex, chunk: List[Dict]) -> Iterator[Dict]:
+        if not chunk:
+            return
+        texts = [c["cv_text"] for c in chunk]
+        domains = [(c.get("domain") or "").lower() for c in chunk]
+
+        with stage("profile"):
+            profiles = [analyze_cv(t, self.skill_matcher) for t in texts]
+            candidate_skills = [skills for _, skills in profiles]
+        with stage("rank"):
+            cand_vecs = np.stack([index.skill_vector(s) for s in candidate_skills])
+            skill_score = _ratio(index.skill_overlap_matrix(cand_vecs), index.skill_counts)
+
+            domain_score = np.zeros_like(skill_score)
+            reject = np.zeros(skill_score.shape, dtype=bool)
+            general = [i for i, d in enumerate(domains) if not d]
+            if general:
+                domain_score[general] = index.text_score_matrix([texts[i] for i in general])
+            for user_domain in set(d for d in domains if d):
+                rows = [i for i, d in enumerate(domains) if d == user_domain]
+                boost_mask, reject_mask, _ = index.domain_masks(self.domain_rules.get(user_domain))
+                domain_score[rows] = boost_mask.astype(float)
+                reject[rows] = reject_mask
+
+            final_score = (domain_score * 0.7) + (skill_score * 0.3)
+            final_score[reject] = -1.0
+
+        for i, c in enumerate(chunk):
+            with stage("results"):
+                ranked = _top_k(final_score[i], c.get("top_k", 5))
+                result = {
+                    "ats_score": profiles[i][0]["score"],
+                    "ats_breakdown": profiles[i][0],
+                    "candidate_skills": candidate_skills[i],
+                    "top_jobs": [index.job_result(pos, final_score[i, pos], cand_vecs[i]) for pos in ranked],
+                }
+            yield result
+
+
+def load_job_store() -> JobStore:
+    """Stream the jobs table into a JobStore, one chunk of descriptions at a time."""
+    return JobStore.from_chunks(load_jobs_df(columns=LOAD_COLUMNS, chunksize=STORE_CHUNK_ROWS))
+
+
+def build_index_snapshot(jobs: pd.DataFrame, path: str = INDEX_SNAPSHOT_DIR) -> Dict:
+    """Build the matching index for `jobs` exactly as the API would and save it to `path`."""
+    store = JobStore.from_frame(jobs)
+    index = JobIndex(store, get_skill_matcher().skills)
+    return index.save(path, store)
+
+
+def encode_cursor(state: Dict) -> str:
+    """Opaque, URL-safe token for the next page: {key, domain, mode, offset}."""
+    data = json.dumps([state["key"], state["domain"], state["mode"], state["offset"]], separators=(",", ":"))
+    return base64.urlsafe_b64encode(data.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Dict:
+    try:
+        key, domain, mode, offset = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        valid = (isinstance(key, str) and len(key) == 64 and isinstance(domain, (str, type(None)))
+                 and mode in MATCH_MODES and isinstance(offset, int) and offset >= 0)
+    except (ValueError, TypeError):
+        valid = False
+    if not valid:
+        raise InvalidCursor("Invalid cursor")
+    return {"key": key, "domain": domain, "mode": mode, "offset": offset}
+
+
+def _best(positions: np.ndarray, scores: np.ndarray, depth: int):
+    """(positions, scores, complete) of the best `depth` scores above the 0.01 cutoff."""
+    # Filter out garbage/rejected matches, then keep the best with a
+    # bounded heap (nlargest is stable, so ties keep corpus order)
+    keep = np.flatnonzero(scores > 0.01)
+    best = heapq.nlargest(depth, keep, key=scores.__getitem__)
+    return positions[best], scores[best], len(keep) <= depth
+
+
+def _top_k(scores: np.ndarray, top_k: int) -> np.ndarray:
+    """
+    Positions of the best `top_k` scores above the 0.01 cutoff, ordered like
+    heapq.nlargest over positions (ties keep corpus order).
+    """
+    valid = np.flatnonzero(scores > 0.01)
+    if top_k <= 0:
+        return valid[:0]
+    if len(valid) > top_k:
+        vals = scores[valid]
+        kth = np.partition(vals, len(vals) - top_k)[len(vals) - top_k]
+        above = vals > kth
+        ties = np.flatnonzero(vals == kth)[:top_k - int(above.sum())]
+        valid = np.sort(np.concatenate([valid[above], valid[ties]]))
+    return valid[np.argsort(-scores[valid], kind="stable")]
+
+
+def _sum_in(positions: np.ndarray, hits: np.ndarray, weights: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    For each of the (sorted, unique) `positions`, the number of times it
+    occurs in `hits` (or the sum of the matching `weights`, in hit order).
+    """
+    jobs, inverse = np.unique(hits, return_inverse=True)
+    out = np.zeros(len(positions))
+    out[np.searchsorted(positions, jobs)] = np.bincount(inverse, weights=weights, minlength=len(jobs))
+    return out
+
+
+def _ratio(num: np.ndarray, den: np.ndarray) -> np.ndarray:
+    """num / den elementwise (den broadcast along the last axis), 0 where den == 0."""
+    return np.divide(num, den, out=np.zeros(num.shape), where=den > 0)
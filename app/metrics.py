@@ -0,0 +1,267 @@
+"""
+Prometheus metrics and per-request stage timings.
+
+No prometheus_client dependency: counters and histograms are a few dicts
+behind a lock, rendered in the Prometheus text format by GET /metrics.
+Gauges (corpus size, caches, pools) are read from their owners at scrape
+time, so serving a request never touches them.
+
+Stage timings are collected per request: `timed(fn)` runs `fn` with a
+StageTimer in a context variable, and every `with stage("name"):` block in
+the code it calls adds its duration. Outside `timed` a stage block is a
+no-op. The same list feeds the stage histograms and the Server-Timing
+header.
+"""
+import bisect
+import math
+import os
+import threading
+from contextvars import ContextVar
+from time import perf_counter
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+# Upper bounds (seconds) of the latency histogram buckets, from a cached
+# profile (~0.1 ms) to a cold PDF upload
+METRICS_BUCKETS = tuple(sorted(float(b) for b in os.getenv(
+    "METRICS_BUCKETS", "0.0005,0.001,0.0025,0.005,0.01,0.025,0.05,0.1,0.25,0.5,1,2.5,5,10"
+).split(",")))
+
+Labels = Tuple[str, ...]
+
+
+# --- Stage timings ---
+class StageTimer:
+    """(stage, seconds) pairs of one request, in the order they ran."""
+
+    __slots__ = ("stages",)
+
+    def __init__(self):
+        self.stages: List[Tuple[str, float]] = []
+
+
+_timer: ContextVar[Optional[StageTimer]] = ContextVar("stage_timer", default=None)
+
+
+class stage:
+    """`with stage("rank"):` times the block as "rank" if a request is being timed."""
+
+    # A class, not @contextmanager: it runs several times per request
+    __slots__ = ("name", "timer", "t0")
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def __enter__(self):
+        self.timer = _timer.get()
+        if self.timer is not None:
+            self.t0 = perf_counter()
+
+    def __exit__(self, *exc):
+        if self.timer is not None:
+            self.timer.stages.append((self.name, perf_counter() - self.t0))
+
+
+def timed(fn: Callable, *args, **kwargs):
+    """(fn(*args, **kwargs), [(stage, seconds), ...]). Picklable, so pool workers return it as is."""
+    timer = StageTimer()
+    token = _timer.set(timer)
+    try:
+        return fn(*args, **kwargs), timer.stages
+    finally:
+        _timer.reset(token)
+
+
+def server_timing(stages: Iterable[Tuple[str, float]]) -> str:
+    """Server-Timing header value: `profile;dur=0.84, rank;dur=3.10, ...` (milliseconds)."""
+    return ", ".join(["%s;dur=%.2f" % (name, seconds * 1000) for name, seconds in stages])
+
+
+# --- Metric types ---
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: Labels, values: Labels, extra: str = "") -> str:
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _number(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    def __init__(self, name: str, help: str, labels: Labels = ()):
+        self.name = name
+        self.help = help
+        self.label_names = labels
+        self._values: Dict[Labels, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels: str, amount: float = 1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def value(self, *labels: str) -> float:
+        with self._lock:
+            return self._values.get(labels, 0)
+
+    def render(self) -> List[str]:
+        with self._lock:
+            values = sorted(self._values.items())
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        lines += [f"{self.name}{_labels(self.label_names, k)} {_number(v)}" for k, v in values]
+        return lines
+
+
+class Histogram:
+    """Cumulative-bucket histogram; `observe` costs a bisect and a lock."""
+
+    def __init__(self, name: str, help: str, labels: Labels = (), buckets: Tuple[float, ...] = METRICS_BUCKETS):
+        self.name = name
+        self.help = help
+        self.label_names = labels
+        self.buckets = buckets
+        self._series: Dict[Labels, list] = {}  # labels -> [per-bucket counts (+Inf last), sum, count]
+        self._lock = threading.Lock()
+
+    def observe(self, seconds: float, *labels: str):
+        self.observe_many([(labels, seconds)])
+
+    def observe_many(self, observations: Iterable[Tuple[Labels, float]]):
+        """Record several (labels, seconds) under one lock."""
+        buckets = self.buckets
+        with self._lock:
+            for labels, seconds in observations:
+                series = self._series.get(labels)
+                if series is None:
+                    series = self._series[labels] = [[0] * (len(buckets) + 1), 0.0, 0]
+                series[0][bisect.bisect_left(buckets, seconds)] += 1
+                series[1] += seconds
+                series[2] += 1
+
+    def count(self, *labels: str) -> int:
+        with self._lock:
+            series = self._series.get(labels)
+            return series[2] if series else 0
+
+    def render(self) -> List[str]:
+        with self._lock:
+            series = sorted((k, ([*v[0]], v[1], v[2])) for k, v in self._series.items())
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        for labels, (counts, total, n) in series:
+            cumulative = 0
+            for bound, c in zip(self.buckets + (math.inf,), counts):
+                cumulative += c
+                le = 'le="' + _number(bound) + '"'
+                lines.append(f"{self.name}_bucket{_labels(self.label_names, labels, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.label_names, labels)} {_number(total)}")
+            lines.append(f"{self.name}_count{_labels(self.label_names, labels)} {n}")
+        return lines
+
+
+class Collected:
+    """
+    Gauges or counters read at scrape time: `collect()` returns
+    [(label values, value), ...] from state kept elsewhere (caches, pools).
+    """
+
+    def __init__(self, name: str, help: str, kind: str, labels: Labels, collect: Callable[[], Iterable]):
+        self.name = name
+        self.help = help
+        self.kind = kind
+        self.label_names = labels
+        self.collect = collect
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        for labels, value in self.collect():
+            if value is not None:
+                lines.append(f"{self.name}{_labels(self.label_names, labels)} {_number(value)}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self.metrics = []
+
+    def add(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        lines = []
+        for metric in self.metrics:
+            try:
+                lines += metric.render()
+            except Exception as e:
+                print(f"[WARN] Could not collect {metric.name}: {e}")
+        return "\n".join(lines) + "\n"
+
+
+# --- The API's request metrics ---
+registry = Registry()
+REQUESTS = registry.add(Counter(
+    "profiled_requests_total", "Requests by endpoint and domain.", ("endpoint", "domain")))
+ERRORS = registry.add(Counter(
+    "profiled_request_errors_total", "Failed requests by endpoint, domain and HTTP status.",
+    ("endpoint", "domain", "status")))
+REQUEST_SECONDS = registry.add(Histogram(
+    "profiled_request_duration_seconds", "Handler latency, including serialization.", ("endpoint",)))
+STAGE_SECONDS = registry.add(Histogram(
+    "profiled_stage_duration_seconds", "Latency of each pipeline stage of a request.", ("stage",)))
+
+
+def domain_label(domain: Optional[str], known: Iterable[str]) -> str:
+    """Bounded label for a free-text domain: a preset's name, 'none' or 'other'."""
+    if not domain:
+        return "none"
+    domain = domain.lower()
+    return domain if domain in known else "other"
+
+
+class RequestMetrics:
+    """
+    One request's counters and timings, used as `with track(endpoint,
+    domain) as m:`. The stages it ran (collected with `add`/`extend`) go
+    into the stage histograms and the Server-Timing header, its total into
+    the request histogram, and an HTTPException (or any other error, as
+    500) into the error counter.
+    """
+
+    __slots__ = ("endpoint", "domain", "stages", "start")
+
+    def __init__(self, endpoint: str, domain: str):
+        self.endpoint = endpoint
+        self.domain = domain
+        self.stages: List[Tuple[str, float]] = []
+        self.start = perf_counter()
+
+    def add(self, name: str, seconds: float):
+        self.stages.append((name, seconds))
+
+    def extend(self, stages: Iterable[Tuple[str, float]]):
+        self.stages.extend(stages)
+
+    def server_timing(self) -> str:
+        return server_timing(self.stages + [("total", perf_counter() - self.start)])
+
+    def __enter__(self):
+        REQUESTS.inc(self.endpoint, self.domain)
+        self.start = perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is not None and issubclass(exc_type, Exception):
+            ERRORS.inc(self.endpoint, self.domain, str(getattr(exc, "status_code", 500)))
+        REQUEST_SECONDS.observe(perf_counter() - self.start, self.endpoint)
+        STAGE_SECONDS.observe_many([((name,), seconds) for name, seconds in self.stages])
+
+
+def track(endpoint: str, domain: str) -> RequestMetrics:
+    """Count and time the request run in the `with` block."""
+    return RequestMetrics(endpoint, domain)
@@ -0,0 +1,319 @@
+import asyncio
+import hashlib
+import io
+import multiprocessing
+import os
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Set, Tuple
+
+from .cache import LRUCache
+
+# --- PDF extraction configuration (0 workers = extract in the API process) ---
+PDF_WORKERS = int(os.getenv("PDF_WORKERS", "2"))
+# Uploads larger than this are rejected before they are read in full
+PDF_MAX_BYTES = int(os.getenv("PDF_MAX_BYTES", str(10 * 1024 * 1024)))
+# Only the first pages are extracted; a resume rarely needs more
+PDF_MAX_PAGES = int(os.getenv("PDF_MAX_PAGES", "10"))
+PDF_TIMEOUT_SECONDS = float(os.getenv("PDF_TIMEOUT_SECONDS", "10"))
+# Files extracted at once before /extract answers 503
+PDF_QUEUE_DEPTH = int(os.getenv("PDF_QUEUE_DEPTH", str(max(PDF_WORKERS, 1) * 4)))
+# Extracted texts kept by file hash
+PDF_CACHE_SIZE = int(os.getenv("PDF_CACHE_SIZE", "256"))
+
+
+class PdfTooLarge(Exception):
+    """The upload exceeds PDF_MAX_BYTES."""
+
+
+class PdfInvalid(Exception):
+    """The upload is not a PDF pypdf can read."""
+
+
+class PdfTimeout(Exception):
+    """Extraction did not finish within PDF_TIMEOUT_SECONDS."""
+
+
+class PdfBusy(Exception):
+    """Too many files are being extracted; retry later."""
+
+
+def file_key(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+# --- Worker side (also used in-process with PDF_WORKERS=0) ---
+def _extract_pages(data: bytes, part: int, parts: int, max_pages: int, deadline: float) -> Tuple[int, Dict[int, str]]:
+    """
+    Text of every `parts`-th page from page `part` on, within the first
+    `max_pages`. Returns the PDF's page count and {page number: text}.
+    Stops at `deadline` (time.time()) so a pathological file cannot keep a
+    worker busy.
+    """
+    from pypdf import PdfReader
+
+    try:
+        reader = PdfReader(io.BytesIO(data))
+        total = len(reader.pages)
+    except Exception as e:
+        raise PdfInvalid(f"Not a readable PDF: {e}")
+    texts = {}
+    for i in range(part, min(total, max_pages), parts):
+        if time.time() > deadline:
+            raise PdfTimeout()
+        try:
+            texts[i] = reader.pages[i].extract_text() or ""
+        except Exception as e:
+            print(f"[WARN] Could not extract page {i + 1}: {e}")
+            texts[i] = ""
+    return total, texts
+
+
+def _serve(conn):
+    """Worker process loop: run _extract_pages on each argument tuple read from `conn` and send back the outcome."""
+    while True:
+        try:
+            args = conn.recv()
+        except EOFError:  # the API closed the pipe: shut down
+            return
+        try:
+            conn.send((True, _extract_pages(*args)))
+        except Exception as e:
+            conn.send((False, e))
+
+
+def _join(results: List[Tuple[int, Dict[int, str]]], max_pages: int) -> Dict:
+    total = results[0][0]
+    texts = {}
+    for _, part in results:
+        texts.update(part)
+    pages = min(total, max_pages)
+    return {
+        "text": "\n".join(texts[i] for i in range(pages)),
+        "pages": pages,
+        "total_pages": total,
+        "truncated": total > pages,
+    }
+
+
+# --- API side ---
+class _PdfWorker:
+    """One spawned extraction process and the API's end of its pipe."""
+
+    def __init__(self):
+        # spawn, not fork: the API process runs threads (refresher, uvicorn)
+        ctx = multiprocessing.get_context("spawn")
+        self.conn, child = ctx.Pipe()
+        self.process = ctx.Process(target=_serve, args=(child,), name="pdf-worker", daemon=True)
+        self.process.start()
+        child.close()
+        self.killed = False
+
+    def call(self, args: Tuple):
+        """_extract_pages(*args) in the worker; EOFError if the process dies first."""
+        self.conn.send(args)
+        ok, value = self.conn.recv()
+        if not ok:
+            raise value
+        return value
+
+    def kill(self):
+        self.killed = True
+        self.process.kill()
+
+    def close(self, wait: bool = True):
+        self.conn.close()  # the worker exits once it reads EOF
+        if wait:
+            self.process.join()
+
+
+class _Job:
+    """The workers busy with one file's page parts, so a timeout kills only those."""
+
+    def __init__(self):
+        self.busy: Set[_PdfWorker] = set()
+        self.abandoned = False
+
+
+class PdfExtractor:
+    """
+    Extracts resume text from PDF bytes off the event loop.
+
+    Pages are split across `workers` spawned processes (page i goes to
+    part i % workers); each part opens the file itself, so a request ships
+    only the bytes. Limits per file: `max_bytes`, the first `max_pages`
+    pages and `timeout` seconds. Each part is sent to an idle worker over
+    its own pipe, so a worker stuck past the timeout can be killed (and
+    replaced) without touching the files other workers are extracting.
+    Texts are cached by the file's hash, so the same upload is parsed once.
+    With 0 workers extraction runs in a thread of the API process.
+    """
+
+    def __init__(self, workers: int = PDF_WORKERS, max_bytes: int = PDF_MAX_BYTES, max_pages: int = PDF_MAX_PAGES,
+                 timeout: float = PDF_TIMEOUT_SECONDS, queue_depth: int = PDF_QUEUE_DEPTH,
+                 cache_size: int = PDF_CACHE_SIZE):
+        self.workers = workers
+        self.max_bytes = max_bytes
+        self.max_pages = max_pages
+        self.timeout = timeout
+        self.queue_depth = queue_depth
+        self.cache = LRUCache(max_entries=cache_size, ttl_seconds=0)
+        self.pending = 0
+        self.completed = 0
+        self.rejected = 0
+        self.timeouts = 0
+        self.restarts = 0
+        self._idle: "queue.Queue[Optional[_PdfWorker]]" = queue.Queue()
+        self._procs: List[_PdfWorker] = []
+        self._threads: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.workers > 0
+
+    def start(self):
+        if self.enabled:
+            self._ensure_workers()
+            print(f"PDF extraction pool ready: {self.workers} workers.")
+
+    def _ensure_workers(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._threads is None:
+                self._procs = [_PdfWorker() for _ in range(self.workers)]
+                for worker in self._procs:
+                    self._idle.put(worker)
+                # One waiting thread per part of every file allowed in flight
+                self._threads = ThreadPoolExecutor(max_workers=self.workers * max(self.queue_depth, 1),
+                                                   thread_name_prefix="pdf-part")
+            return self._threads
+
+    def _run_part(self, job: _Job, args: Tuple):
+        """Thread side of one page part: wait for an idle worker, run the part, hand the worker back."""
+        idle = self._idle
+        worker = idle.get()
+        if worker is None:  # shut down while this part was queued; wake the next waiter too
+            idle.put(None)
+            raise PdfBusy()
+        with self._lock:
+            if job.abandoned:  # the file timed out while this part was queued
+                idle.put(worker)
+                raise PdfTimeout()
+            job.busy.add(worker)
+        try:
+            return worker.call(args)
+        except (EOFError, OSError):
+            # Killed for overrunning the timeout, or died on its own (e.g. OOM-killed)
+            raise PdfTimeout() if worker.killed else PdfBusy()
+        finally:
+            with self._lock:
+                job.busy.discard(worker)
+                replace = worker.killed or not worker.process.is_alive()
+            if replace:
+                worker.close()
+                worker = self._replace(worker)
+            if worker is not None:
+                idle.put(worker)
+
+    def _replace(self, worker: _PdfWorker) -> Optional[_PdfWorker]:
+        """A fresh process in place of a dead `worker` (None once shut down)."""
+        fresh = _PdfWorker()
+        with self._lock:
+            if worker in self._procs:
+                self._procs[self._procs.index(worker)] = fresh
+                self.restarts += 1
+                print("[WARN] PDF extraction worker restarted")
+                return fresh
+        fresh.close()
+        return None
+
+    def _abandon(self, job: _Job):
+        """Timed out: kill the workers still running this file's parts (and nothing else)."""
+        with self._lock:
+            job.abandoned = True
+            for worker in job.busy:
+                worker.kill()
+
+    def check_size(self, size: int):
+        if size > self.max_bytes:
+            raise PdfTooLarge()
+
+    async def extract(self, data: bytes) -> Dict:
+        """{text, pages, total_pages, truncated, cached} of a PDF."""
+        self.check_size(len(data))
+        key = f"{file_key(data)}:{self.max_pages}"
+        hit = self.cache.get(key)
+        if hit is not None:
+            return {**hit, "cached": True}
+
+        with self._lock:
+            if self.pending >= self.queue_depth:
+                self.rejected += 1
+                raise PdfBusy()
+            self.pending += 1
+        try:
+            result = await self._extract(data)
+        except PdfTimeout:
+            with self._lock:
+                self.timeouts += 1
+            raise
+        finally:
+            with self._lock:
+                self.pending -= 1
+                self.completed += 1
+        self.cache.set(key, result)
+        return {**result, "cached": False}
+
+    async def _extract(self, data: bytes) -> Dict:
+        deadline = time.time() + self.timeout
+        if not self.enabled:
+            loop = asyncio.get_running_loop()
+            result = await loop.run_in_executor(None, _extract_pages, data, 0, 1, self.max_pages, deadline)
+            return _join([result], self.max_pages)
+
+        threads = self._ensure_workers()
+        loop = asyncio.get_running_loop()
+        job = _Job()
+        parts = [
+            loop.run_in_executor(threads, self._run_part, job, (data, k, self.workers, self.max_pages, deadline))
+            for k in range(self.workers)
+        ]
+        try:
+            # Workers stop themselves at the deadline between pages; the grace
+            # period covers one page that never returns
+            results = await asyncio.wait_for(asyncio.gather(*parts), timeout=self.timeout + 2)
+        except asyncio.TimeoutError:
+            self._abandon(job)
+            raise PdfTimeout()
+        return _join(results, self.max_pages)
+
+    def shutdown(self, wait: bool = True):
+        with self._lock:
+            threads, self._threads = self._threads, None
+            procs, self._procs = self._procs, []
+            idle, self._idle = self._idle, queue.Queue()
+        idle.put(None)  # parts still waiting for a worker give up
+        for worker in procs:
+            worker.close(wait=False)
+        if threads is not None:
+            threads.shutdown(wait=wait, cancel_futures=True)
+        if wait:
+            for worker in procs:
+                worker.process.join()
+
+    def status(self) -> Dict:
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "max_bytes": self.max_bytes,
+                "max_pages": self.max_pages,
+                "timeout_seconds": self.timeout,
+                "pending": self.pending,
+                "completed": self.completed,
+                "rejected": self.rejected,
+                "timeouts": self.timeouts,
+                "restarts": self.restarts,
+                "cache": self.cache.stats(),
+            }
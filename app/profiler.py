@@ -0,0 +1,270 @@
+"""
+Opt-in sampling profiler for live /match requests.
+
+A request is watched when it is drawn at PROFILE_SAMPLE_RATE, or, with
+PROFILE_SLOW_MS set, when its scoring runs past that threshold. One daemon
+thread per process (the API, or each scoring worker) wakes every
+PROFILE_INTERVAL_MS while watched requests are running and records the
+Python stack of each request's thread. Sampled requests are recorded from
+the start; other requests only once they pass the threshold, so a fast
+request costs a dict insert and removal and no stack walk.
+
+Captures are written to PROFILE_DIR as collapsed stacks ("frame;frame;frame
+count" per line, the input of flamegraph.pl, speedscope and inferno) with a
+JSON sidecar of request metadata; the oldest are deleted beyond
+PROFILE_KEEP. CV text is never written, only its hash.
+"""
+import json
+import os
+import random
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Optional, Tuple
+
+from .metrics import timed
+
+# Fraction of /match requests profiled (0 = none; 0.01 is cheap enough to leave on)
+PROFILE_SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", "0"))
+# Also profile any request whose scoring runs longer than this (0 = off)
+PROFILE_SLOW_MS = float(os.getenv("PROFILE_SLOW_MS", "0"))
+# Time between two stack samples of a watched request
+PROFILE_INTERVAL_MS = float(os.getenv("PROFILE_INTERVAL_MS", "5"))
+PROFILE_DIR = os.getenv("PROFILE_DIR", os.path.join(os.path.dirname(__file__), "..", "data", "profiles"))
+# Captures kept on disk (oldest deleted first)
+PROFILE_KEEP = int(os.getenv("PROFILE_KEEP", "200"))
+
+Watch = Tuple[bool, Optional[float]]  # (sampled, seconds after which to sample anyway)
+
+
+# --- Sampling side (runs in the process that scores) ---
+class Capture:
+    __slots__ = ("thread_id", "sampled", "slow_after", "stop_code", "start", "stacks", "samples")
+
+    def __init__(self, thread_id: int, sampled: bool, slow_after: Optional[float], stop_code):
+        self.thread_id = thread_id
+        self.sampled = sampled
+        self.slow_after = slow_after
+        self.stop_code = stop_code  # the walk stops here: frames above belong to the thread pool
+        self.start = time.perf_counter()
+        self.stacks: Counter = Counter()
+        self.samples = 0
+
+
+class Sampler:
+    """The process's sampling thread; started on first use."""
+
+    def __init__(self, interval: float = PROFILE_INTERVAL_MS / 1000):
+        self.interval = interval
+        self._captures: Dict[int, Capture] = {}
+        self._labels: Dict = {}  # code object -> "function (file:line)"
+        self._wake = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+
+    def begin(self, sampled: bool, slow_after: Optional[float], stop_code) -> Capture:
+        capture = Capture(threading.get_ident(), sampled, slow_after, stop_code)
+        with self._wake:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="profile-sampler", daemon=True)
+                self._thread.start()
+            self._captures[capture.thread_id] = capture
+            self._wake.notify()
+        return capture
+
+    def end(self, capture: Capture):
+        with self._wake:
+            self._captures.pop(capture.thread_id, None)
+
+    def _run(self):
+        while True:
+            with self._wake:
+                while not self._captures:
+                    self._wake.wait()
+                captures = list(self._captures.values())
+            now = time.perf_counter()
+            due = [c for c in captures if c.sampled or now - c.start >= c.slow_after]
+            if due:
+                frames = sys._current_frames()
+                for c in due:
+                    frame = frames.get(c.thread_id)
+                    stack = self._collapse(frame, c.stop_code) if frame is not None else None
+                    if stack is not None:
+                        c.stacks[stack] += 1
+                        c.samples += 1
+                del frames
+            time.sleep(self.interval)
+
+    def _collapse(self, frame, stop_code) -> Optional[str]:
+        """None when the thread is no longer inside `timed` (the request ended since `_captures` was read)."""
+        labels = []
+        while frame is not None and frame.f_code is not stop_code:
+            code = frame.f_code
+            label = self._labels.get(code)
+            if label is None:
+                label = self._labels[code] = _label(code)
+            labels.append(label)
+            frame = frame.f_back
+        if frame is None:
+            return None
+        return ";".join(reversed(labels))
+
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _label(code) -> str:
+    """`function (file:line)`, the file relative to the repo or site-packages."""
+    path = code.co_filename
+    if "site-packages" + os.sep in path:
+        path = path.rsplit("site-packages" + os.sep, 1)[1]
+    elif path.startswith(ROOT_DIR + os.sep):
+        path = path[len(ROOT_DIR) + 1:]
+    else:
+        path = os.path.basename(path)
+    return f"{code.co_name} ({path}:{code.co_firstlineno})".replace(";", ":")
+
+
+_sampler: Optional[Sampler] = None
+
+
+def profiled(watch: Optional[Watch], fn: Callable, *args, **kwargs):
+    """
+    `metrics.timed(fn, ...)` plus, when `watch` is set, the stack samples of
+    this thread as a picklable dict (None when the request was neither
+    sampled nor slow): (result, stages, capture).
+    """
+    if watch is None:
+        return (*timed(fn, *args, **kwargs), None)
+    global _sampler
+    if _sampler is None:
+        _sampler = Sampler()
+    sampled, slow_after = watch
+    capture = _sampler.begin(sampled, slow_after if slow_after is not None else float("inf"), timed.__code__)
+    try:
+        result, stages = timed(fn, *args, **kwargs)
+    finally:
+        _sampler.end(capture)
+    elapsed = time.perf_counter() - capture.start
+    if not sampled and (slow_after is None or elapsed < slow_after):
+        return result, stages, None
+    return result, stages, {
+        "reason": "sampled" if sampled else "slow",
+        "elapsed_ms": round(elapsed * 1000, 3),
+        "samples": capture.samples,
+        "interval_ms": _sampler.interval * 1000,
+        "stacks": dict(capture.stacks),
+    }
+
+
+# --- API side ---
+class Profiler:
+    """
+    Decides which requests to watch and keeps their captures on disk. The
+    rate and threshold can be changed at runtime (POST /admin/profiler);
+    scoring workers get them with each request.
+    """
+
+    def __init__(self, rate: float = PROFILE_SAMPLE_RATE, slow_ms: float = PROFILE_SLOW_MS,
+                 directory: str = PROFILE_DIR, keep: int = PROFILE_KEEP):
+        self.rate = rate
+        self.slow_ms = slow_ms
+        self.directory = directory
+        self.keep = keep
+        self.captured = Counter()
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.rate > 0 or self.slow_ms > 0
+
+    def configure(self, rate: Optional[float] = None, slow_ms: Optional[float] = None):
+        if rate is not None:
+            self.rate = min(max(rate, 0.0), 1.0)
+        if slow_ms is not None:
+            self.slow_ms = max(slow_ms, 0.0)
+
+    def watch(self) -> Optional[Watch]:
+        """What to pass to `profiled` for the next request (None: not profiled)."""
+        sampled = self.rate > 0 and random.random() < self.rate
+        if not sampled and self.slow_ms <= 0:
+            return None
+        return sampled, self.slow_ms / 1000 if self.slow_ms > 0 else None
+
+    def save(self, capture: Dict, meta: Dict) -> Optional[str]:
+        """Write a capture (stacks + metadata), rotate, and return its name."""
+        stamp = datetime.now(timezone.utc)
+        name = f"{stamp:%Y%m%dT%H%M%S.%f}-{capture['reason']}-{int(capture['elapsed_ms'])}ms"
+        stacks = capture.pop("stacks")
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            with open(os.path.join(self.directory, name + ".folded"), "w") as f:
+                f.writelines(f"{stack} {count}\n" for stack, count in sorted(stacks.items()))
+            with open(os.path.join(self.directory, name + ".json"), "w") as f:
+                json.dump({"name": name, "captured_at": stamp.isoformat(), **capture, **meta}, f)
+            self._rotate()
+        except OSError as e:
+            print(f"[WARN] Could not save profile {name}: {e}")
+            return None
+        with self._lock:
+            self.captured[capture["reason"]] += 1
+        return name
+
+    def _names(self) -> List[str]:
+        try:
+            files = os.listdir(self.directory)
+        except FileNotFoundError:
+            return []
+        return sorted((f[: -len(".folded")] for f in files if f.endswith(".folded")), reverse=True)
+
+    def _rotate(self):
+        for name in self._names()[self.keep:]:
+            for ext in (".folded", ".json"):
+                try:
+                    os.remove(os.path.join(self.directory, name + ext))
+                except FileNotFoundError:
+                    pass
+
+    def list(self, limit: int = 100) -> List[Dict]:
+        """Newest captures' metadata."""
+        out = []
+        for name in self._names()[:limit]:
+            try:
+                with open(os.path.join(self.directory, name + ".json")) as f:
+                    out.append(json.load(f))
+            except (OSError, ValueError):
+                out.append({"name": name})
+        return out
+
+    def path(self, name: str) -> Optional[str]:
+        """The collapsed-stack file of a capture listed by `list` (None for any other name)."""
+        if name not in self._names():
+            return None
+        return os.path.join(self.directory, name + ".folded")
+
+    def merged(self, limit: int = 100) -> str:
+        """The newest captures' stacks summed: one flame graph of recent traffic."""
+        total = Counter()
+        for name in self._names()[:limit]:
+            try:
+                with open(os.path.join(self.directory, name + ".folded")) as f:
+                    for line in f:
+                        stack, _, count = line.rstrip("\n").rpartition(" ")
+                        total[stack] += int(count)
+            except (OSError, ValueError):
+                continue
+        return "".join(f"{stack} {count}\n" for stack, count in sorted(total.items()))
+
+    def status(self) -> Dict:
+        with self._lock:
+            captured = dict(self.captured)
+        return {
+            "sample_rate": self.rate,
+            "slow_ms": self.slow_ms,
+            "interval_ms": PROFILE_INTERVAL_MS,
+            "directory": os.path.abspath(self.directory),
+            "keep": self.keep,
+            "stored": len(self._names()),
+            "captured": captured,
+        }
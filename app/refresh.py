@@ -0,0 +1,77 @@
+import os
+import threading
+from datetime import datetime, timezone
+from typing import Callable, Dict, Optional
+
+# Poll the database for new/changed jobs this often (0 disables polling)
+REFRESH_INTERVAL_SECONDS = int(os.getenv("REFRESH_INTERVAL_SECONDS", "600"))
+# Retry this often while no corpus could be loaded at startup
+LOAD_RETRY_SECONDS = int(os.getenv("LOAD_RETRY_SECONDS", "15"))
+
+
+class CorpusRefresher:
+    """
+    Background thread that keeps a JobRecommender's corpus up to date.
+
+    Every `interval` seconds it calls `reco.refresh()`, which fetches only
+    rows past the `loaded_at` watermark and atomically swaps in a rebuilt
+    index. Errors are recorded and retried on the next tick; they never take
+    the API down. After every refresh it calls `on_refresh` (the scoring
+    pool's `prepare`, which starts workers for a changed corpus before any
+    request needs them).
+    """
+
+    def __init__(self, reco, interval: int = REFRESH_INTERVAL_SECONDS,
+                 on_refresh: Optional[Callable[[], None]] = None):
+        self.reco = reco
+        self.interval = interval
+        self.on_refresh = on_refresh
+        self.last_checked = None
+        self.last_error = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self.interval <= 0 or self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="corpus-refresher", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def refresh_now(self, full: bool = False) -> bool:
+        """Refresh immediately; returns True if the corpus changed."""
+        self.last_checked = datetime.now(timezone.utc)
+        try:
+            changed = self.reco.refresh(full=full)
+            self.last_error = None
+        except Exception as e:
+            self.last_error = str(e)
+            raise
+        # Also after an unchanged corpus: the embeddings may have been reloaded
+        if self.on_refresh is not None:
+            self.on_refresh()
+        return changed
+
+    def _next_wait(self) -> float:
+        return self.interval if self.reco.ready else min(self.interval, LOAD_RETRY_SECONDS)
+
+    def _run(self):
+        while not self._stop.wait(self._next_wait()):
+            try:
+                self.refresh_now()
+            except Exception as e:
+                print(f"[WARN] Corpus refresh failed: {e}")
+
+    def status(self) -> Dict:
+        return {
+            "interval_seconds": self.interval,
+            "running": self._thread is not None,
+            "last_checked": self.last_checked.isoformat() if self.last_checked else None,
+            "last_error": self.last_error,
+        }
@@ -0,0 +1,266 @@
+import json
+import os
+import re
+import shutil
+import zlib
+from datetime import datetime, timezone
+from typing import List, Optional
+
+import numpy as np
+import pandas as pd
+
+from .index import clean_text
+
+# --- Semantic mode configuration ---
+SEMANTIC_DIR = os.getenv(
+    "SEMANTIC_DIR", os.path.join(os.path.dirname(__file__), "..", "data", "embeddings")
+)
+# "auto" uses sentence-transformers when installed, else the hashing encoder
+EMBEDDING_ENCODER = os.getenv("EMBEDDING_ENCODER", "auto")
+EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL", "all-MiniLM-L6-v2")
+HASHING_DIM = int(os.getenv("HASHING_DIM", "512"))
+
+FORMAT_VERSION = 1
+MAX_DESCRIPTION_CHARS = 2000  # encoders only look at the start of a posting anyway
+
+_TOKEN_RE = re.compile(r"\w+")
+
+
+# --- Encoders: encode(texts) -> L2-normalized float32 matrix ---
+class HashingEncoder:
+    """
+    Deterministic, dependency-free encoder: signed feature hashing of
+    unigrams and bigrams with sublinear term frequency. Needs no model
+    download, so the semantic path builds and runs offline.
+    """
+
+    def __init__(self, dim: int = HASHING_DIM):
+        self.dim = dim
+        self.name = f"hashing-{dim}"
+        self._features = {}
+
+    def _feature(self, token: str):
+        feat = self._features.get(token)
+        if feat is None:
+            h = zlib.crc32(token.encode("utf-8"))  # stable across processes, unlike hash()
+            feat = (h % self.dim, 1.0 if h & 0x80000000 else -1.0)
+            if len(self._features) < 1_000_000:
+                self._features[token] = feat
+        return feat
+
+    def encode(self, texts: List[str]) -> np.ndarray:
+        out = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for i, text in enumerate(texts):
+            tokens = _TOKEN_RE.findall(text.lower())
+            counts = {}
+            for tok in tokens + [a + " " + b for a, b in zip(tokens, tokens[1:])]:
+                counts[tok] = counts.get(tok, 0) + 1
+            row = out[i]
+            for tok, c in counts.items():
+                idx, sign = self._feature(tok)
+                row[idx] += sign * (1.0 + np.log(c))
+        return _normalize(out)
+
+
+class SentenceTransformerEncoder:
+    """sentence-transformers model (downloaded on first use)."""
+
+    def __init__(self, model_name: str = EMBEDDING_MODEL):
+        from sentence_transformers import SentenceTransformer
+
+        self.model = SentenceTransformer(model_name)
+        self.dim = self.model.get_sentence_embedding_dimension()
+        self.name = f"st:{model_name}"
+
+    def encode(self, texts: List[str]) -> np.ndarray:
+        vecs = self.model.encode(texts, batch_size=64, convert_to_numpy=True, normalize_embeddings=True)
+        return vecs.astype(np.float32)
+
+
+def get_encoder(name: str = EMBEDDING_ENCODER):
+    """Encoder by name: "hashing[-dim]", "st:<model>", or "auto"."""
+    if name.startswith("hashing"):
+        dim = name.split("-", 1)[1] if "-" in name else HASHING_DIM
+        return HashingEncoder(int(dim))
+    if name.startswith("st:"):
+        return SentenceTransformerEncoder(name[3:])
+    if name in ("auto", "sentence-transformers"):
+        try:
+            return SentenceTransformerEncoder()
+        except Exception as e:
+            if name != "auto":
+                raise
+            print(f"[WARN] sentence-transformers unavailable ({e}); using hashing encoder")
+            return HashingEncoder()
+    raise ValueError(f"Unknown encoder: {name}")
+
+
+def _normalize(vecs: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vecs, axis=1, keepdims=True)
+    return vecs / np.maximum(norms, 1e-12)
+
+
+def job_texts(jobs: pd.DataFrame) -> List[str]:
+    """Text embedded for each job: title, then the start of the description."""
+    titles = jobs["title"].tolist() if "title" in jobs.columns else [""] * len(jobs)
+    descs = jobs["description"].tolist() if "description" in jobs.columns else [""] * len(jobs)
+    return [f"{clean_text(t)}. {clean_text(d)[:MAX_DESCRIPTION_CHARS]}" for t, d in zip(titles, descs)]
+
+
+# --- Build (at ingest) ---
+def _kmeans(vecs: np.ndarray, k: int, iters: int = 10, seed: int = 0) -> np.ndarray:
+    """Spherical k-means centroids (deterministic for a given seed)."""
+    rng = np.random.default_rng(seed)
+    centroids = vecs[rng.choice(len(vecs), size=k, replace=False)].copy()
+    for _ in range(iters):
+        assign = np.argmax(vecs @ centroids.T, axis=1)
+        for c in range(k):
+            members = vecs[assign == c]
+            if len(members):
+                centroids[c] = members.sum(axis=0)
+        centroids = _normalize(centroids)
+    return centroids
+
+
+def build_semantic_index(jobs: pd.DataFrame, out_dir: str = SEMANTIC_DIR, encoder=None, batch_size: int = 2048):
+    """
+    Embed every job once and write the on-disk layout read by SemanticIndex:
+
+        meta.json      encoder name, dim, count, IVF list count
+        vectors.npy    float16 (count x dim), memory-mapped at query time
+        job_ids.npy    int64 job IDs (-1 when the table has no id column)
+        urls.txt       one job URL per row (how rows are matched to the corpus)
+        centroids.npy  float32 IVF centroids
+        list_ptr.npy   IVF list offsets into list_rows.npy
+        list_rows.npy  vector rows grouped by IVF list
+    """
+    encoder = encoder or get_encoder()
+    jobs = jobs.rename(columns=str.lower).reset_index(drop=True)
+    n = len(jobs)
+
+    # Build next to the live directory and swap at the end: a running API may
+    # have the old vectors memory-mapped, and must never see a partial build
+    final_dir = os.path.normpath(out_dir)
+    out_dir = final_dir + ".building"
+    shutil.rmtree(out_dir, ignore_errors=True)
+    os.makedirs(out_dir)
+
+    texts = job_texts(jobs)
+    vectors = np.lib.format.open_memmap(
+        os.path.join(out_dir, "vectors.npy"), mode="w+", dtype=np.float16, shape=(n, encoder.dim)
+    )
+    for start in range(0, n, batch_size):
+        vectors[start:start + batch_size] = encoder.encode(texts[start:start + batch_size])
+    vectors.flush()
+
+    ids = jobs["id"].fillna(-1).astype(np.int64).to_numpy() if "id" in jobs.columns else np.full(n, -1, dtype=np.int64)
+    np.save(os.path.join(out_dir, "job_ids.npy"), ids)
+    urls = jobs["url"].tolist() if "url" in jobs.columns else [""] * n
+    with open(os.path.join(out_dir, "urls.txt"), "w", encoding="utf-8") as f:
+        f.writelines(clean_text(u).replace("\n", " ") + "\n" for u in urls)
+
+    # IVF coarse quantizer, trained on a sample and assigned in chunks
+    nlist = max(1, min(1024, int(np.sqrt(n)))) if n else 0
+    if nlist:
+        sample = np.random.default_rng(0).choice(n, size=min(n, 50_000), replace=False)
+        centroids = _kmeans(np.asarray(vectors[np.sort(sample)], dtype=np.float32), nlist)
+        assign = np.concatenate([
+            np.argmax(np.asarray(vectors[s:s + batch_size], dtype=np.float32) @ centroids.T, axis=1)
+            for s in range(0, n, batch_size)
+        ])
+    else:
+        centroids = np.zeros((0, encoder.dim), dtype=np.float32)
+        assign = np.zeros(0, dtype=np.int64)
+    list_ptr = np.zeros(nlist + 1, dtype=np.int64)
+    np.cumsum(np.bincount(assign, minlength=nlist), out=list_ptr[1:])
+    np.save(os.path.join(out_dir, "centroids.npy"), centroids.astype(np.float32))
+    np.save(os.path.join(out_dir, "list_ptr.npy"), list_ptr)
+    np.save(os.path.join(out_dir, "list_rows.npy"), np.argsort(assign, kind="stable").astype(np.int32))
+
+    meta = {
+        "format": FORMAT_VERSION,
+        "encoder": encoder.name,
+        "dim": encoder.dim,
+        "count": n,
+        "nlist": nlist,
+        "built_at": datetime.now(timezone.utc).isoformat(),
+    }
+    with open(os.path.join(out_dir, "meta.json"), "w", encoding="utf-8") as f:
+        json.dump(meta, f, indent=2)
+
+    old_dir = final_dir + ".old"
+    shutil.rmtree(old_dir, ignore_errors=True)
+    if os.path.exists(final_dir):
+        os.rename(final_dir, old_dir)
+    os.rename(out_dir, final_dir)
+    shutil.rmtree(old_dir, ignore_errors=True)  # open mmaps keep their (unlinked) files
+    return meta
+
+
+# --- Query (in the API) ---
+class SemanticIndex:
+    """
+    Memory-mapped job embeddings plus an IVF approximate nearest-neighbour
+    index. Only the probed lists' rows are read from disk per query.
+    """
+
+    def __init__(self, path: str = SEMANTIC_DIR, encoder=None):
+        with open(os.path.join(path, "meta.json"), encoding="utf-8") as f:
+            self.meta = json.load(f)
+        if self.meta.get("format") != FORMAT_VERSION:
+            raise ValueError(f"Unsupported embeddings format: {self.meta.get('format')}")
+        self.vectors = np.load(os.path.join(path, "vectors.npy"), mmap_mode="r")
+        self.job_ids = np.load(os.path.join(path, "job_ids.npy"), mmap_mode="r")
+        with open(os.path.join(path, "urls.txt"), encoding="utf-8") as f:
+            self.urls = [line.rstrip("\n") for line in f]
+        self.centroids = np.load(os.path.join(path, "centroids.npy"))
+        self.list_ptr = np.load(os.path.join(path, "list_ptr.npy"))
+        self.list_rows = np.load(os.path.join(path, "list_rows.npy"), mmap_mode="r")
+        # Queries must use the encoder the jobs were embedded with
+        self.encoder = encoder or get_encoder(self.meta["encoder"])
+
+    @property
+    def size(self) -> int:
+        return len(self.urls)
+
+    def encode_query(self, text: str) -> np.ndarray:
+        return self.encoder.encode([text])[0]
+
+    def search(self, query: np.ndarray, k: int, nprobe: int):
+        """Approximate top-k rows by cosine similarity: (rows, sims), best first."""
+        if not len(self.centroids) or k <= 0:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32)
+        probe = np.argsort(-(self.centroids @ query))[:nprobe]
+        rows = np.sort(np.concatenate([self.list_rows[self.list_ptr[p]:self.list_ptr[p + 1]] for p in probe]))
+        sims = self.similarity(rows, query)
+        if len(rows) > k:
+            top = np.argpartition(-sims, k - 1)[:k]
+            rows, sims = rows[top], sims[top]
+        order = np.argsort(-sims, kind="stable")
+        return rows[order], sims[order]
+
+    def similarity(self, rows: np.ndarray, query: np.ndarray) -> np.ndarray:
+        """Exact cosine similarity of `rows` to the query."""
+        return np.asarray(self.vectors[rows], dtype=np.float32) @ query
+
+
+def semantic_built_at(path: str = SEMANTIC_DIR) -> Optional[str]:
+    """Build timestamp of the on-disk embeddings (None if not built)."""
+    try:
+        with open(os.path.join(path, "meta.json"), encoding="utf-8") as f:
+            return json.load(f).get("built_at")
+    except (OSError, ValueError):
+        return None
+
+
+def load_semantic_index(path: str = SEMANTIC_DIR) -> Optional[SemanticIndex]:
+    """The semantic index if one has been built, else None."""
+    if not os.path.exists(os.path.join(path, "meta.json")):
+        return None
+    try:
+        index = SemanticIndex(path)
+        print(f"Loaded semantic index: {index.size} jobs ({index.meta['encoder']}).")
+        return index
+    except Exception as e:
+        print(f"[WARN] Could not load semantic index: {e}")
+        return None
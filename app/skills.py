@@ -0,0 +1,87 @@
+import os
+import re
+from typing import Iterable, List
+
+SKILL_PATH = os.path.join(os.path.dirname(__file__), "..", "data", "skills_dict.txt")
+
+# Python's `\b` sits exactly where a run of word characters meets a run of
+# non-word characters, so splitting text into those runs turns every
+# `\bskill\b` match into an exact match on a contiguous sequence of runs.
+# The text is padded with spaces because `\b` never holds between a non-word
+# character and the start/end of the string ("c/c++" does not match "c++").
+_RUN_RE = re.compile(r"\w+|\W+")
+_END = None  # trie key marking "a skill ends here" (run tokens are never None)
+
+
+def split_runs(text: str) -> List[str]:
+    """
+    Alternating non-word/word runs of the space-padded text: runs[0::2] are
+    the non-word runs, runs[1::2] the words.
+    """
+    return _RUN_RE.findall(" " + text + " ")
+
+
+def load_skills_vocab(path: str = SKILL_PATH) -> List[str]:
+    """Load the skills dictionary (one lowercase skill per line)."""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return [s.strip().lower() for s in f if s.strip()]
+    except Exception as e:
+        print(f"Error loading skills: {e}")
+        return []
+
+
+class SkillMatcher:
+    """
+    Finds every dictionary skill in a text in one linear pass.
+
+    Skills are stored in a trie keyed on word/non-word runs, so the result is
+    identical to running `re.search(r"\\b" + re.escape(skill) + r"\\b", text)`
+    for every skill, without the per-skill scan.
+    """
+
+    def __init__(self, skills: Iterable[str]):
+        self.skills = sorted(set(s.strip().lower() for s in skills if s and s.strip()))
+        self._trie = {}
+        for skill in self.skills:
+            node = self._trie
+            for run in _RUN_RE.findall(skill):
+                node = node.setdefault(run, {})
+            node[_END] = skill
+
+    def __len__(self):
+        return len(self.skills)
+
+    def find_all(self, text: str) -> List[str]:
+        """Return the sorted, de-duplicated skills found in `text`."""
+        if not isinstance(text, str) or not text:
+            return []
+        return self.find_in_runs(split_runs(text.lower()))
+
+    def find_in_runs(self, runs: List[str]) -> List[str]:
+        """`find_all` over text already split by `split_runs` (lowercase)."""
+        root = self._trie
+        found = set()
+        for i in range(len(runs)):
+            node = root.get(runs[i])
+            j = i + 1
+            while node is not None:
+                skill = node.get(_END)
+                if skill is not None:
+                    found.add(skill)
+                if j == len(runs):
+                    break
+                node = node.get(runs[j])
+                j += 1
+        return sorted(found)
+
+
+_default_matcher = None
+
+
+def get_skill_matcher() -> SkillMatcher:
+    """Shared matcher over data/skills_dict.txt, built on first use."""
+    global _default_matcher
+    if _default_matcher is None:
+        _default_matcher = SkillMatcher(load_skills_vocab())
+    return _default_matcher
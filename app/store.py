@@ -0,0 +1,216 @@
+import json
+import os
+import sys
+from collections import Counter
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from .index import clean_text, tokenize
+
+# Columns kept resident: what scoring and a response need
+STORE_COLUMNS = ("id", "title", "company", "location", "url", "skills_required", "loaded_at")
+# Few distinct values, repeated across many rows: dictionary-encoded
+CATEGORICAL_COLUMNS = ("company", "location")
+# Read (and tokenized) at load time, never kept
+DESCRIPTION_COLUMN = "description"
+TERMS_COLUMN = "description_terms"
+
+# Rows per chunk when streaming the jobs table into a store
+STORE_CHUNK_ROWS = int(os.getenv("STORE_CHUNK_ROWS", "5000"))
+
+
+class TermVocab:
+    """Append-only term <-> ID map shared by a store and the stores merged from it."""
+
+    def __init__(self):
+        self.ids: Dict[str, int] = {}
+        self.terms: List[str] = []
+
+    def __len__(self):
+        return len(self.terms)
+
+    def encode(self, text: str) -> bytes:
+        """Description -> packed int32 (term ID, count) pairs, in first-occurrence order."""
+        counts = Counter(tokenize(text))
+        pairs = np.empty((len(counts), 2), dtype=np.int32)
+        for i, (term, c) in enumerate(counts.items()):
+            term_id = self.ids.get(term)
+            if term_id is None:
+                term_id = self.ids[term] = len(self.terms)
+                self.terms.append(term)
+            pairs[i] = term_id, c
+        return pairs.tobytes()
+
+    def decode(self, packed: bytes) -> Dict[str, int]:
+        pairs = np.frombuffer(packed, dtype=np.int32).reshape(-1, 2)
+        terms = self.terms
+        return {terms[t]: c for t, c in pairs.tolist()}
+
+
+class JobStore:
+    """
+    Compact, column-projected job corpus kept in memory by the API.
+
+    Only STORE_COLUMNS are held: typed `id` / `loaded_at` columns and
+    dictionary-encoded (categorical) company and location. Descriptions are
+    tokenized once on the way in and kept only as packed BM25 term counts;
+    the text itself is fetched from the database on demand
+    (`db.load_descriptions`). Stores are never mutated: `upsert` returns a
+    new one.
+    """
+
+    def __init__(self, frame: pd.DataFrame, vocab: Optional[TermVocab] = None):
+        self.frame = frame
+        self.vocab = vocab or TermVocab()
+
+    @classmethod
+    def from_frame(cls, jobs: pd.DataFrame, vocab: Optional[TermVocab] = None) -> "JobStore":
+        return cls.from_chunks([jobs], vocab)
+
+    @classmethod
+    def from_chunks(cls, chunks: Iterable[pd.DataFrame], vocab: Optional[TermVocab] = None) -> "JobStore":
+        """Build from a stream of raw frames, so only one chunk of descriptions is ever resident."""
+        vocab = vocab or TermVocab()
+        parts = [_compact(chunk, vocab) for chunk in chunks]
+        frame = pd.concat(parts, ignore_index=True) if parts else _compact(pd.DataFrame(), vocab)
+        return cls(_sort_jobs(_categorize(frame)), vocab)
+
+    def __len__(self):
+        return len(self.frame)
+
+    @property
+    def columns(self):
+        return self.frame.columns
+
+    def column(self, name: str) -> Optional[pd.Series]:
+        return self.frame[name] if name in self.frame.columns else None
+
+    def description_terms(self) -> Iterable[Dict[str, int]]:
+        """Per-job description term counts (same order as tokenizing the text)."""
+        packed = self.column(TERMS_COLUMN)
+        if packed is None:
+            return ({} for _ in range(len(self)))
+        return (self.vocab.decode(p) for p in packed.tolist())
+
+    def upsert(self, delta: pd.DataFrame) -> Optional["JobStore"]:
+        """A new store with `delta` rows upserted by id (or url); None if nothing changed."""
+        if delta.empty:
+            return None
+        delta = _compact(delta, self.vocab)
+        jobs = self.frame
+        key = "id" if "id" in jobs.columns and "id" in delta.columns else "url"
+        # Rows re-fetched because of the overlap window are unchanged: skip them
+        known = set(zip(jobs[key], jobs["loaded_at"]))
+        changed = [(k, t) not in known for k, t in zip(delta[key], delta["loaded_at"])]
+        delta = delta[changed]
+        if delta.empty:
+            return None
+        kept = jobs[~jobs[key].isin(delta[key])]
+        merged = pd.concat([kept, delta], ignore_index=True)  # categoricals come back as object
+        return JobStore(_sort_jobs(_categorize(merged)), self.vocab)
+
+    def save(self, path: str):
+        """
+        Write the store into an index snapshot directory (`path`), so an API
+        started from the snapshot can later refresh incrementally:
+
+            store.json            string columns and the term vocabulary
+            store_<col>.npy       id / loaded_at
+            store_terms*.npy      packed description term counts (CSR)
+        """
+        frame = self.frame
+        strings = {c: frame[c].astype(object).where(frame[c].notna(), None).tolist()
+                   for c in STORE_COLUMNS if c in frame.columns and c not in ("id", "loaded_at")}
+        with open(os.path.join(path, "store.json"), "w", encoding="utf-8") as f:
+            json.dump({"columns": list(frame.columns), "strings": strings, "terms": self.vocab.terms}, f,
+                      ensure_ascii=False)
+        for c in ("id", "loaded_at"):
+            if c in frame.columns:
+                np.save(os.path.join(path, f"store_{c}.npy"), frame[c].to_numpy())
+        packed = frame[TERMS_COLUMN].tolist() if TERMS_COLUMN in frame.columns else [b""] * len(frame)
+        ptr = np.zeros(len(packed) + 1, dtype=np.int64)
+        np.cumsum([len(p) // 4 for p in packed], out=ptr[1:])
+        np.save(os.path.join(path, "store_terms_ptr.npy"), ptr)
+        np.save(os.path.join(path, "store_terms.npy"), np.frombuffer(b"".join(packed), dtype=np.int32))
+
+    @classmethod
+    def load(cls, path: str) -> Optional["JobStore"]:
+        """The store saved with an index snapshot, or None if the snapshot has none."""
+        try:
+            with open(os.path.join(path, "store.json"), encoding="utf-8") as f:
+                saved = json.load(f)
+        except (OSError, ValueError):
+            return None
+        frame = pd.DataFrame(saved["strings"])
+        for c in ("id", "loaded_at"):
+            if c in saved["columns"]:
+                frame[c] = np.load(os.path.join(path, f"store_{c}.npy"))
+        ptr = np.load(os.path.join(path, "store_terms_ptr.npy"))
+        terms = np.load(os.path.join(path, "store_terms.npy"))
+        frame[TERMS_COLUMN] = [terms[a:b].tobytes() for a, b in zip(ptr[:-1], ptr[1:])]
+        vocab = TermVocab()
+        vocab.terms = saved["terms"]
+        vocab.ids = {t: i for i, t in enumerate(vocab.terms)}
+        return cls(_categorize(frame[[c for c in saved["columns"] if c in frame.columns]]), vocab)
+
+    def memory_usage(self) -> Dict:
+        """Resident bytes per column (strings included), plus the term vocabulary."""
+        usage = {col: int(n) for col, n in self.frame.memory_usage(index=False, deep=True).items()}
+        usage["term_vocab"] = sys.getsizeof(self.vocab.ids) + sum(sys.getsizeof(t) for t in self.vocab.terms)
+        return {"jobs": len(self), "bytes": usage, "total_bytes": sum(usage.values())}
+
+
+def saved_keys(path: str) -> Optional[set]:
+    """(id, loaded_at) of every job in the store saved at `path`, without loading the rest (None if none)."""
+    try:
+        ids = np.load(os.path.join(path, "store_id.npy"), mmap_mode="r")
+        loaded_at = np.load(os.path.join(path, "store_loaded_at.npy"), mmap_mode="r")
+    except OSError:
+        return None
+    return set(zip(ids.tolist(), pd.to_datetime(loaded_at)))
+
+
+def has_changes(delta: pd.DataFrame, known: set) -> bool:
+    """Whether `delta` (raw rows) holds a job whose (id, loaded_at) is not in `known`."""
+    if delta.empty:
+        return False
+    ids = pd.to_numeric(delta["id"]).fillna(0).astype(np.int64).tolist()
+    return any(k not in known for k in zip(ids, pd.to_datetime(delta["loaded_at"])))
+
+
+def _compact(jobs: pd.DataFrame, vocab: TermVocab) -> pd.DataFrame:
+    """Project a raw jobs frame onto STORE_COLUMNS; descriptions become packed term counts."""
+    jobs = jobs.rename(columns=str.lower)
+    out = jobs[[c for c in STORE_COLUMNS if c in jobs.columns]].reset_index(drop=True)
+    if "id" in out.columns:
+        out["id"] = pd.to_numeric(out["id"]).fillna(0).astype(np.int64)
+    if "loaded_at" in out.columns:
+        out["loaded_at"] = pd.to_datetime(out["loaded_at"])
+    descs = jobs[DESCRIPTION_COLUMN].tolist() if DESCRIPTION_COLUMN in jobs.columns else [""] * len(jobs)
+    out[TERMS_COLUMN] = [vocab.encode(clean_text(d)) for d in descs]
+    return out
+
+
+def _categorize(frame: pd.DataFrame) -> pd.DataFrame:
+    for col in CATEGORICAL_COLUMNS:
+        if col in frame.columns and not isinstance(frame[col].dtype, pd.CategoricalDtype):
+            frame[col] = frame[col].astype("category")
+    return frame
+
+
+def _sort_jobs(jobs: pd.DataFrame) -> pd.DataFrame:
+    """Keep corpus order stable (by id) so refreshed and fresh loads rank ties alike."""
+    if "id" in jobs.columns:
+        jobs = jobs.sort_values("id", kind="stable")
+    return jobs.reset_index(drop=True)
+
+
+def process_rss_bytes() -> Optional[int]:
+    """Resident set size of this process (Linux /proc; None elsewhere)."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return None
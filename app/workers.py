@@ -0,0 +1,249 @@
+import asyncio
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Dict, List, Optional, Tuple
+
+from .metrics import timed
+from .profiler import Watch, profiled
+
+# --- Scoring pool configuration (0 workers = score in the API process) ---
+MATCH_WORKERS = int(os.getenv("MATCH_WORKERS", "0"))
+# Requests queued or running in the pool before /match answers 503
+MATCH_QUEUE_DEPTH = int(os.getenv("MATCH_QUEUE_DEPTH", str(max(MATCH_WORKERS, 1) * 8)))
+MATCH_TIMEOUT_SECONDS = float(os.getenv("MATCH_TIMEOUT_SECONDS", "30"))
+
+
+class PoolBusy(Exception):
+    """The pool's queue is full (or it is shutting down); retry later."""
+
+
+class PoolTimeout(Exception):
+    """A request did not finish within the per-request timeout."""
+
+
+# --- Worker process side ---
+_worker_reco = None
+
+
+def _init_worker(jobs):
+    """Build the worker's own recommender (index, matcher, caches) once, at spawn."""
+    global _worker_reco
+    from .main import JobRecommender
+
+    _worker_reco = JobRecommender(jobs=jobs)
+
+
+def _stream(**kwargs) -> List[Dict]:
+    return list(_worker_reco.stream(**kwargs))
+
+
+def _compute(kwargs: Dict, watch: Optional[Watch], streamed: bool = False) -> Tuple[Any, List, Optional[Dict]]:
+    return profiled(watch, _stream if streamed else _worker_reco.page, **kwargs)
+
+
+def _batch(cvs: List[Dict]) -> List[Dict]:
+    return list(_worker_reco.compute_batch(cvs))
+
+
+def _compute_batch(cvs: List[Dict]) -> Tuple[List[Dict], List]:
+    return timed(_batch, cvs)
+
+
+def _ready() -> int:
+    return os.getpid()
+
+
+# --- API side ---
+class ScoringPool:
+    """
+    Process pool that runs `JobRecommender.page` (and chunks of
+    `compute_batch`) off the event loop.
+
+    Every worker is started with the API's current corpus and builds its
+    index once, so a request only ships the CV text and gets back the
+    result dict (with its stage timings and, if profiled, stack samples).
+    When the API's corpus (or its embeddings) change, a fresh pool is
+    started in the background (by the refresher, or by the next request)
+    and requests keep going to the old one until every new worker has built
+    its index; the old pool then finishes its in-flight work. At most `queue_depth` requests are queued or running at
+    once; beyond that `run` raises PoolBusy instead of letting latency grow
+    without bound.
+    """
+
+    def __init__(self, reco, workers: int = MATCH_WORKERS, queue_depth: int = MATCH_QUEUE_DEPTH,
+                 timeout: float = MATCH_TIMEOUT_SECONDS):
+        self.reco = reco
+        self.workers = workers
+        self.queue_depth = queue_depth
+        self.timeout = timeout
+        self.pending = 0
+        self.completed = 0
+        self.rejected = 0
+        self.timeouts = 0
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._generation = None
+        self._warming: Optional[ProcessPoolExecutor] = None  # the next pool, while its workers start
+        self._warming_generation = None
+        self._closing = False
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.workers > 0
+
+    def _corpus_generation(self):
+        semantic = self.reco.semantic
+        return self.reco.index.version, semantic.meta["built_at"] if semantic is not None else None
+
+    def start(self):
+        """Spawn the workers and wait until each has built its index."""
+        if not self.enabled:
+            return
+        self._closing = False
+        self._wait_ready(self._ensure_current())
+        print(f"Scoring pool ready: {self.workers} workers.")
+
+    def prepare(self):
+        """Start warming a pool for the current corpus if it changed (called after each refresh)."""
+        if self.enabled and not self._closing and self._executor is not None:
+            self._ensure_current()
+
+    def _spawn(self) -> ProcessPoolExecutor:
+        # spawn, not fork: the API process runs threads (refresher, uvicorn)
+        return ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(self.reco.jobs,),
+        )
+
+    def _wait_ready(self, executor: ProcessPoolExecutor):
+        """Block until every worker of `executor` has run its initializer (built its index)."""
+        pids = set()
+        while len(pids) < self.workers:
+            # A worker that is up may answer several pings while the others build
+            pids.update(f.result() for f in [executor.submit(_ready) for _ in range(self.workers)])
+            if len(pids) < self.workers:
+                time.sleep(0.05)
+
+    def _ensure_current(self) -> ProcessPoolExecutor:
+        with self._lock:
+            generation = self._corpus_generation()
+            if self._executor is None:
+                # Nothing to serve from (first request, or the pool broke): start one now
+                self._executor = self._spawn()
+                self._generation = generation
+            elif generation != self._generation and generation != self._warming_generation:
+                if self._warming is not None:
+                    self._warming.shutdown(wait=False, cancel_futures=True)  # superseded
+                self._warming = self._spawn()
+                self._warming_generation = generation
+                threading.Thread(target=self._swap_when_ready, args=(self._warming, generation),
+                                 name="scoring-pool-warmup", daemon=True).start()
+            return self._executor
+
+    def _swap_when_ready(self, executor: ProcessPoolExecutor, generation):
+        """Warm-up thread: once `executor`'s workers are ready, send new requests to it."""
+        try:
+            self._wait_ready(executor)
+        except Exception as e:
+            with self._lock:
+                current = self._warming is executor
+                if current:
+                    self._warming = self._warming_generation = None
+            executor.shutdown(wait=False, cancel_futures=True)
+            if current:  # otherwise it was superseded or shut down, and cancelled on purpose
+                print(f"[WARN] Scoring pool warm-up failed ({e!r}); retrying on the next request")
+            return
+        with self._lock:
+            if self._warming is not executor:
+                return  # superseded by a newer corpus, or shut down
+            old, self._executor, self._generation = self._executor, executor, generation
+            self._warming = self._warming_generation = None
+        if old is not None:
+            old.shutdown(wait=False)  # queued work still completes
+        print(f"Scoring pool swapped: {self.workers} workers ready for the new corpus.")
+
+    def _release(self, _future):
+        with self._lock:
+            self.pending -= 1
+            self.completed += 1
+
+    async def run(self, watch: Optional[Watch] = None, streamed: bool = False,
+                  **kwargs) -> Tuple[Any, List, Optional[Dict]]:
+        """
+        `reco.page(**kwargs)` in a worker process (with `streamed`, the list
+        of `reco.stream(**kwargs)` items): (result, stage timings, profile or None).
+        """
+        return await self._submit(_compute, kwargs, watch, streamed)
+
+    async def run_batch(self, cvs: List[Dict]) -> Tuple[List[Dict], List]:
+        """`list(reco.compute_batch(cvs))` in a worker process: (results, stage timings)."""
+        return await self._submit(_compute_batch, cvs)
+
+    async def _submit(self, fn, *args):
+        """`fn(*args)` in a worker, within the queue depth and the timeout."""
+        with self._lock:
+            if self._closing or self.pending >= self.queue_depth:
+                self.rejected += 1
+                raise PoolBusy()
+            self.pending += 1
+
+        executor = self._ensure_current()
+        try:
+            future = executor.submit(fn, *args)
+        except BrokenProcessPool:
+            with self._lock:
+                self.pending -= 1
+            self._discard(executor)
+            raise PoolBusy()
+        # The slot is freed when the worker is done, not when the caller
+        # gives up, so timed-out work still counts against the queue depth
+        future.add_done_callback(self._release)
+
+        try:
+            return await asyncio.wait_for(asyncio.wrap_future(future), timeout=self.timeout or None)
+        except asyncio.TimeoutError:
+            future.cancel()  # drops it if it has not started yet
+            with self._lock:
+                self.timeouts += 1
+            raise PoolTimeout()
+        except BrokenProcessPool:
+            self._discard(executor)
+            raise PoolBusy()
+
+    def _discard(self, executor: ProcessPoolExecutor):
+        """A worker died (e.g. OOM-killed): the next request gets a fresh pool."""
+        with self._lock:
+            if self._executor is executor:
+                self._executor = None
+        print("[WARN] Scoring pool broken; restarting it")
+
+    def shutdown(self, wait: bool = True):
+        """Stop accepting work, let queued requests finish, then stop the workers."""
+        with self._lock:
+            self._closing = True
+            executor, self._executor = self._executor, None
+            warming, self._warming, self._warming_generation = self._warming, None, None
+        if warming is not None:
+            warming.shutdown(wait=False, cancel_futures=True)
+        if executor is not None:
+            executor.shutdown(wait=wait)
+
+    def status(self) -> Dict:
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "queue_depth": self.queue_depth,
+                "timeout_seconds": self.timeout,
+                "pending": self.pending,
+                "completed": self.completed,
+                "rejected": self.rejected,
+                "timeouts": self.timeouts,
+                "warming": self._warming is not None,
+                "corpus_version": self._generation[0] if self._generation else None,
+            }
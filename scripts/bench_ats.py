@@ -0,0 +1,115 @@
+"""
+Benchmark: single-pass ATS scorer (app/ats.py) vs the previous multi-pass
+scorer (kept below as `legacy_ats_score`), on long synthetic resumes built
+from scraped job descriptions.
+
+    python scripts/bench_ats.py [--resumes 200] [--chars 12000]
+"""
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+import pandas as pd
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT_DIR))
+from app.ats import ats_breakdown
+from app.skills import get_skill_matcher, load_skills_vocab
+
+CSV_PATH = ROOT_DIR / "data" / "linkedin_jobs_india.csv"
+LEGACY_SKILLS_DB = set(load_skills_vocab())
+
+HEADERS = ["SUMMARY", "EXPERIENCE", "EDUCATION", "SKILLS", "PROJECTS", "CERTIFICATIONS"]
+
+
+def legacy_components(text: str) -> dict:
+    """The scorer before the rewrite (one substring scan per check), as points per component."""
+    t = text.lower()
+    length = len(t)
+    if length > 2800: length_score = 0.20
+    elif length > 1800: length_score = 0.20
+    elif length > 900: length_score = 0.15
+    elif length > 500: length_score = 0.10
+    else: length_score = 0.05
+    sections = ["experience", "education", "skills", "projects", "certifications", "summary", "objective"]
+    section_score = min(0.20, sum(1 for s in sections if s in t) * 0.05)
+    action_verbs = [
+        "led", "managed", "developed", "designed", "implemented", "created",
+        "analyzed", "optimized", "achieved", "improved", "collaborated",
+        "coordinated", "established", "negotiated", "supervised", "trained"
+    ]
+    verb_hits = sum(1 for v in action_verbs if v in t)
+    verb_score = 0.15 if verb_hits > 10 else 0.10 if verb_hits > 5 else 0.05 if verb_hits > 2 else 0.0
+    skill_hits = sum(1 for skill in LEGACY_SKILLS_DB if skill in t)
+    if skill_hits > 15: skill_score = 0.25
+    elif skill_hits > 10: skill_score = 0.20
+    elif skill_hits > 5: skill_score = 0.15
+    elif skill_hits > 2: skill_score = 0.05
+    else: skill_score = 0.0
+    bullets = t.count("•") + t.count("- ") + t.count("* ") + t.count("➢")
+    format_score = 0.10 if bullets > 15 else 0.05 if bullets > 5 else 0.0
+    contact_score = 0.05 if "@" in t and any(x in t for x in [".com", ".in", ".org"]) else 0.0
+    contact_score += 0.05 if any(c.isdigit() for c in t) else 0.0
+    noise = t.count("====") + t.count("****") + t.count("____")
+    return {
+        "length": length_score, "sections": section_score, "verbs": verb_score, "skill_density": skill_score,
+        "formatting": format_score, "contact": contact_score, "penalties": -0.10 if noise > 5 else 0.0,
+    }
+
+
+def legacy_ats_score(text: str) -> float:
+    """The scorer before the rewrite."""
+    return max(0.0, min(1.0, sum(legacy_components(text).values())))
+
+
+def make_resumes(n: int, chars: int, seed: int = 0):
+    """Resume-shaped texts: contact line, section headers and bulleted paragraphs."""
+    descs = [str(d) for d in pd.read_csv(CSV_PATH)["Description"].dropna()]
+    rng = random.Random(seed)
+    resumes = []
+    for i in range(n):
+        parts = [f"Candidate {i}\ncandidate{i}@example.com | +91 98765 {i:05d}\n"]
+        while sum(len(p) for p in parts) < chars:
+            parts.append(f"\n{rng.choice(HEADERS)}\n")
+            for sentence in rng.choice(descs).split(". ")[:8]:
+                parts.append(f"• {sentence.strip()}\n")
+        resumes.append("".join(parts))
+    return resumes
+
+
+def bench(fn, texts, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        for text in texts:
+            fn(text)
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--resumes", type=int, default=200)
+    parser.add_argument("--chars", type=int, default=12000, help="approximate length of each resume")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    resumes = make_resumes(args.resumes, args.chars)
+    get_skill_matcher()  # build the shared matcher outside the timed loop
+    avg_len = sum(map(len, resumes)) / len(resumes)
+    print(f"{len(resumes)} resumes, {avg_len:,.0f} chars on average, best of {args.repeat}")
+
+    t_old = bench(legacy_ats_score, resumes, args.repeat)
+    t_new = bench(ats_breakdown, resumes, args.repeat)
+    print(f"   legacy:      {t_old * 1000 / len(resumes):8.2f} ms/resume")
+    print(f"   single-pass: {t_new * 1000 / len(resumes):8.2f} ms/resume   speedup: {t_old / max(t_new, 1e-9):.1f}x")
+
+    sample = ats_breakdown(resumes[0])
+    print(f"   sample: score {sample['score']} (legacy {legacy_ats_score(resumes[0]):.2f})")
+    print(f"   components: {sample['components']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+"""
+Benchmark: the ingest dedup stage (scripts/dedup.py) on a synthetic corpus.
+
+Postings are assembled from sentences of the scraped descriptions and
+spread over many companies. A share of them are reposts: a new posting ID
+with one sentence changed or a line added. Another share are the same
+posting under new tracking parameters. The corpus is generated and
+signed chunk by chunk, never held whole. Reports throughput, peak memory,
+LSH candidate pairs against the all-pairs count, the size reduction, and
+how the clusters compare with the known ground truth.
+
+    python scripts/bench_dedup.py                      # 1M postings
+    python scripts/bench_dedup.py --postings 100000
+"""
+import argparse
+import resource
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT_DIR / "scripts"))
+from dedup import Deduper, print_report
+
+CSV_PATH = ROOT_DIR / "data" / "linkedin_jobs_india.csv"
+CHUNK_ROWS = 10_000
+REPOST_RATE = 0.12  # new posting ID, lightly edited
+RESHARE_RATE = 0.05  # same posting ID, new tracking parameters
+RECENT = 50_000  # reposts pick from this many latest originals
+
+
+def corpus(n, seed=0):
+    """Chunks of synthetic postings (CSV columns) plus their true cluster (the original's index)."""
+    real = pd.read_csv(CSV_PATH)
+    sentences = sorted({s.strip() for d in real["Description"].dropna() for s in d.split(". ") if len(s.strip()) > 20})
+    titles = real["Title"].dropna().unique().tolist()
+    companies = real["Company"].dropna().unique().tolist() + [f"Company {k}" for k in range(max(n // 20, 1))]
+    rng = np.random.default_rng(seed)
+    originals = []  # (posting id, title, company, sentences) of recent originals
+
+    rows, truth = [], []
+    for i in range(n):
+        roll = rng.random()
+        if originals and roll < REPOST_RATE + RESHARE_RATE:
+            k = int(rng.integers(max(0, len(originals) - RECENT), len(originals)))
+            job_id, title, company, parts, cluster = originals[k]
+            if roll < REPOST_RATE:
+                job_id = 4_000_000_000 + i
+                parts = list(parts)
+                if rng.random() < 0.5:
+                    parts[int(rng.integers(len(parts)))] = sentences[int(rng.integers(len(sentences)))]
+                else:
+                    parts.append(f"Reposted {int(rng.integers(1, 30))} days ago")
+        else:
+            job_id = 4_000_000_000 + i
+            title = titles[int(rng.integers(len(titles)))]
+            company = companies[int(rng.integers(len(companies)))]
+            parts = [sentences[j] for j in rng.integers(len(sentences), size=int(rng.integers(12, 26)))]
+            cluster = i
+            originals.append((job_id, title, company, parts, cluster))
+        rows.append({
+            "Title": title,
+            "Company": company,
+            "Location": "India",
+            "URL": f"https://in.linkedin.com/jobs/view/{job_id}?refId={i}&trackingId={rng.integers(1 << 40)}",
+            "Description": ". ".join(parts),
+        })
+        truth.append(cluster)
+        if len(rows) == CHUNK_ROWS or i == n - 1:
+            yield pd.DataFrame(rows), truth
+            rows, truth = [], []
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--postings", type=int, default=1_000_000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    deduper = Deduper()
+    truth = []
+    text_mb = 0.0
+    sign_s = 0.0
+    rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    t_all = time.perf_counter()
+    for chunk, chunk_truth in corpus(args.postings, args.seed):
+        text_mb += chunk["Description"].str.len().sum() / 1e6
+        t0 = time.perf_counter()
+        deduper.add(chunk)
+        sign_s += time.perf_counter() - t0
+        truth += chunk_truth
+        done = len(truth)
+        if done % 100_000 == 0:
+            print(f"   {done:>9,} postings signed ({done / sign_s:,.0f}/s)")
+    gen_s = time.perf_counter() - t_all - sign_s
+
+    t0 = time.perf_counter()
+    report = deduper.cluster()
+    cluster_s = time.perf_counter() - t0
+    peak_mb = (resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - rss_before) / 1024
+
+    n = args.postings
+    print(f"\n📦 {n:,} synthetic postings, {text_mb:,.0f} MB of descriptions (generated in {gen_s:.0f}s)")
+    print_report(report, "postings")
+    print(f"⏱️  signatures {sign_s:.1f}s ({n / sign_s:,.0f} postings/s, {text_mb / sign_s:.0f} MB/s), "
+          f"LSH + clustering {cluster_s:.1f}s")
+    print(f"🔍 {report['candidate_pairs']:,} candidate pairs compared instead of {n * (n - 1) // 2:,} "
+          f"({report['candidate_pairs'] / max(n * (n - 1) // 2, 1):.2e} of all pairs)")
+    print(f"💾 peak memory growth {peak_mb:,.0f} MB")
+
+    # Ground truth: every true cluster should map to exactly one found cluster
+    pairs = pd.DataFrame({"found": deduper.clusters[deduper.n_existing:], "true": truth}).drop_duplicates()
+    true_clusters, found_clusters = pairs["true"].nunique(), pairs["found"].nunique()
+    missed = len(pairs) - true_clusters  # extra pieces of true clusters (reposts not recognized)
+    merged = len(pairs) - found_clusters  # extra true clusters inside found ones (distinct jobs joined)
+    print(f"🎯 expected {true_clusters:,} postings kept ({1 - true_clusters / n:.1%} smaller), got {report['kept']:,}; "
+          f"{missed:,} duplicates missed, {merged:,} distinct postings wrongly merged")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+"""
+Benchmark: HTML extraction backends (scripts/html_extract.py) on the saved
+LinkedIn guest-API pages in data/fixtures/linkedin/pages/.
+
+Checks first that every backend extracts exactly what the bs4 reference
+does, then reports pages/s and MB/s per page kind, and the peak memory
+allocated while parsing one page.
+
+    python scripts/bench_parsing.py [--seconds 2]
+    python scripts/bench_parsing.py --save-corpus   # regenerate the generated pages
+"""
+import argparse
+import re
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT_DIR))
+from scripts.html_extract import EXTRACTORS, get_extractor
+from scripts.stub_linkedin_server import FIXTURES_DIR, StubState
+
+PAGES_DIR = FIXTURES_DIR / "pages"
+CORPUS_ROLES = ["Software Engineer", "Chartered Accountant", "Civil Engineer", "Content Writer"]
+
+
+def save_corpus():
+    """Render search and job pages from the stub's templates (edge-case pages are hand-written)."""
+    state = StubState()
+    PAGES_DIR.mkdir(parents=True, exist_ok=True)
+    for role in CORPUS_ROLES:
+        slug = re.sub(r"\W+", "-", role.lower())
+        (PAGES_DIR / f"search-{slug}.html").write_text(
+            state.search_page("https://in.linkedin.com", role, 0), encoding="utf-8")
+    for job_id in range(4300000000, 4300000000 + len(state.jobs)):  # one page per fixture job
+        (PAGES_DIR / f"job-{job_id}.html").write_text(state.job_page(job_id), encoding="utf-8")
+    print(f"💾 Saved {len(CORPUS_ROLES)} search pages and {len(state.jobs)} job pages to {PAGES_DIR}")
+
+
+def load_corpus():
+    corpus = {"search": [], "job": []}
+    for path in sorted(PAGES_DIR.glob("*.html")):
+        kind = path.name.split("-", 1)[0]
+        corpus[kind].append((path.name, path.read_text(encoding="utf-8")))
+    return corpus
+
+
+def extract(extractor, kind, page):
+    return extractor.cards(page) if kind == "search" else extractor.description(page)
+
+
+def check_parity(corpus, names) -> bool:
+    reference = get_extractor("bs4")
+    ok = True
+    for name in names:
+        extractor = get_extractor(name)
+        for kind, pages in corpus.items():
+            for fname, page in pages:
+                expected, got = extract(reference, kind, page), extract(extractor, kind, page)
+                if got != expected:
+                    ok = False
+                    print(f"❌ {name} differs from bs4 on {fname}:\n   bs4:  {expected!r}\n   {name}: {got!r}")
+    return ok
+
+
+def throughput(extractor, kind, pages, seconds):
+    """(pages/s, MB/s), looping over the pages for about `seconds`."""
+    size = sum(len(p.encode("utf-8")) for _, p in pages)
+    n = 0
+    t0 = time.perf_counter()
+    while True:
+        for _, page in pages:
+            extract(extractor, kind, page)
+        n += 1
+        elapsed = time.perf_counter() - t0
+        if elapsed >= seconds:
+            return n * len(pages) / elapsed, n * size / elapsed / 1e6
+
+
+def peak_memory(extractor, kind, pages):
+    """Largest peak of traced allocations while parsing a single page."""
+    peak = 0
+    for _, page in pages:
+        tracemalloc.start()
+        extract(extractor, kind, page)
+        peak = max(peak, tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+    return peak
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--seconds", type=float, default=2.0, help="timing budget per backend and page kind")
+    parser.add_argument("--save-corpus", action="store_true")
+    args = parser.parse_args()
+
+    if args.save_corpus:
+        save_corpus()
+    corpus = load_corpus()
+    for kind, pages in corpus.items():
+        size = sum(len(p.encode("utf-8")) for _, p in pages)
+        print(f"📂 {len(pages)} {kind} pages ({size / 1024:.0f} KB)")
+
+    names = list(EXTRACTORS)
+    if not check_parity(corpus, names):
+        sys.exit(1)
+    print(f"✅ {', '.join(names)} extract identical cards and descriptions\n")
+
+    results = {}
+    for kind, pages in corpus.items():
+        print(f"{kind:<8}{'backend':<8}{'pages/s':>10}{'MB/s':>8}{'peak KB':>10}")
+        for name in names:
+            extractor = get_extractor(name)
+            pps, mbps = throughput(extractor, kind, pages, args.seconds)
+            peak = peak_memory(extractor, kind, pages)
+            results[kind, name] = pps
+            print(f"{'':<8}{name:<8}{pps:>10.0f}{mbps:>8.1f}{peak / 1024:>10.0f}")
+        print()
+    for kind in corpus:
+        print(f"⏱️  {kind}: fast is {results[kind, 'fast'] / results[kind, 'bs4']:.1f}x bs4")
+
+
+if __name__ == "__main__":
+    main()
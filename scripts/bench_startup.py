@@ -0,0 +1,72 @@
+"""
+Cold start: time to a ready JobRecommender from the index snapshot vs from
+the database (or a CSV with --csv). Each run is a fresh interpreter; module
+imports (pandas, sqlalchemy, ...) are reported separately since no snapshot
+can make them faster.
+
+    python scripts/bench_startup.py [--csv data/linkedin_jobs_india.csv] [--runs 3]
+"""
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+
+PROBE = """
+import sys, time
+t0 = time.perf_counter()
+sys.path.insert(0, {root!r})
+import pandas as pd
+from app.main import JobRecommender
+t1 = time.perf_counter()
+jobs = pd.read_csv({csv!r}) if {csv!r} else None
+reco = JobRecommender(jobs=jobs)
+assert reco.ready, reco.load_error
+t2 = time.perf_counter()
+print("STARTUP_MS", (t1 - t0) * 1000, (t2 - t1) * 1000, reco.index_source, reco.index.version, file=sys.stderr)
+"""
+
+
+def startup_ms(env, csv=""):
+    proc = subprocess.run(
+        [sys.executable, "-c", PROBE.format(root=str(ROOT_DIR), csv=csv)],
+        env=env, capture_output=True, text=True, check=True,
+    )
+    line = next(l for l in proc.stderr.splitlines() if l.startswith("STARTUP_MS"))
+    _, import_ms, load_ms, source, version = line.split()
+    return float(load_ms), float(import_ms), source, version
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--csv", default="", help="Load jobs from this CSV instead of the database")
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        env = {**os.environ, "INDEX_SNAPSHOT_DIR": os.path.join(tmp, "snapshot")}
+        sys.path.insert(0, str(ROOT_DIR))
+        import pandas as pd
+        from app.main import build_index_snapshot
+
+        cold = [startup_ms(env, args.csv) for _ in range(args.runs)]
+        if args.csv:
+            jobs = pd.read_csv(args.csv)
+        else:
+            from app.db import load_jobs_df
+            jobs = load_jobs_df()
+        build_index_snapshot(jobs, env["INDEX_SNAPSHOT_DIR"])
+        warm = [startup_ms(env) for _ in range(args.runs)]
+
+    best_cold, best_warm = min(cold), min(warm)
+    print(f"imports:              {best_warm[1]:8.0f} ms")
+    print(f"load without snapshot: {best_cold[0]:8.1f} ms  ({best_cold[2]}, version {best_cold[3]})")
+    print(f"load with snapshot:    {best_warm[0]:8.1f} ms  ({best_warm[2]}, version {best_warm[3]})")
+    print(f"speedup: {best_cold[0] / best_warm[0]:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
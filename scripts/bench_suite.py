@@ -0,0 +1,353 @@
+"""
+Benchmark suite for the matching pipeline, on synthetic corpora.
+
+Job postings are generated from data/skills_dict.txt and the scraper's
+JOB_ROLES (each role has its own pool of skills, so CVs and jobs overlap
+the way real ones do), CVs in three lengths from the same pools. Per
+corpus size, every stage of a /match request is timed per CV:
+
+    extract    skill extraction (SkillMatcher.find_all)
+    ats        ATS breakdown + skills, one pass (analyze_cv)
+    score      candidate scoring (score_candidates)
+    rank       top-k selection
+    results    top_jobs dicts (overlap / gap skills)
+    serialize  json.dumps of the response
+    compute    end-to-end JobRecommender.compute (caches off)
+    prefilter  compute in prefilter mode against SQLite (--database)
+
+plus the one-off index build (generation included: the corpus is
+streamed into the job store in chunks, never held whole). Results are written as JSON; `compare`
+flags stages whose median got slower than a baseline by more than
+--threshold (exit code 1).
+
+    python scripts/bench_suite.py run                                  # 1k, 10k, 100k jobs
+    python scripts/bench_suite.py run --sizes 1000,10000,100000,1000000 --database
+    python scripts/bench_suite.py run --out data/benchmarks/baseline.json
+    python scripts/bench_suite.py compare                              # latest vs baseline
+    python scripts/bench_suite.py compare old.json new.json --threshold 0.2
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT_DIR))
+sys.path.insert(0, str(ROOT_DIR / "scripts"))
+
+# Cold requests every time, and no real database (prefilter gets a throwaway SQLite file)
+os.environ["MATCH_CACHE_SIZE"] = "0"
+os.environ["DATABASE_URL"] = f"sqlite:///{Path(tempfile.mkdtemp()) / 'bench.db'}"
+os.environ.pop("CORPUS_MODE", None)
+
+from app.ats import analyze_cv
+from app.main import JobRecommender, _best
+from app.skills import load_skills_vocab
+from app.store import JobStore
+
+BENCH_DIR = ROOT_DIR / "data" / "benchmarks"
+BASELINE_PATH = BENCH_DIR / "baseline.json"
+LATEST_PATH = BENCH_DIR / "latest.json"
+STAGES = ["extract", "ats", "score", "rank", "results", "serialize", "compute", "prefilter"]
+CV_LENGTHS = {"short": 800, "medium": 3000, "long": 9000}  # characters
+DOMAINS = [None, "Software Web Developer", "Data Scientist Analyst AI", "Finance Accountant"]
+TOP_K = 5
+CHUNK_ROWS = 20_000  # generated (and indexed) at a time, as the API streams the table
+SQLITE_UPSERT_ROWS = 2000
+
+CITIES = ["Bengaluru", "Mumbai", "Pune", "Hyderabad", "Chennai", "Gurugram", "Noida", "Kolkata", "Ahmedabad"]
+SENIORITY = ["", "", "Senior ", "Junior ", "Lead ", "Associate "]
+JOB_SENTENCES = [
+    "We are looking for a {title} to join our {team} team in {city}.",
+    "You will work with {a}, {b} and {c} on production systems.",
+    "Strong hands-on experience with {a} and {b} is required.",
+    "Exposure to {a} or {b} is a plus.",
+    "The role involves designing, building and maintaining {team} solutions used by thousands of customers.",
+    "You will collaborate with cross-functional teams and report to the {team} lead.",
+    "Minimum {years} years of experience in a similar role.",
+    "Good communication skills and the ability to work in a fast-paced environment.",
+    "Knowledge of {a} best practices, testing and documentation.",
+    "We offer competitive pay, health insurance and flexible working hours.",
+]
+CV_BULLETS = [
+    "Developed and maintained {a} services used by {n} customers.",
+    "Led a team of {n} engineers to migrate {a} workloads to {b}.",
+    "Designed dashboards in {a} and automated reporting with {b}.",
+    "Optimized {a} pipelines, reducing run time by {n}%.",
+    "Collaborated with stakeholders to implement {a} and {b} features.",
+    "Trained {n} new hires on {a}.",
+]
+TEAMS = ["engineering", "analytics", "operations", "product", "finance", "design", "research", "platform"]
+
+
+class Generator:
+    """Deterministic synthetic jobs and CVs; each role has its own pool of skills."""
+
+    def __init__(self, seed: int = 0):
+        from linkedin_scraper import JOB_ROLES
+
+        self.seed = seed
+        self.roles = list(JOB_ROLES)
+        self.skills = [s for s in load_skills_vocab() if len(s) > 1]
+        rng = random.Random(seed)
+        self.role_skills = {role: rng.sample(self.skills, 25) for role in self.roles}
+
+    def jobs(self, n: int):
+        """`n` postings as frames of CHUNK_ROWS rows (linkedin_jobs columns); the same ones on every call."""
+        rng = random.Random(self.seed * 1_000_003 + n)
+        companies = [f"Company {k}" for k in range(max(n // 25, 10))]
+        start = datetime(2025, 1, 1)
+        rows = []
+        for i in range(n):
+            role = rng.choice(self.roles)
+            pool = self.role_skills[role]
+            skills = rng.sample(pool, rng.randint(4, 12)) + rng.sample(self.skills, rng.randint(0, 3))
+            title = rng.choice(SENIORITY) + role
+            fill = {"title": title, "team": rng.choice(TEAMS), "city": rng.choice(CITIES), "years": rng.randint(1, 10)}
+            sentences = []
+            for _ in range(rng.randint(6, 16)):
+                a, b, c = rng.sample(skills, 3) if len(skills) >= 3 else (skills * 3)[:3]
+                sentences.append(rng.choice(JOB_SENTENCES).format(a=a, b=b, c=c, **fill))
+            rows.append((
+                i + 1, title, rng.choice(companies), f"{fill['city']}, India",
+                f"https://in.linkedin.com/jobs/view/{5_000_000_000 + i}", " ".join(sentences),
+                ";".join(dict.fromkeys(skills)), start + timedelta(seconds=i),
+            ))
+            if len(rows) == CHUNK_ROWS or i == n - 1:
+                yield pd.DataFrame(rows, columns=["id", "title", "company", "location", "url", "description",
+                                                  "skills_required", "loaded_at"])
+                rows = []
+
+    def cvs(self, per_length: int):
+        """[(length name, text)]: resume-shaped texts with a contact line, sections and bullets."""
+        rng = random.Random(self.seed + 7)
+        out = []
+        for name, chars in CV_LENGTHS.items():
+            for i in range(per_length):
+                role = rng.choice(self.roles)
+                pool = self.role_skills[role] + rng.sample(self.skills, 10)
+                parts = [f"Candidate {i}\ncandidate{i}@example.com | +91 98765 {i:05d}\n\nSUMMARY\n{role} with "
+                         f"{rng.randint(1, 12)} years of experience.\n\nSKILLS\n{', '.join(rng.sample(pool, 12))}\n"
+                         f"\nEXPERIENCE\n"]
+                while sum(len(p) for p in parts) < chars:
+                    a, b = rng.sample(pool, 2)
+                    parts.append("• " + rng.choice(CV_BULLETS).format(a=a, b=b, n=rng.randint(2, 40)) + "\n")
+                    if rng.random() < 0.08:
+                        parts.append(f"\n{rng.choice(['PROJECTS', 'EDUCATION', 'CERTIFICATIONS'])}\n")
+                out.append((name, "".join(parts)))
+        return out
+
+
+def timed(fn, repeat):
+    """Fastest of `repeat` calls of `fn`, in ms: the least disturbed by other load on the machine."""
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best * 1000
+
+
+def summarize(times):
+    """Median / p95 / mean over CVs (each CV's fastest call)."""
+    arr = np.array(times)
+    return {
+        "median_ms": round(float(np.median(arr)), 4),
+        "p95_ms": round(float(np.percentile(arr, 95)), 4),
+        "mean_ms": round(float(arr.mean()), 4),
+        "cvs": len(arr),
+    }
+
+
+def calibrate(rounds: int = 15) -> float:
+    """
+    ms for a fixed mix of Python string work and numpy sorting, fastest of
+    `rounds`. `compare` divides by it, so a report from a faster or busier
+    machine is not read as a speedup or a regression.
+    """
+    words = [f"skill{i % 997}" for i in range(20_000)]
+    values = np.random.default_rng(0).random(200_000)
+
+    def work():
+        " ".join(words).lower().split()
+        {w: len(w) for w in words}
+        np.sort(values)
+
+    return timed(work, rounds)
+
+
+def load_sqlite(chunks):
+    """The generated jobs (with job_skills) in the throwaway SQLite database the API reads."""
+    from sqlalchemy import create_engine, text
+    from app.db import DATABASE_URL
+    from check_prefilter import SQLITE_SCHEMA  # (it points DATABASE_URL at its own file, read above already)
+    from ingest_data import upsert_jobs
+
+    engine = create_engine(DATABASE_URL)
+    with engine.begin() as conn:
+        for table in ("job_skills", "skills", "linkedin_jobs"):
+            conn.execute(text(f"DROP TABLE IF EXISTS {table}"))
+        for ddl in SQLITE_SCHEMA:
+            conn.execute(text(ddl))
+    # Small upserts: SQLite joins the staging tables without an index, so time grows with the square of a call
+    for chunk in chunks:
+        rows = chunk.drop(columns=["id", "loaded_at"])
+        for i in range(0, len(rows), SQLITE_UPSERT_ROWS):
+            upsert_jobs(engine, [rows.iloc[i:i + SQLITE_UPSERT_ROWS]])
+    engine.dispose()
+
+
+def bench_size(gen: Generator, n: int, cvs, repeat: int, database: bool):
+    rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    t0 = time.perf_counter()
+    reco = JobRecommender(jobs=JobStore.from_chunks(gen.jobs(n)))
+    build_s = time.perf_counter() - t0
+    index = reco.index
+    print(f"   {n:,} jobs generated and indexed in {build_s:.2f}s")
+
+    times = {stage: [] for stage in STAGES}
+    for k, (_, cv) in enumerate(cvs):
+        domain = DOMAINS[k % len(DOMAINS)]
+        matcher = reco.skill_matcher
+        times["extract"].append(timed(lambda: matcher.find_all(cv), repeat))
+        times["ats"].append(timed(lambda: analyze_cv(cv, matcher), repeat))
+        _, skills = analyze_cv(cv, matcher)
+        vec = index.skill_vector(skills)
+        times["score"].append(timed(lambda: reco.score_candidates(index, cv, vec, domain), repeat))
+        positions, scores = reco.score_candidates(index, cv, vec, domain)
+        times["rank"].append(timed(lambda: _best(positions, scores, TOP_K), repeat))
+        top, top_scores, _ = _best(positions, scores, TOP_K)
+        times["results"].append(timed(lambda: [index.job_result(p, s, vec) for p, s in zip(top, top_scores)], repeat))
+        result = reco.compute(cv, top_k=TOP_K, domain=domain)
+        times["serialize"].append(timed(lambda: json.dumps(result), repeat))
+        times["compute"].append(timed(lambda: reco.compute(cv, top_k=TOP_K, domain=domain), repeat))
+
+    if database:
+        t0 = time.perf_counter()
+        load_sqlite(gen.jobs(n))
+        print(f"   loaded into SQLite in {time.perf_counter() - t0:.1f}s")
+        for k, (_, cv) in enumerate(cvs):
+            domain = DOMAINS[k % len(DOMAINS)]
+            times["prefilter"].append(timed(lambda: reco.compute(cv, top_k=TOP_K, domain=domain, mode="prefilter"), repeat))
+
+    stages = {stage: summarize(t) for stage, t in times.items() if t}
+    return {
+        "jobs": n,
+        "build_s": round(build_s, 3),
+        "build_rss_mb": round((resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - rss_before) / 1024, 1),
+        "stages": stages,
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT_DIR, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(args):
+    gen = Generator(args.seed)
+    cvs = gen.cvs(args.cvs)
+    sizes = [int(s) for s in args.sizes.split(",")]
+    report = {
+        "meta": {
+            "created_at": datetime.now().isoformat(timespec="seconds"),
+            "commit": git_commit(),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "machine": f"{platform.system()} {platform.machine()}, {os.cpu_count()} CPUs",
+            "seed": args.seed,
+            "cvs": len(cvs),
+            "repeat": args.repeat,
+            "top_k": TOP_K,
+            "calibration_ms": round(calibrate(), 4),
+        },
+        "sizes": {},
+    }
+    for n in sizes:
+        print(f"📦 {n:,} jobs")
+        result = bench_size(gen, n, cvs, args.repeat, args.database)
+        report["sizes"][str(n)] = result
+        for stage, s in result["stages"].items():
+            print(f"   {stage:<10} median {s['median_ms']:>9.3f} ms   p95 {s['p95_ms']:>9.3f} ms")
+
+    # Again at the end: the slower of the two is what the machine gave this run
+    report["meta"]["calibration_ms"] = max(report["meta"]["calibration_ms"], round(calibrate(), 4))
+    out = Path(args.out)
+    out.parent.mkdir(parents=True, exist_ok=True)
+    out.write_text(json.dumps(report, indent=2) + "\n", encoding="utf-8")
+    print(f"💾 Wrote {out}")
+
+
+def compare(args):
+    """Exit code 1 if any stage's median regressed past the threshold."""
+    base = json.loads(Path(args.baseline).read_text(encoding="utf-8"))
+    cur = json.loads(Path(args.current).read_text(encoding="utf-8"))
+    # Baseline timings rescaled to the current machine's speed (calibration workload)
+    scale = 1.0
+    if not args.raw and base["meta"].get("calibration_ms") and cur["meta"].get("calibration_ms"):
+        scale = cur["meta"]["calibration_ms"] / base["meta"]["calibration_ms"]
+        print(f"ℹ️  Calibration: this run's machine is {scale:.2f}x the baseline's time; baseline scaled to match")
+    if base["meta"].get("machine") != cur["meta"].get("machine"):
+        print(f"⚠️ Different machines ({base['meta'].get('machine')} vs {cur['meta'].get('machine')})")
+
+    regressions = 0
+    print(f"{'jobs':>9}  {'stage':<10} {'baseline':>10} {'current':>10} {'change':>8}")
+    for size, cur_size in cur["sizes"].items():
+        base_size = base["sizes"].get(size)
+        if base_size is None:
+            continue
+        for stage, s in cur_size["stages"].items():
+            b = base_size["stages"].get(stage)
+            if b is None:
+                continue
+            old, new = b["median_ms"] * scale, s["median_ms"]
+            change = (new - old) / old if old else 0.0
+            # Sub-`min_ms` differences are timer noise, whatever the ratio
+            regressed = change > args.threshold and new - old > args.min_ms
+            regressions += regressed
+            flag = "❌ slower" if regressed else ("✅ faster" if change < -args.threshold else "")
+            print(f"{int(size):>9,}  {stage:<10} {old:>8.3f}ms {new:>8.3f}ms {change:>+8.1%}  {flag}")
+    if regressions:
+        print(f"❌ {regressions} stage(s) slower than the baseline by more than {args.threshold:.0%}")
+        sys.exit(1)
+    print(f"✅ No stage slower than the baseline by more than {args.threshold:.0%}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Matching pipeline benchmarks on synthetic corpora.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    p = sub.add_parser("run", help="benchmark and write a JSON report")
+    p.add_argument("--sizes", default="1000,10000,100000", help="comma-separated corpus sizes (jobs)")
+    p.add_argument("--cvs", type=int, default=10, help="CVs per length (short, medium, long)")
+    p.add_argument("--repeat", type=int, default=5, help="timed calls per CV and stage")
+    p.add_argument("--seed", type=int, default=0)
+    p.add_argument("--database", action="store_true", help="also time prefilter mode against SQLite")
+    p.add_argument("--out", default=str(LATEST_PATH))
+    p.set_defaults(fn=run)
+    p = sub.add_parser("compare", help="flag regressions of a report against a baseline")
+    p.add_argument("baseline", nargs="?", default=str(BASELINE_PATH))
+    p.add_argument("current", nargs="?", default=str(LATEST_PATH))
+    p.add_argument("--threshold", type=float, default=0.15, help="allowed slowdown of a median (0.15 = 15%%)")
+    p.add_argument("--min-ms", type=float, default=0.05, help="ignore slowdowns smaller than this")
+    p.add_argument("--raw", action="store_true", help="compare raw times, without calibration scaling")
+    p.set_defaults(fn=compare)
+    args = parser.parse_args()
+    args.fn(args)
+
+
+if __name__ == "__main__":
+    main()
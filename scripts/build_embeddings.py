@@ -0,0 +1,48 @@
+"""
+Precompute job embeddings + the ANN index used by /match mode="semantic".
+
+Reads the jobs table (or a CSV with --csv) and writes data/embeddings/.
+Run after scripts/ingest_data.py (it is called from there automatically).
+
+    python scripts/build_embeddings.py
+    python scripts/build_embeddings.py --csv data/linkedin_jobs_india.csv --encoder hashing
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import pandas as pd
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT_DIR))
+from app.semantic import EMBEDDING_ENCODER, SEMANTIC_DIR, build_semantic_index, get_encoder
+
+
+def build_embeddings(jobs: pd.DataFrame, out_dir: str = SEMANTIC_DIR, encoder_name: str = EMBEDDING_ENCODER):
+    encoder = get_encoder(encoder_name)
+    print(f"🧠 Embedding {len(jobs)} jobs with {encoder.name}...")
+    t0 = time.perf_counter()
+    meta = build_semantic_index(jobs, out_dir, encoder)
+    print(f"✅ Embeddings written to {out_dir} "
+          f"({meta['count']} x {meta['dim']}, {meta['nlist']} IVF lists) in {time.perf_counter() - t0:.1f}s")
+    return meta
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--csv", help="Read jobs from this CSV instead of the database")
+    parser.add_argument("--out", default=SEMANTIC_DIR, help="Output directory")
+    parser.add_argument("--encoder", default=EMBEDDING_ENCODER, help='"auto", "hashing[-dim]" or "st:<model>"')
+    args = parser.parse_args()
+
+    if args.csv:
+        jobs = pd.read_csv(args.csv)
+    else:
+        from app.db import load_jobs_df
+        jobs = load_jobs_df()
+    build_embeddings(jobs, args.out, args.encoder)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,46 @@
+"""
+Prebuild the matching index the API memory-maps at startup.
+
+Reads the jobs table (or a CSV with --csv) and writes data/index_snapshot/.
+Run after scripts/ingest_data.py (it is called from there automatically).
+
+    python scripts/build_snapshot.py
+    python scripts/build_snapshot.py --csv data/linkedin_jobs_india.csv
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import pandas as pd
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT_DIR))
+from app.index import INDEX_SNAPSHOT_DIR
+from app.main import build_index_snapshot
+
+
+def build_snapshot(jobs: pd.DataFrame, out_dir: str = INDEX_SNAPSHOT_DIR):
+    print(f"📦 Building index snapshot for {len(jobs)} jobs...")
+    t0 = time.perf_counter()
+    meta = build_index_snapshot(jobs, out_dir)
+    print(f"✅ Snapshot written to {out_dir} (version {meta['version']}) in {time.perf_counter() - t0:.1f}s")
+    return meta
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--csv", help="Read jobs from this CSV instead of the database")
+    parser.add_argument("--out", default=INDEX_SNAPSHOT_DIR, help="Output directory")
+    args = parser.parse_args()
+
+    if args.csv:
+        jobs = pd.read_csv(args.csv)
+    else:
+        from app.db import load_jobs_df
+        jobs = load_jobs_df()
+    build_snapshot(jobs, args.out)
+
+
+if __name__ == "__main__":
+    main()
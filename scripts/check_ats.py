@@ -0,0 +1,83 @@
+"""
+Pin the ATS scorer (app/ats.py) on the fixture CVs in data/fixtures/cvs/.
+
+1. analyze_cv's breakdown (score, components, signals) of every fixture
+   equals the one recorded in data/fixtures/cvs/expected.json.
+2. The scorer before the single-pass rewrite (`legacy_components` in
+   bench_ats.py) still gives the recorded points, and every component
+   where the two disagree is one of the intended differences documented
+   for that fixture (and every documented difference still shows).
+
+After an intended change to the scorer, rerun with --update to record the
+new outputs; documented differences are kept, and components that now
+differ without one are listed.
+
+    python scripts/check_ats.py [--update]
+"""
+import argparse
+import json
+import sys
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT_DIR))
+sys.path.insert(0, str(ROOT_DIR / "scripts"))
+from app.ats import analyze_cv
+from bench_ats import legacy_components
+
+FIXTURES_DIR = ROOT_DIR / "data" / "fixtures" / "cvs"
+EXPECTED_PATH = FIXTURES_DIR / "expected.json"
+
+
+def differing(breakdown, legacy):
+    return sorted(k for k, v in breakdown["components"].items() if round(legacy[k], 4) != v)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--update", action="store_true", help="record the current outputs as expected")
+    args = parser.parse_args()
+
+    expected = json.loads(EXPECTED_PATH.read_text(encoding="utf-8")) if EXPECTED_PATH.exists() else {}
+    ok = True
+    current = {}
+    for path in sorted(FIXTURES_DIR.glob("*.txt")):
+        text = path.read_text(encoding="utf-8")
+        breakdown = analyze_cv(text)[0]
+        legacy = {k: round(v, 4) for k, v in legacy_components(text).items()}
+        pinned = expected.get(path.name, {})
+        notes = pinned.get("differences", {})
+        current[path.name] = {"breakdown": breakdown, "legacy": legacy, "differences": notes}
+        changed = differing(breakdown, legacy)
+        undocumented = [k for k in changed if k not in notes]
+        stale = [k for k in notes if k not in changed]
+
+        if args.update:
+            if undocumented or stale:
+                print(f"⚠️  {path.name}: document {undocumented}, drop stale notes {stale}")
+            continue
+        problems = []
+        if breakdown != pinned.get("breakdown"):
+            problems.append(f"breakdown {breakdown} != pinned {pinned.get('breakdown')}")
+        if legacy != pinned.get("legacy"):
+            problems.append(f"legacy points {legacy} != pinned {pinned.get('legacy')}")
+        if undocumented:
+            problems.append(f"undocumented differences from the legacy scorer: {undocumented}")
+        if stale:
+            problems.append(f"documented differences that no longer show: {stale}")
+        if problems:
+            ok = False
+            print(f"❌ {path.name}: " + "; ".join(problems))
+        else:
+            legacy_score = round(max(0.0, min(1.0, sum(legacy.values()))), 4)
+            print(f"✅ {path.name}: score {breakdown['score']} (legacy {legacy_score})"
+                  + "".join(f"\n     {k}: {notes[k]}" for k in changed))
+
+    if args.update:
+        EXPECTED_PATH.write_text(json.dumps(current, indent=2, ensure_ascii=False) + "\n", encoding="utf-8")
+        print(f"📝 {len(current)} fixtures recorded in {EXPECTED_PATH.relative_to(ROOT_DIR)}")
+    return ok
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
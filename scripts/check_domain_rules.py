@@ -0,0 +1,85 @@
+"""
+Check the declarative domain rules (data/domain_rules.json, app/domains.py)
+against the hard-coded if-chain they replaced, and time domain filtering.
+
+For the dashboard presets and a set of free-text domains, every job title
+must be boosted and rejected exactly as the old `compute_match_score`
+did. Then compares scanning titles per request with the cached per-domain
+masks of the index.
+
+    python scripts/check_domain_rules.py
+"""
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT_DIR))
+from app.domains import get_domain_rules
+from app.index import JobIndex
+
+CSV_PATH = ROOT_DIR / "data" / "linkedin_jobs_india.csv"
+FREE_TEXT = [
+    "Food Safety", "biology", "Biotech Research", "civil engineer", "Mechanical Design", "electrical",
+    "Python Developer", "Nurse", "  ", "Data", "Food & Bio Civil", "Marketing_Manager 100%",
+]
+REPEATS = 200
+
+# The rules as they were written in app/main.py
+TECH_KEYWORDS = ["data scientist", "software", "full stack", "react", "python", "java developer", "ai engineer"]
+IT_KEYWORDS = ["software", "web", "frontend", "backend", "data", "cloud"]
+
+
+def legacy(user_domain: str, title: str) -> float:
+    """Domain part of the old compute_match_score: -1 rejected, 1 boosted, 0 otherwise."""
+    user_domain = user_domain.lower()
+    if "food" in user_domain or "bio" in user_domain:
+        if any(k in title for k in TECH_KEYWORDS):
+            return -1.0
+    if "civil" in user_domain or "mechanical" in user_domain or "electrical" in user_domain:
+        if any(k in title for k in IT_KEYWORDS):
+            return -1.0
+    if sum(1 for k in user_domain.split() if k in title) > 0:
+        return 1.0
+    if "technologist" in title and "food" in user_domain:
+        return 1.0
+    return 0.0
+
+
+def main():
+    jobs = pd.read_csv(CSV_PATH).rename(columns=str.lower)
+    index = JobIndex(jobs)
+    rules = get_domain_rules()
+    domains = list(rules.presets) + FREE_TEXT
+
+    ok = True
+    for domain in domains:
+        boost, reject, boost_jobs = index.domain_masks(rules.get(domain))
+        new = np.where(reject, -1.0, boost.astype(float))
+        old = np.array([legacy(domain, t) for t in index.titles_low])
+        if not np.array_equal(new, old) or not np.array_equal(boost_jobs, np.flatnonzero(boost)):
+            ok = False
+            print(f"❌ {domain!r}: {int((new != old).sum())} titles differ from the old rules")
+    if not ok:
+        sys.exit(1)
+    print(f"✅ {len(domains)} domains x {index.size} titles: same boosts and rejects as the old rules")
+
+    # Per-request cost: old per-job scan vs cached masks
+    t0 = time.perf_counter()
+    for _ in range(REPEATS // 20):
+        for domain in rules.presets:
+            [legacy(domain, t) for t in index.titles_low]
+    scan = (time.perf_counter() - t0) / (REPEATS // 20 * len(rules.presets))
+    t0 = time.perf_counter()
+    for _ in range(REPEATS):
+        for domain in rules.presets:
+            index.domain_masks(rules.get(domain))
+    cached = (time.perf_counter() - t0) / (REPEATS * len(rules.presets))
+    print(f"⏱️  per request: title scan {scan * 1000:.2f} ms, cached masks {cached * 1e6:.1f} µs ({scan / cached:.0f}x)")
+
+
+if __name__ == "__main__":
+    main()
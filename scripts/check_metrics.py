@@ -0,0 +1,219 @@
+"""
+Check GET /metrics and the Server-Timing header of /match, /match/pdf and
+/extract.
+
+1. Every response carries a Server-Timing header whose stages (queue,
+   profile, rank, results, serialize, plus pdf for uploads) fit in its
+   total; a streamed /match page has the stages run before its body.
+2. /metrics parses as Prometheus text: request and error counters by
+   endpoint and (bounded) domain, stage and request histograms whose counts
+   agree with the traffic sent, corpus, cache and pool gauges.
+3. With a scoring pool, the worker's stages come back with the result.
+4. The instrumentation costs well under 1% of a request: its per-request
+   cost is measured on its own and compared to /match latency, cached and
+   cold.
+
+Uses the same throwaway SQLite copy of the scraped CSV as
+check_pdf_extract.py (no server needed).
+
+    python scripts/check_metrics.py
+"""
+import asyncio
+import os
+import re
+import statistics
+import sys
+import time
+from collections import defaultdict
+from pathlib import Path
+
+import pandas as pd
+from sqlalchemy import create_engine
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+from check_pdf_extract import CSV_PATH, make_pdf, resume_pages  # also points the app at a temp database
+
+MATCH_STAGES = {"queue", "profile", "rank", "results", "serialize"}
+LINE = re.compile(r'^([a-zA-Z_:][a-zA-Z0-9_:]*)(\{[^}]*\})? (\S+)$')
+REPEATS = 300
+
+
+def parse_metrics(text):
+    """{name: {frozenset of (label, value): value}}, failing on any malformed line."""
+    samples = defaultdict(dict)
+    for line in text.splitlines():
+        if not line or line.startswith("#"):
+            continue
+        m = LINE.match(line)
+        if not m:
+            raise ValueError(f"malformed line: {line!r}")
+        labels = frozenset(re.findall(r'(\w+)="((?:[^"\\]|\\.)*)"', m.group(2) or ""))
+        samples[m.group(1)][labels] = float(m.group(3))
+    return samples
+
+
+def parse_timing(header):
+    stages = {}
+    for part in header.split(","):
+        name, dur = part.strip().split(";dur=")
+        stages[name] = float(dur)
+    return stages
+
+
+def median_ms(fn, repeats=REPEATS):
+    times = []
+    for _ in range(repeats):
+        t0 = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - t0)
+    return statistics.median(times) * 1000
+
+
+def main():
+    jobs = pd.read_csv(CSV_PATH).rename(columns=str.lower)
+    jobs.insert(0, "id", range(1, len(jobs) + 1))
+    jobs.to_sql("linkedin_jobs", create_engine(os.environ["DATABASE_URL"]), index=False)
+
+    from fastapi.testclient import TestClient
+    import app.api as api
+    from app.metrics import stage, timed, track
+    from app.workers import ScoringPool
+
+    ok = True
+
+    def check(cond, good, bad):
+        nonlocal ok
+        print(f"✅ {good}" if cond else f"❌ {bad}")
+        ok = ok and cond
+
+    descriptions = jobs["description"].dropna().tolist()
+    preset = next(iter(api.reco.domain_rules.presets))
+    sent = [(descriptions[i], domain) for i in range(6) for domain in (None, preset, "Underwater Basket Weaving")]
+    pdf_bytes = make_pdf(resume_pages(descriptions[7], 2))
+    headers = {"Content-Type": "application/pdf"}
+
+    with TestClient(api.app) as client:
+        # 1. Server-Timing
+        timings = []
+        for text, domain in sent:
+            res = client.post("/match", json={"cv_text": text, "top_k": 5, "domain": domain})
+            timings.append(parse_timing(res.headers.get("server-timing", "")))
+        res = client.post("/match/pdf", params={"domain": preset}, content=pdf_bytes, headers=headers)
+        pdf_timing = parse_timing(res.headers.get("server-timing", ""))
+        streamed = client.post("/match", json={"cv_text": descriptions[8], "top_k": 5, "stream": True})
+        stream_timing = parse_timing(streamed.headers.get("server-timing", ""))
+        res = client.post("/extract", content=pdf_bytes, headers=headers)
+        extract_timing = parse_timing(res.headers.get("server-timing", ""))
+        # stages are rounded to 0.01 ms each
+        bad = [t for t in timings if set(t) != MATCH_STAGES | {"total"}
+               or sum(t.values()) - 2 * t["total"] > 0.01 * len(t)]
+        check(not bad and set(pdf_timing) == MATCH_STAGES | {"pdf", "total"} and "pdf" in extract_timing,
+              f"Server-Timing on every response, e.g. {res.request.url.path}: {extract_timing}; "
+              f"/match: {timings[0]}", f"bad Server-Timing headers: {bad[:2] or pdf_timing}")
+        check(set(stream_timing) == {"queue", "profile", "rank", "total"} and len(streamed.text.splitlines()) == 7,
+              f"streamed /match: {stream_timing}", f"streamed /match Server-Timing: {stream_timing}")
+
+        # errors: semantic mode without embeddings (400), not a PDF (400), oversized (413)
+        client.post("/match", json={"cv_text": "python", "mode": "semantic", "domain": preset})
+        client.post("/match/pdf", content=b"not a pdf", headers=headers)
+        client.post("/extract", content=b"%" * (api.pdf.max_bytes + 1), headers=headers)
+
+        # 2. /metrics
+        res = client.get("/metrics")
+        try:
+            samples = parse_metrics(res.text)
+        except ValueError as e:
+            check(False, "", str(e))
+            return False
+        check(res.headers["content-type"].startswith("text/plain; version=0.0.4"), "/metrics served as Prometheus text",
+              f"/metrics content type {res.headers['content-type']}")
+
+        def value(name, **labels):
+            return samples[name].get(frozenset(labels.items()))
+
+        requests = samples["profiled_requests_total"]
+        expected = {
+            ("/match", "none"): 7, ("/match", preset): 7, ("/match", "other"): 6,
+            ("/match/pdf", preset): 1, ("/match/pdf", "none"): 1, ("/extract", "none"): 2,
+        }
+        got = {(dict(k)["endpoint"], dict(k)["domain"]): v for k, v in requests.items()}
+        check(got == expected, f"request counters by endpoint and domain: {got}",
+              f"request counters {got}, expected {expected}")
+        errors = {(dict(k)["endpoint"], dict(k)["status"]): v for k, v in samples["profiled_request_errors_total"].items()}
+        check(errors == {("/match", "400"): 1, ("/match/pdf", "400"): 1, ("/extract", "413"): 1},
+              f"error counters by status: {errors}", f"error counters {errors}")
+
+        match_count = value("profiled_request_duration_seconds_count", endpoint="/match")
+        inf = value("profiled_request_duration_seconds_bucket", endpoint="/match", le="+Inf")
+        rank_count = value("profiled_stage_duration_seconds_count", stage="rank")
+        check(match_count == 20 and inf == 20 and rank_count == 20,
+              f"histograms: 20 /match requests, 20 rank stages (19 /match + 1 /match/pdf), "
+              f"p50 bucket of rank ≤ {_quantile_bucket(samples, 'rank', 0.5)}s",
+              f"histogram counts: requests {match_count}, +Inf {inf}, rank {rank_count}")
+
+        gauges = {
+            "jobs": value("profiled_corpus_jobs"), "ready": value("profiled_ready"),
+            "version": [dict(k) for k in samples["profiled_corpus_info"]],
+            "profile_hits": value("profiled_cache_hits_total", cache="profile"),
+            "pdf_cache_entries": value("profiled_cache_entries", cache="pdf"),
+            "match_workers": value("profiled_pool_workers", pool="match"),
+        }
+        check(gauges["jobs"] == api.reco.index.size and gauges["ready"] == 1
+              and gauges["version"][0]["version"] == api.reco.index.version and gauges["profile_hits"] >= 12
+              and gauges["pdf_cache_entries"] == 1,
+              f"gauges: {gauges}", f"gauges wrong: {gauges}")
+
+        # 4. Overhead: instrumentation alone vs a request
+        text = descriptions[10]
+        body = {"cv_text": text, "top_k": 5}
+        cached_ms = median_ms(lambda: client.post("/match", json=body))
+        cold = iter(f"{d} {i}" for i, d in enumerate(descriptions * 5))
+        cold_ms = median_ms(lambda: client.post("/match", json={"cv_text": next(cold), "top_k": 5}), 100)
+
+    def stages_only():
+        for name in ("profile", "rank", "results"):
+            with stage(name):
+                pass
+        return {}
+
+    def instrumented():
+        with track("/bench", "none") as m:
+            result, stages = timed(stages_only)
+            m.add("queue", 0.0)
+            m.extend(stages)
+            m.add("serialize", 0.0)
+            m.server_timing()
+
+    overhead_us = (median_ms(instrumented, 20000) - median_ms(stages_only, 20000)) * 1000
+    check(overhead_us / 1000 < 0.01 * cold_ms,
+          f"instrumentation costs {overhead_us:.1f} µs per request: {overhead_us / 10 / cold_ms:.2f}% of a cold /match "
+          f"({cold_ms:.1f} ms), {overhead_us / 10 / cached_ms:.2f}% of a cached one ({cached_ms:.2f} ms, TestClient)",
+          f"instrumentation costs {overhead_us:.1f} µs per request vs {cold_ms:.1f} ms cold /match")
+
+    # 3. Scoring pool: the worker's stages travel back with the result
+    async def pooled():
+        pool = ScoringPool(api.reco, workers=1)
+        await asyncio.get_running_loop().run_in_executor(None, pool.start)
+        try:
+            return await pool.run(cv_text=descriptions[0], top_k=3)
+        finally:
+            pool.shutdown()
+
+    result, stages, _ = asyncio.run(pooled())
+    check(len(result["top_jobs"]) == 3 and [s for s, _ in stages] == ["profile", "rank", "results"],
+          f"pool worker returned its stages: {[(s, round(d * 1000, 2)) for s, d in stages]}",
+          f"pool worker returned {stages}")
+    return ok
+
+
+def _quantile_bucket(samples, stage_name, q):
+    buckets = sorted(
+        (float(dict(k)["le"]), v) for k, v in samples["profiled_stage_duration_seconds_bucket"].items()
+        if dict(k)["stage"] == stage_name
+    )
+    total = buckets[-1][1]
+    return next(le for le, c in buckets if c >= q * total)
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
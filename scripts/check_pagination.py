@@ -0,0 +1,133 @@
+"""
+Check cursor pagination and NDJSON streaming of /match.
+
+1. Paging through a ranking with cursors alone (no CV text) returns exactly
+   the jobs of one large request, in order, and scores the CV once.
+2. Past the held depth (MATCH_CACHE_DEPTH) a cursor alone gets 410; sent
+   with the CV text it re-ranks once to MATCH_PAGE_DEPTH, and later pages
+   are slices again.
+3. "stream": true answers NDJSON: the profile, one line per job with its
+   rank, then next_cursor; streamed pages match the JSON ones.
+4. A forged cursor or another CV's text gets 400, a forgotten ranking 410,
+   a request with neither text nor cursor 422.
+
+Uses the same throwaway SQLite copy of the scraped CSV as
+check_pdf_extract.py (no server needed).
+
+    python scripts/check_pagination.py
+"""
+import json
+import os
+import sys
+import time
+from pathlib import Path
+
+import pandas as pd
+from sqlalchemy import create_engine
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+from check_pdf_extract import CSV_PATH  # also points the app at a temp database
+
+PAGE = 10
+
+
+def main():
+    jobs = pd.read_csv(CSV_PATH).rename(columns=str.lower)
+    jobs.insert(0, "id", range(1, len(jobs) + 1))
+    jobs.to_sql("linkedin_jobs", create_engine(os.environ["DATABASE_URL"]), index=False)
+
+    from fastapi.testclient import TestClient
+    import app.api as api
+    from app.main import RANK_CACHE_DEPTH
+
+    ok = True
+
+    def check(cond, good, bad):
+        nonlocal ok
+        print(f"✅ {good}" if cond else f"❌ {bad}")
+        ok = ok and cond
+
+    reco = api.reco
+    ranks = []
+    rank = reco.rank
+    reco.rank = lambda *args, **kwargs: ranks.append(args[4]) or rank(*args, **kwargs)
+    descriptions = jobs["description"].dropna().tolist()
+    preset = next(iter(reco.domain_rules.presets))
+
+    with TestClient(api.app) as client:
+        # 1. Cursor pages == one large request
+        bad, pages_seen, page_ms = [], 0, []
+        for i, domain in [(0, None), (1, preset), (2, None), (3, preset)]:
+            text = descriptions[i]
+            ranks.clear()
+            body = client.post("/match", json={"cv_text": text, "top_k": PAGE, "domain": domain}).json()
+            paged = list(body["top_jobs"])
+            while body["next_cursor"] and len(paged) < RANK_CACHE_DEPTH:
+                t0 = time.perf_counter()
+                body = client.post("/match", json={"cursor": body["next_cursor"], "top_k": PAGE}).json()
+                page_ms.append((time.perf_counter() - t0) * 1000)
+                paged += body["top_jobs"]
+            pages_seen += len(paged) // PAGE
+            scans = len(ranks)
+            expected = reco.compute(text, top_k=len(paged), domain=domain)["top_jobs"]
+            if paged != expected or scans != 1:
+                bad.append((i, domain, len(paged), scans))
+        check(not bad, f"{pages_seen} cursor pages of {PAGE} equal one large request, one scan per CV "
+                       f"(a page: {sorted(page_ms)[len(page_ms) // 2]:.2f} ms)",
+              f"paged results differ (cv, domain, jobs, scans): {bad}")
+
+        # 2. Past the held depth
+        text = descriptions[5]
+        first = client.post("/match", json={"cv_text": text, "top_k": RANK_CACHE_DEPTH - 5}).json()
+        beyond = client.post("/match", json={"cursor": first["next_cursor"], "top_k": 2 * PAGE})
+        ranks.clear()
+        rebuilt = client.post("/match", json={"cursor": first["next_cursor"], "top_k": 2 * PAGE, "cv_text": text})
+        after = client.post("/match", json={"cursor": rebuilt.json()["next_cursor"], "top_k": 2 * PAGE})
+        expected = reco.compute(text, top_k=RANK_CACHE_DEPTH + 35)["top_jobs"][RANK_CACHE_DEPTH - 5:]
+        got = rebuilt.json()["top_jobs"] + after.json()["top_jobs"]
+        check(beyond.status_code == 410 and rebuilt.status_code == 200 and after.status_code == 200
+              and got == expected and len(ranks) == 1,
+              f"past {RANK_CACHE_DEPTH} held jobs: cursor alone 410, with cv_text one re-rank "
+              f"to depth {ranks[0] if ranks else '?'}, then slices again",
+              f"beyond: {beyond.status_code}, rebuilt: {rebuilt.status_code}, after: {after.status_code}, "
+              f"same jobs: {got == expected}, re-ranks: {ranks}")
+
+        # 3. NDJSON
+        text = descriptions[6]
+        page1 = client.post("/match", json={"cv_text": text, "top_k": PAGE, "domain": preset}).json()
+        page2 = client.post("/match", json={"cursor": page1["next_cursor"], "top_k": PAGE}).json()
+        lines = []
+        for req in ({"cv_text": text, "top_k": PAGE, "domain": preset, "stream": True},
+                    {"cursor": page1["next_cursor"], "top_k": PAGE, "stream": True}):
+            with client.stream("POST", "/match", json=req) as res:
+                lines.append((res.headers["content-type"], [json.loads(line) for line in res.iter_lines() if line]))
+        streamed = []
+        for (ctype, items), page, first_rank in zip(lines, (page1, page2), (1, PAGE + 1)):
+            head, jobs_, tail = items[0], items[1:-1], items[-1]
+            streamed.append(
+                ctype == "application/x-ndjson"
+                and head == {k: page[k] for k in ("ats_score", "ats_breakdown", "candidate_skills")}
+                and [j.pop("rank") for j in jobs_] == list(range(first_rank, first_rank + len(jobs_)))
+                and jobs_ == page["top_jobs"] and tail == {"next_cursor": page["next_cursor"]}
+            )
+        check(all(streamed), f"NDJSON pages: profile, {PAGE} ranked jobs, next_cursor; same as the JSON pages",
+              f"streamed pages differ: {streamed} {lines[0][1][:2]}")
+
+        # 4. Errors
+        cases = [
+            ("forged cursor", {"cursor": "bm90IGEgY3Vyc29y"}, 400),
+            ("another CV's text", {"cursor": page1["next_cursor"], "cv_text": "someone else"}, 400),
+            ("neither text nor cursor", {"top_k": 5}, 422),
+            ("streamed forged cursor", {"cursor": "e30", "stream": True}, 400),
+        ]
+        statuses = {name: client.post("/match", json=body).status_code for name, body, _ in cases}
+        reco.profile_cache.clear()
+        reco.ranking_cache.clear()
+        statuses["expired"] = client.post("/match", json={"cursor": page1["next_cursor"]}).status_code
+        expected = {**{name: status for name, _, status in cases}, "expired": 410}
+        check(statuses == expected, f"errors: {statuses}", f"errors: {statuses}, expected {expected}")
+    return ok
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
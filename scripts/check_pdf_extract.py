@@ -0,0 +1,217 @@
+"""
+Check the API's PDF endpoints (/extract, /match/pdf) on generated resumes.
+
+1. The text matches what the front ends' in-process pypdf code extracted.
+2. Only the first PDF_MAX_PAGES pages of a long file are read; the time
+   against extracting the whole file in-process is reported.
+3. A repeated upload is served from the cache.
+4. Oversized, invalid, text-less and too-slow files get 413/400/422/504.
+   A file stuck on one page gets its worker killed and replaced, while a
+   file extracted at the same time on the other worker is unaffected.
+5. /match/pdf returns what /match returns for the extracted text.
+
+Runs against a throwaway SQLite copy of the scraped CSV (no server needed).
+
+    python scripts/check_pdf_extract.py
+"""
+import asyncio
+import os
+import sys
+import tempfile
+import time
+from io import BytesIO
+from pathlib import Path
+
+import pandas as pd
+from sqlalchemy import create_engine
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT_DIR))
+
+TMP_DIR = Path(tempfile.mkdtemp())
+os.environ["DATABASE_URL"] = f"sqlite:///{TMP_DIR / 'jobs.db'}"
+os.environ["INDEX_SNAPSHOT_DIR"] = str(TMP_DIR / "snapshot")
+os.environ["REFRESH_INTERVAL_SECONDS"] = "0"
+os.environ.pop("CORPUS_MODE", None)
+# TestClient is not a loopback client: the checks authenticate to /admin with this token
+ADMIN_TOKEN = os.environ["ADMIN_TOKEN"] = "check-admin-token"
+
+CSV_PATH = ROOT_DIR / "data" / "linkedin_jobs_india.csv"
+LONG_PAGES = 40
+LINES_PER_PAGE = 45
+# One page this long takes pypdf several seconds, past the timeout's grace period
+STUCK_LINES = 30000
+
+
+def make_pdf(pages):
+    """A minimal PDF with one Helvetica text block per page (a list of lines each)."""
+    objects = ["<< /Type /Catalog /Pages 2 0 R >>", None, "<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    kids = []
+    for lines in pages:
+        ops = ["BT /F1 10 Tf 12 TL 50 800 Td"]
+        for line in lines:
+            ops.append("(" + line.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)") + ") Tj T*")
+        ops.append("ET")
+        stream = "\n".join(ops).encode("latin-1", "replace")
+        objects.append(f"<< /Length {len(stream)} >>\nstream\n".encode() + stream + b"\nendstream")
+        objects.append(f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] "
+                       f"/Resources << /Font << /F1 3 0 R >> >> /Contents {len(objects)} 0 R >>")
+        kids.append(f"{len(objects)} 0 R")
+    objects[1] = f"<< /Type /Pages /Kids [{' '.join(kids)}] /Count {len(kids)} >>"
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for i, obj in enumerate(objects, 1):
+        offsets.append(len(out))
+        out += f"{i} 0 obj\n".encode() + (obj if isinstance(obj, bytes) else obj.encode()) + b"\nendobj\n"
+    xref = len(out)
+    out += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode()
+    out += "".join(f"{o:010d} 00000 n \n" for o in offsets).encode()
+    out += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode()
+    return bytes(out)
+
+
+def resume_pages(description, n_pages):
+    words = description.split()
+    lines = [" ".join(words[i:i + 12]) for i in range(0, len(words), 12)] or ["(empty)"]
+    return [[lines[(p * LINES_PER_PAGE + k) % len(lines)] for k in range(LINES_PER_PAGE)] for p in range(n_pages)]
+
+
+def legacy_extract(data):
+    """ui/dashboard.py's old extract_pdf."""
+    from pypdf import PdfReader
+
+    reader = PdfReader(BytesIO(data))
+    return "\n".join(p.extract_text() or "" for p in reader.pages)
+
+
+async def check_stuck_worker(short):
+    """A stuck file kills only its own worker; (ok, message)."""
+    from app.pdf import PdfExtractor, PdfTimeout
+
+    stuck = make_pdf([[f"lorem ipsum dolor sit amet {i}" for i in range(STUCK_LINES)]])
+    pdf = PdfExtractor(workers=2, cache_size=0)
+    pdf.start()
+    try:
+        await pdf.extract(short)  # workers have imported pypdf
+        pids = {w.process.pid for w in pdf._procs}
+        pdf.timeout = 0.1
+        stuck_task = asyncio.ensure_future(pdf.extract(stuck))
+        await asyncio.sleep(0.2)
+        pdf.timeout = 10
+        t0 = time.perf_counter()
+        other = await pdf.extract(short)
+        other_s = time.perf_counter() - t0
+        try:
+            await stuck_task
+            return False, "stuck file did not time out"
+        except PdfTimeout:
+            pass
+        for _ in range(100):  # the part's thread replaces the killed worker
+            if pdf.restarts:
+                break
+            await asyncio.sleep(0.05)
+        kept = pids & {w.process.pid for w in pdf._procs}
+        ok = other["text"] == legacy_extract(short) and len(kept) == 1 and pdf.restarts == 1
+        return ok, (f"stuck file: its worker killed and replaced, the other kept (restarts {pdf.restarts}); "
+                    f"a file extracted meanwhile took {other_s * 1000:.0f} ms")
+    finally:
+        pdf.shutdown()
+
+
+def main():
+    jobs = pd.read_csv(CSV_PATH).rename(columns=str.lower)
+    jobs.insert(0, "id", range(1, len(jobs) + 1))
+    jobs.to_sql("linkedin_jobs", create_engine(os.environ["DATABASE_URL"]), index=False)
+
+    from fastapi.testclient import TestClient
+    import app.api as api
+
+    ok = True
+    description = jobs["description"].dropna().iloc[3]
+    short = make_pdf(resume_pages(description, 3))
+    long = make_pdf(resume_pages(description, LONG_PAGES))
+    headers = {"Content-Type": "application/pdf"}
+
+    with TestClient(api.app, headers={"X-Admin-Token": ADMIN_TOKEN}) as client:
+        # 1. Same text as the front ends' pypdf code
+        res = client.post("/extract", content=short, headers=headers)
+        body = res.json()
+        if res.status_code != 200 or body["text"] != legacy_extract(short) or body["pages"] != 3:
+            ok = False
+            print(f"❌ /extract differs from in-process pypdf: {res.status_code} {str(body)[:200]}")
+        else:
+            print(f"✅ /extract: 3 pages, same text as in-process pypdf ({len(body['text'])} chars)")
+
+        # 2. Page limit on a long file
+        t0 = time.perf_counter()
+        legacy = legacy_extract(long)
+        legacy_s = time.perf_counter() - t0
+        t0 = time.perf_counter()
+        res = client.post("/extract", content=long, headers=headers)
+        api_s = time.perf_counter() - t0
+        body = res.json()
+        max_pages = api.pdf.max_pages
+        expected = legacy_extract(make_pdf(resume_pages(description, max_pages)))
+        if body.get("pages") != max_pages or not body.get("truncated") or body.get("total_pages") != LONG_PAGES \
+                or body["text"] != expected:
+            ok = False
+            print(f"❌ page limit not applied: {str(body)[:200]}")
+        else:
+            print(f"✅ {LONG_PAGES}-page PDF: first {max_pages} pages extracted in {api_s * 1000:.0f} ms "
+                  f"({api.pdf.workers} workers); all pages in-process took {legacy_s * 1000:.0f} ms "
+                  f"({len(legacy)} chars)")
+
+        # 3. Cache by file hash
+        t0 = time.perf_counter()
+        res = client.post("/extract", content=long, headers=headers)
+        cached_s = time.perf_counter() - t0
+        if not res.json().get("cached"):
+            ok = False
+            print("❌ repeated upload was extracted again")
+        else:
+            print(f"✅ repeated upload served from the cache in {cached_s * 1000:.1f} ms")
+
+        # 4. Limits and bad input
+        too_big = short + b"%" * api.pdf.max_bytes
+        cases = [
+            ("oversized", too_big, 413),
+            ("not a PDF", b"hello, this is not a pdf", 400),
+            ("empty body", b"", 400),
+            ("no text", make_pdf([[]]), 422),
+        ]
+        for name, data, status in cases:
+            res = client.post("/extract", content=data, headers=headers)
+            if res.status_code != status:
+                ok = False
+                print(f"❌ {name}: expected {status}, got {res.status_code} {res.text[:200]}")
+        timeout, api.pdf.timeout = api.pdf.timeout, 0.0
+        res = client.post("/extract", content=make_pdf(resume_pages(description, 4)), headers=headers)
+        api.pdf.timeout = timeout
+        if res.status_code != 504:
+            ok = False
+            print(f"❌ timeout: expected 504, got {res.status_code} {res.text[:200]}")
+        if ok:
+            print("✅ 413 oversized, 400 invalid/empty, 422 no text, 504 past the time limit")
+        stuck_ok, message = asyncio.run(check_stuck_worker(short))
+        ok = ok and stuck_ok
+        print(f"✅ {message}" if stuck_ok else f"❌ {message}")
+
+        # 5. /match/pdf == /match on the extracted text
+        text = client.post("/extract", content=short, headers=headers).json()["text"]
+        for domain in [None, "Software Web Developer"]:
+            params = {"top_k": 5, **({"domain": domain} if domain else {})}
+            via_pdf = client.post("/match/pdf", params=params, content=short, headers=headers).json()
+            pdf_meta = via_pdf.pop("pdf", None)
+            direct = client.post("/match", json={"cv_text": text, "top_k": 5, "domain": domain}).json()
+            if via_pdf != direct or not pdf_meta or pdf_meta["pages"] != 3:
+                ok = False
+                print(f"❌ /match/pdf differs from /match (domain={domain!r})")
+        if ok:
+            print("✅ /match/pdf returns the same ranking as /match on the extracted text")
+        print(f"ℹ️  {client.get('/admin/pdf').json()}")
+    return ok
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
@@ -0,0 +1,186 @@
+"""
+Check the normalized job skills and the database-side prefilter mode on an
+SQLite stand-in for PostgreSQL (no server needed).
+
+1. Upserts the scraped CSV into a fresh SQLite copy of sql/schema.sql and
+   checks that job_skills holds exactly the skills of every job, also after
+   a changed row is upserted again.
+2. Ranks job descriptions (stand-in CVs) in keyword mode over the whole
+   corpus and in prefilter mode, where only the jobs the database returns
+   are scored. With a domain both must return the same jobs and scores;
+   without one (BM25 over the prefiltered jobs only) the overlap is reported.
+3. Repeats the domain comparison with PREFILTER_LIMIT lowered so that the
+   database cuts most CVs' candidates: the rows it keeps must still hold
+   the best jobs, also for a page deeper than the limit. Without a domain
+   (PREFILTER_TEXT_LIMIT rows), the overlap with keyword mode is reported
+   for the cut and for a no-domain limit as low as the domain one.
+4. Serves the same CVs with CORPUS_MODE=database (nothing held in memory).
+
+    python scripts/check_prefilter.py
+"""
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import pandas as pd
+from sqlalchemy import create_engine, text
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT_DIR))
+sys.path.insert(0, str(ROOT_DIR / "scripts"))
+
+DB_PATH = Path(tempfile.mkdtemp()) / "jobs.db"
+os.environ["DB_URL"] = os.environ["DATABASE_URL"] = f"sqlite:///{DB_PATH}"
+os.environ.pop("CORPUS_MODE", None)
+
+import app.main as main
+from app.index import split_skills
+from app.main import JobRecommender
+from ingest_data import csv_chunks, upsert_jobs
+from check_ranking import DOMAINS
+
+NUM_CVS = 25
+TOP_K = 10
+# PREFILTER_LIMIT for step 3: well below most CVs' candidate counts
+CUT_LIMIT = 40
+
+# sql/schema.sql in SQLite's dialect
+SQLITE_SCHEMA = [
+    """CREATE TABLE linkedin_jobs (
+        id INTEGER PRIMARY KEY AUTOINCREMENT, title TEXT, company TEXT, location TEXT, url TEXT UNIQUE,
+        description TEXT, skills_required TEXT, loaded_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP)""",
+    "CREATE TABLE skills (id INTEGER PRIMARY KEY AUTOINCREMENT, name TEXT UNIQUE NOT NULL)",
+    """CREATE TABLE job_skills (
+        job_id INTEGER NOT NULL REFERENCES linkedin_jobs(id) ON DELETE CASCADE,
+        skill_id INTEGER NOT NULL REFERENCES skills(id), PRIMARY KEY (job_id, skill_id))""",
+    "CREATE INDEX job_skills_skill_idx ON job_skills (skill_id, job_id)",
+]
+
+
+def links_match(engine) -> bool:
+    """job_skills (joined to skill names) == split_skills(skills_required), for every job."""
+    with engine.connect() as conn:
+        jobs = conn.execute(text("SELECT id, skills_required FROM linkedin_jobs")).all()
+        links = conn.execute(text("SELECT js.job_id, s.name FROM job_skills js JOIN skills s ON s.id = js.skill_id")).all()
+    expected = {(job_id, s) for job_id, value in jobs for s in split_skills(value)}
+    return expected == set(links)
+
+
+def results(result):
+    return [(j["job_id"], round(j["fit_score"], 9), j["overlap_skills"], j["gap_skills"]) for j in result["top_jobs"]]
+
+
+def main_check():
+    ok = True
+    engine = create_engine(os.environ["DB_URL"])
+    with engine.begin() as conn:
+        for ddl in SQLITE_SCHEMA:
+            conn.execute(text(ddl))
+
+    # 1. Ingest + job_skills sync
+    counts = upsert_jobs(engine, csv_chunks())
+    print(f"📥 {counts['inserted']} jobs, {counts['skill_links']} job skills")
+    if not links_match(engine):
+        ok = False
+        print("❌ job_skills differs from skills_required after the first ingest")
+
+    jobs = pd.read_sql("SELECT * FROM linkedin_jobs", engine)
+    changed = jobs.iloc[[0]].rename(columns=str.upper).copy()
+    changed["SKILLS_REQUIRED"] = "fortran;cobol"
+    counts = upsert_jobs(engine, [changed])
+    if counts["updated"] != 1 or counts["skill_links"] != 2 or not links_match(engine):
+        ok = False
+        print(f"❌ job_skills not rewritten for an updated job: {counts}")
+    upsert_jobs(engine, [jobs.iloc[[0]].drop(columns=["id", "loaded_at"]).rename(columns=str.upper)])  # restore
+    if ok:
+        print("✅ job_skills matches skills_required (also after an update)")
+
+    # 2. Keyword mode over the whole corpus vs prefilter mode
+    jobs = pd.read_sql("SELECT * FROM linkedin_jobs", engine)
+    reco = JobRecommender(jobs)
+    reco.ranking_cache.clear()
+    cvs = jobs["description"].dropna().sample(NUM_CVS, random_state=7).tolist()
+    timings = {"keyword": 0.0, "prefilter": 0.0}
+    general_overlap = []
+    same = True
+    for domain in DOMAINS:
+        for cv in cvs:
+            out = {}
+            for mode in timings:
+                t0 = time.perf_counter()
+                out[mode] = results(reco.compute(cv, top_k=TOP_K, domain=domain, mode=mode))
+                timings[mode] += time.perf_counter() - t0
+            if domain is None:
+                kw, pf = {r[0] for r in out["keyword"]}, {r[0] for r in out["prefilter"]}
+                general_overlap.append(len(kw & pf) / max(len(kw), 1))
+            elif out["keyword"] != out["prefilter"]:
+                ok = same = False
+                print(f"❌ prefilter differs from keyword mode for domain {domain!r}:\n"
+                      f"   keyword:   {out['keyword'][:3]}\n   prefilter: {out['prefilter'][:3]}")
+    n = len(DOMAINS) * len(cvs)
+    if same:
+        print(f"✅ {len(DOMAINS) - 1} domains x {len(cvs)} CVs: prefilter == keyword mode")
+    print(f"ℹ️  general mode (local BM25): {sum(general_overlap) / len(general_overlap):.0%} of keyword top-{TOP_K} shared")
+    print(f"⏱️  keyword {timings['keyword'] / n * 1000:.1f} ms/CV, prefilter {timings['prefilter'] / n * 1000:.1f} ms/CV "
+          f"(database round trips included)")
+
+    # 3. A limit that cuts: the database must keep the best-scoring rows
+    limit, text_limit_default = main.PREFILTER_LIMIT, main.PREFILTER_TEXT_LIMIT
+    main.PREFILTER_LIMIT = CUT_LIMIT
+    cut, same = 0, True
+    for domain in DOMAINS[1:]:
+        for cv in cvs:
+            candidates = reco.prefilter(cv, reco.profile(cv, "check:" + cv)[1], domain)[0].size
+            cut += candidates >= CUT_LIMIT
+            for top_k in (TOP_K, CUT_LIMIT + 20):
+                kw = results(reco.compute(cv, top_k=top_k, domain=domain))
+                pf = results(reco.compute(cv, top_k=top_k, domain=domain, mode="prefilter"))
+                if kw != pf:
+                    ok = same = False
+                    print(f"❌ PREFILTER_LIMIT={CUT_LIMIT}: prefilter differs from keyword mode for domain {domain!r}, "
+                          f"top_k={top_k}:\n   keyword:   {kw[:3]}\n   prefilter: {pf[:3]}")
+    general = {}
+    for text_limit in (CUT_LIMIT, CUT_LIMIT * 4):
+        main.PREFILTER_TEXT_LIMIT = text_limit
+        shared = []
+        for cv in cvs:
+            kw = {r[0] for r in results(reco.compute(cv, top_k=TOP_K))}
+            pf = {r[0] for r in results(reco.compute(cv, top_k=TOP_K, mode="prefilter"))}
+            shared.append(len(kw & pf) / max(len(kw), 1))
+        general[text_limit] = sum(shared) / len(shared)
+    main.PREFILTER_LIMIT, main.PREFILTER_TEXT_LIMIT = limit, text_limit_default
+    print(f"ℹ️  general mode cut at {CUT_LIMIT * 4} rows: {general[CUT_LIMIT * 4]:.0%} of keyword top-{TOP_K} shared "
+          f"({general[CUT_LIMIT]:.0%} at {CUT_LIMIT})")
+    n = (len(DOMAINS) - 1) * len(cvs)
+    if cut < n // 2:
+        ok = False
+        print(f"❌ PREFILTER_LIMIT={CUT_LIMIT} only cut {cut} of {n} candidate sets")
+    elif same:
+        print(f"✅ PREFILTER_LIMIT={CUT_LIMIT} cut {cut} of {n} candidate sets: still == keyword mode "
+              f"(top {TOP_K} and top {CUT_LIMIT + 20})")
+
+    # 4. Nothing in memory: every request goes through the database
+    main.CORPUS_MODE = "database"
+    db_reco = JobRecommender()
+    for domain in DOMAINS:
+        for cv in cvs[:5]:
+            if results(db_reco.compute(cv, top_k=TOP_K, domain=domain)) != results(
+                    reco.compute(cv, top_k=TOP_K, domain=domain, mode="prefilter")):
+                ok = False
+                print(f"❌ CORPUS_MODE=database differs from prefilter mode for domain {domain!r}")
+    job_id = int(jobs["id"].iloc[0])
+    if db_reco.job_details(job_id)["skills_required"] != reco.job_details(job_id)["skills_required"]:
+        ok = False
+        print("❌ CORPUS_MODE=database job details differ")
+    if db_reco.index.size != 0:
+        ok = False
+        print("❌ CORPUS_MODE=database loaded jobs into memory")
+    if ok:
+        print("✅ CORPUS_MODE=database serves the same results without loading the corpus")
+    return ok
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main_check() else 1)
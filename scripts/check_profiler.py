@@ -0,0 +1,183 @@
+"""
+Check the request profiler (app/profiler.py) through the API.
+
+1. Off by default: no request is watched and nothing is written. The
+   /admin endpoints need ADMIN_TOKEN, or a loopback client when unset.
+2. POST /admin/profiler?rate=1 profiles every /match: each capture is a
+   collapsed-stack file rooted at JobRecommender.page plus a JSON
+   sidecar without the CV text; GET /admin/profiles lists them,
+   /admin/profiles/{name} downloads one, /admin/profiles/merged sums them.
+3. With only slow_ms set, fast requests leave nothing and a slow one is
+   captured from the threshold on.
+4. Only PROFILE_KEEP captures are kept.
+5. Cost: scoring the same CVs unprofiled, with every request watched for
+   slowness, and with every request sampled; the cost at rate 0.01 follows.
+   The scoring pool path (MATCH_WORKERS) returns its worker's samples.
+
+Uses the same throwaway SQLite copy of the scraped CSV as
+check_pdf_extract.py (no server needed).
+
+    python scripts/check_profiler.py
+"""
+import asyncio
+import os
+import statistics
+import sys
+import time
+from pathlib import Path
+
+import pandas as pd
+from sqlalchemy import create_engine
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+from check_pdf_extract import ADMIN_TOKEN, CSV_PATH, TMP_DIR  # also points the app at a temp database
+
+os.environ["PROFILE_DIR"] = str(TMP_DIR / "profiles")
+os.environ.pop("PROFILE_SAMPLE_RATE", None)
+os.environ.pop("PROFILE_SLOW_MS", None)
+ROUNDS = 3
+
+
+def main():
+    jobs = pd.read_csv(CSV_PATH).rename(columns=str.lower)
+    jobs.insert(0, "id", range(1, len(jobs) + 1))
+    jobs.to_sql("linkedin_jobs", create_engine(os.environ["DATABASE_URL"]), index=False)
+
+    from fastapi.testclient import TestClient
+    import app.api as api
+    from app.cache import LRUCache
+    from app.profiler import profiled
+    from app.workers import ScoringPool
+
+    ok = True
+
+    def check(cond, good, bad):
+        nonlocal ok
+        print(f"✅ {good}" if cond else f"❌ {bad}")
+        ok = ok and cond
+
+    descriptions = jobs["description"].dropna().tolist()
+    profiler = api.profiler
+
+    def wait_for(count):
+        # captures are written off the response path
+        for _ in range(200):
+            if profiler.status()["stored"] >= count:
+                return
+            time.sleep(0.01)
+
+    with TestClient(api.app, headers={"X-Admin-Token": ADMIN_TOKEN}) as client:
+        # 1. Off by default
+        for text in descriptions[:5]:
+            client.post("/match", json={"cv_text": text})
+        check(profiler.watch() is None and client.get("/admin/profiles").json()["stored"] == 0,
+              "off by default: nothing watched, nothing written", "profiles written while disabled")
+        wrong = client.get("/admin/profiles", headers={"X-Admin-Token": ADMIN_TOKEN + "x"}).status_code
+        api.ADMIN_TOKEN = None
+        remote = TestClient(api.app).get("/admin/profiles").status_code
+        local = TestClient(api.app, client=("127.0.0.1", 50000)).get("/admin/profiles").status_code
+        api.ADMIN_TOKEN = ADMIN_TOKEN
+        check((wrong, remote, local) == (403, 403, 200),
+              "/admin: wrong token 403; without ADMIN_TOKEN, remote client 403, loopback 200",
+              f"/admin access: wrong token {wrong}, no token remote {remote}, loopback {local}")
+
+        # 2. Every request sampled
+        status = client.post("/admin/profiler", params={"rate": 1}).json()
+        sent = [(descriptions[i] * 3, "Software Web Developer" if i % 2 else None) for i in range(10, 20)]
+        for text, domain in sent:
+            client.post("/match", json={"cv_text": text, "domain": domain})
+        wait_for(len(sent))
+        listing = client.get("/admin/profiles").json()
+        profiles = listing["profiles"]
+        first = profiles[0]
+        folded = client.get(f"/admin/profiles/{first['name']}").text
+        stacks = [line.rpartition(" ") for line in folded.splitlines()]
+        leaked = any(text[:200] in str(p) for text, _ in sent for p in profiles)
+        check(status["sample_rate"] == 1 and len(profiles) == len(sent)
+              and all(p["reason"] == "sampled" and p["cv_sha256"] for p in profiles) and not leaked,
+              f"rate=1: {len(profiles)} captures, metadata e.g. "
+              f"{ {k: first[k] for k in ('reason', 'elapsed_ms', 'samples', 'domain', 'stages_ms')} }",
+              f"captures: {len(profiles)} of {len(sent)}, leaked CV text: {leaked}")
+        merged = [line.rpartition(" ") for line in client.get("/admin/profiles/merged").text.splitlines()]
+        merged_samples = sum(int(c) for _, _, c in merged)
+        total_samples = sum(p["samples"] for p in profiles)
+        check(all(s.startswith("page (app/main.py:") and c.isdigit() for s, _, c in stacks + merged)
+              and total_samples > 0,
+              f"collapsed stacks rooted at page ({total_samples} samples in all; a request of a few ms "
+              f"gets 0-1), hottest leaf {max(merged, key=lambda s: int(s[2]))[0].split(';')[-1] if merged else '-'}",
+              f"bad collapsed stacks: {[s for s, _, c in stacks + merged if not s.startswith('page (app/main.py:') or not c.isdigit()]} total {total_samples}")
+        missing = [client.get(f"/admin/profiles/{name}").status_code for name in ("nope", "..%2F..%2Fetc%2Fpasswd")]
+        check(merged_samples == total_samples and missing == [404, 404],
+              f"merged flame graph of {merged_samples} samples; unknown names are 404",
+              f"merged {merged_samples} vs {total_samples} samples, unknown names answered {missing}")
+
+        # 3. Slow requests only
+        client.post("/admin/profiler", params={"rate": 0, "slow_ms": 100})
+        before = profiler.status()["stored"]
+        for text in descriptions[:20]:
+            client.post("/match", json={"cv_text": text})  # cached: well under 100 ms
+        fast_captured = profiler.status()["stored"] - before
+        slow_text = " ".join(descriptions[:400])
+        t0 = time.perf_counter()
+        client.post("/match", json={"cv_text": slow_text})
+        slow_ms = (time.perf_counter() - t0) * 1000
+        wait_for(before + 1)
+        newest = client.get("/admin/profiles", params={"limit": 1}).json()["profiles"][0]
+        check(fast_captured == 0 and newest["reason"] == "slow" and newest["samples"] > 0,
+              f"slow_ms=100: 20 fast requests left nothing; a {slow_ms:.0f} ms one was captured "
+              f"({newest['samples']} samples past the threshold)",
+              f"fast captured {fast_captured}, newest {newest}")
+
+        # 4. Rotation
+        profiler.keep = 5
+        client.post("/admin/profiler", params={"rate": 1, "slow_ms": 0})
+        for i in range(8):
+            client.post("/match", json={"cv_text": f"{descriptions[30 + i]} rotation"})
+        wait_for(5)
+        time.sleep(0.2)
+        stored = len(os.listdir(profiler.directory))
+        check(profiler.status()["stored"] == 5 and stored == 10, "rotation keeps the newest 5 captures",
+              f"{profiler.status()['stored']} captures, {stored} files on disk")
+        client.post("/admin/profiler", params={"rate": 0})
+
+    # 5. Cost, on the scoring itself (caches off so every call does the full work)
+    reco = api.reco
+    reco.profile_cache = LRUCache(max_entries=0)
+    reco.ranking_cache = LRUCache(max_entries=0)
+    cvs = descriptions[100:160]
+    modes = {"off": None, "watched": (False, 60.0), "sampled": (True, None)}
+    times = {m: [] for m in modes}
+    for _ in range(ROUNDS):
+        for text in cvs:
+            for mode, watch in modes.items():
+                t0 = time.perf_counter()
+                profiled(watch, reco.page, text, top_k=5)
+                times[mode].append(time.perf_counter() - t0)
+    off = sum(times["off"])
+    watched = sum(times["watched"]) / off - 1
+    sampled = sum(times["sampled"]) / off - 1
+    median_ms = statistics.median(times["off"]) * 1000
+    # With slow_ms off, unsampled requests are not registered at all
+    check(0.01 * sampled < 0.01,
+          f"cost on {len(cvs) * ROUNDS} requests (median {median_ms:.1f} ms): sampling every request "
+          f"{sampled:+.1%}, watching every request for slowness {watched:+.1%}; at rate 0.01 ≈ "
+          f"{0.01 * sampled:+.2%}",
+          f"sampling costs {sampled:+.1%} per sampled request")
+
+    async def pooled():
+        pool = ScoringPool(reco, workers=1)
+        await asyncio.get_running_loop().run_in_executor(None, pool.start)
+        try:
+            return await pool.run((True, None), cv_text=" ".join(descriptions[:50]), top_k=3)
+        finally:
+            pool.shutdown()
+
+    result, stages, capture = asyncio.run(pooled())
+    check(capture is not None and capture["samples"] > 0 and len(result["top_jobs"]) == 3,
+          f"scoring pool: the worker returned {capture['samples'] if capture else 0} samples with the result",
+          f"scoring pool returned capture {capture}")
+    return ok
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
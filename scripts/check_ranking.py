@@ -0,0 +1,167 @@
+"""
+Parity check: JobRecommender.compute (inverted-index candidates + heap
+top-k) must rank exactly like the original exhaustive loop
+(`compute_match_score` on every row, then sort).
+
+General mode scores jobs by BM25; the index's precomputed impacts are also
+checked against a naive per-document BM25 computed here from scratch.
+compute_batch must return exactly what compute does; both are timed with
+the caches off, also on the corpus repeated to ~46k jobs.
+
+Builds the recommender from the scraped CSV (no database needed), uses job
+descriptions as stand-in CVs, and checks every dashboard domain.
+
+    python scripts/check_ranking.py
+"""
+import math
+import sys
+import time
+from collections import Counter
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT_DIR))
+from app.cache import LRUCache
+from app.index import BM25_B, BM25_K1, TITLE_WEIGHT, clean_text, tokenize
+from app.main import JobRecommender
+
+CSV_PATH = ROOT_DIR / "data" / "linkedin_jobs_india.csv"
+NUM_CVS = 25
+TOP_KS = [5, 50]
+# Batch throughput is timed on the corpus repeated this many times (917 -> 45,850 jobs)
+THROUGHPUT_COPIES = 50
+THROUGHPUT_CVS = 200
+
+# Same values as domain_map in ui/dashboard.py
+DOMAINS = [
+    None,
+    "Software Web Developer",
+    "Data Scientist Analyst AI",
+    "Engineer Electrical Mechanical Civil",
+    "Manager Business Analyst HR",
+    "Finance Accountant",
+    "Designer Graphic UI",
+    "Food Technologist Bio Science",
+]
+
+
+def naive_bm25(jobs, cv_text):
+    """Textbook BM25 of every job against the CV's distinct terms, max-normalized."""
+    docs = []
+    for _, row in jobs.iterrows():
+        tf = Counter(tokenize(clean_text(row.get("description", ""))))
+        for tok in tokenize(clean_text(row.get("title", "")).lower()):
+            tf[tok] += TITLE_WEIGHT
+        docs.append(tf)
+    n = len(docs)
+    avgdl = sum(sum(d.values()) for d in docs) / n
+    scores = []
+    for d in docs:
+        dl = sum(d.values())
+        score = 0.0
+        for term in set(tokenize(cv_text)):
+            if d.get(term):
+                df = sum(1 for other in docs if term in other)
+                idf = math.log(1 + (n - df + 0.5) / (df + 0.5))
+                score += idf * d[term] * (BM25_K1 + 1) / (d[term] + BM25_K1 * (1 - BM25_B + BM25_B * dl / avgdl))
+        scores.append(score)
+    top = max(scores)
+    return np.array([s / top if top > 0 else 0.0 for s in scores])
+
+
+def exhaustive_top_jobs(reco, cv_text, top_k, domain):
+    """The original JobRecommender.compute ranking loop."""
+    candidate_skills = reco.extract_skills(cv_text)
+    text_scores = reco.index.text_score_matrix([cv_text])[0]
+    results = []
+    for pos, (_, row) in enumerate(reco.jobs.frame.iterrows()):
+        score, overlap, gap = reco.compute_match_score(cv_text, candidate_skills, row, domain, text_scores[pos])
+        if score > 0.01:
+            results.append((pos, score, overlap, gap))
+    return sorted(results, key=lambda x: x[1], reverse=True)[:top_k]
+
+
+def main():
+    jobs = pd.read_csv(CSV_PATH)
+    reco = JobRecommender(jobs=jobs)
+    cvs = [str(d) for d in jobs["Description"].dropna().sample(NUM_CVS, random_state=7)]
+
+    # The index's BM25 (float32 impacts) must agree with the textbook formula.
+    # The store drops descriptions, so use the CSV (no id column: same order)
+    raw = jobs.rename(columns=str.lower)
+    for cv_text in cvs[:3]:
+        diff = np.abs(reco.index.text_score_matrix([cv_text])[0] - naive_bm25(raw, cv_text)).max()
+        if diff > 1e-6:
+            print(f"❌ BM25 MISMATCH (max abs diff {diff:.2e}, cv={cv_text[:60]!r})")
+            sys.exit(1)
+    print("✅ BM25 scores match the naive formula.")
+
+    t_ref = t_new = 0.0
+    checked = 0
+    for cv_text in cvs:
+        for domain, top_k in [(d, k) for d in DOMAINS for k in TOP_KS + [len(jobs)]]:
+            t0 = time.perf_counter()
+            expected = exhaustive_top_jobs(reco, cv_text, top_k, domain)
+            t1 = time.perf_counter()
+            actual = reco.compute(cv_text, top_k=top_k, domain=domain)["top_jobs"]
+            t_new += time.perf_counter() - t1
+            t_ref += t1 - t0
+
+            exp = [(reco.index.urls[p], s, o, g) for p, s, o, g in expected]
+            got = [(j["url"], j["fit_score"], j["overlap_skills"], j["gap_skills"]) for j in actual]
+            if exp != got:
+                print(f"❌ MISMATCH (domain={domain!r}, top_k={top_k}, cv={cv_text[:60]!r})")
+                for i, (e, g) in enumerate(zip(exp, got)):
+                    if e != g:
+                        print(f"   rank {i}: expected {e}\n           got      {g}")
+                        break
+                print(f"   lengths: expected {len(exp)}, got {len(got)}")
+                sys.exit(1)
+            checked += 1
+
+    print(f"✅ {checked} rankings identical to the exhaustive loop.")
+    print(f"   exhaustive: {t_ref:.2f}s   compute: {t_new:.2f}s   speedup: {t_ref / max(t_new, 1e-9):.1f}x")
+
+    # compute_batch must return exactly what compute returns for each CV. Both
+    # are timed cold: the loop above has filled the profile and ranking caches
+    reco.profile_cache = LRUCache(max_entries=0)
+    reco.ranking_cache = LRUCache(max_entries=0)
+    batch = [{"cv_text": cv, "top_k": k, "domain": d} for cv in cvs for d in DOMAINS for k in TOP_KS]
+    t0 = time.perf_counter()
+    singles = [reco.compute(b["cv_text"], top_k=b["top_k"], domain=b["domain"]) for b in batch]
+    t1 = time.perf_counter()
+    batched = list(reco.compute_batch(batch))
+    t2 = time.perf_counter()
+    for b, single, result in zip(batch, singles, batched):
+        if single != result:
+            print(f"❌ BATCH MISMATCH (domain={b['domain']!r}, top_k={b['top_k']})")
+            sys.exit(1)
+    print(f"✅ {len(batch)} batch results identical to compute().")
+    print(f"   {len(batch)} CVs x {reco.index.size} jobs, uncached: compute loop {t1 - t0:.2f}s   "
+          f"compute_batch {t2 - t1:.2f}s   speedup: {(t1 - t0) / max(t2 - t1, 1e-9):.1f}x")
+
+    # Throughput at a campus-run scale: the corpus repeated THROUGHPUT_COPIES times
+    big = pd.concat([jobs.assign(URL=jobs["URL"] + f"?copy={i}") for i in range(THROUGHPUT_COPIES)],
+                    ignore_index=True)
+    big.insert(0, "id", range(1, len(big) + 1))
+    reco = JobRecommender(jobs=big)
+    reco.profile_cache = LRUCache(max_entries=0)
+    reco.ranking_cache = LRUCache(max_entries=0)
+    pool = [str(d) for d in jobs["Description"].dropna()]
+    batch = [{"cv_text": pool[i % len(pool)], "top_k": 5, "domain": DOMAINS[i % len(DOMAINS)]}
+             for i in range(THROUGHPUT_CVS)]
+    t0 = time.perf_counter()
+    for b in batch:
+        reco.compute(b["cv_text"], top_k=b["top_k"], domain=b["domain"])
+    t1 = time.perf_counter()
+    list(reco.compute_batch(batch))
+    t2 = time.perf_counter()
+    print(f"   {len(batch)} CVs x {reco.index.size} jobs, uncached: compute loop {t1 - t0:.2f}s   "
+          f"compute_batch {t2 - t1:.2f}s   speedup: {(t1 - t0) / max(t2 - t1, 1e-9):.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""
+Check that an API started from the index snapshot refreshes incrementally,
+on an SQLite stand-in for PostgreSQL (no server needed).
+
+1. The snapshot written at ingest carries its job store and watermark.
+2. A refresh with nothing new reads only the rows past the watermark (no
+   full table load) and keeps the store on disk.
+3. After an ingest that changes one job and adds another, the refresh
+   merges them into the snapshot's store, still without a full load, and
+   serves exactly what a fresh load of the table would.
+
+    python scripts/check_refresh.py
+"""
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import pandas as pd
+from sqlalchemy import create_engine, text
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT_DIR / "scripts"))
+os.environ["INDEX_SNAPSHOT_DIR"] = str(Path(tempfile.mkdtemp()) / "snapshot")
+from check_prefilter import SQLITE_SCHEMA  # also points the app at a temp SQLite database
+
+import app.main as main
+from app.db import load_jobs_df
+from app.index import INDEX_SNAPSHOT_DIR
+from app.main import JobRecommender, build_index_snapshot
+from ingest_data import csv_chunks, upsert_jobs
+
+NUM_CVS = 10
+
+
+def main_check():
+    ok = True
+
+    def check(cond, good, bad):
+        nonlocal ok
+        print(f"✅ {good}" if cond else f"❌ {bad}")
+        ok = ok and cond
+
+    engine = create_engine(os.environ["DB_URL"])
+    with engine.begin() as conn:
+        for ddl in SQLITE_SCHEMA:
+            conn.execute(text(ddl))
+    upsert_jobs(engine, csv_chunks())
+    jobs = load_jobs_df()
+    meta = build_index_snapshot(jobs, INDEX_SNAPSHOT_DIR)
+    check(meta["store"] and meta["watermark"] is not None,
+          f"snapshot of {meta['size']} jobs saved with its store, watermark {meta['watermark']}",
+          f"snapshot meta without store or watermark: {meta}")
+
+    # Count full table loads from here on
+    full_loads = []
+    load_job_store = main.load_job_store
+    main.load_job_store = lambda: full_loads.append(1) or load_job_store()
+
+    reco = JobRecommender()
+    t0 = time.perf_counter()
+    changed = reco.refresh()
+    idle_ms = (time.perf_counter() - t0) * 1000
+    check(reco.index_source == "snapshot" and not changed and not full_loads and reco.jobs is None,
+          f"nothing new: refresh took {idle_ms:.1f} ms, no full load, store left on disk",
+          f"idle refresh: source {reco.index_source}, changed {changed}, full loads {len(full_loads)}, "
+          f"store loaded {reco.jobs is not None}")
+
+    time.sleep(1.1)  # CURRENT_TIMESTAMP has whole seconds on SQLite
+    edited = jobs.iloc[[3]].drop(columns=["id", "loaded_at"]).rename(columns=str.upper)
+    edited["SKILLS_REQUIRED"] = "python;sql;fortran"
+    added = edited.assign(URL=edited["URL"] + "?new=1", TITLE="Fortran Developer")
+    upsert_jobs(engine, [pd.concat([edited, added])])
+    t0 = time.perf_counter()
+    changed = reco.refresh()
+    merge_ms = (time.perf_counter() - t0) * 1000
+
+    main.load_job_store = load_job_store
+    fresh = JobRecommender(load_jobs_df())
+    cvs = jobs["description"].dropna().sample(NUM_CVS, random_state=5).tolist() + ["fortran python sql developer"]
+    same = all(reco.compute(cv, top_k=10) == fresh.compute(cv, top_k=10) for cv in cvs)
+    check(changed and not full_loads and reco.index.size == len(jobs) + 1
+          and reco.index.version == fresh.index.version and same,
+          f"1 changed + 1 new job merged into the snapshot's store in {merge_ms:.0f} ms, no full load; "
+          f"same corpus version and rankings as a fresh load",
+          f"merge: changed {changed}, full loads {len(full_loads)}, size {reco.index.size}, "
+          f"version {reco.index.version} vs fresh {fresh.index.version}, same rankings {same}")
+    return ok
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main_check() else 1)
@@ -0,0 +1,211 @@
+"""
+Offline check of the concurrent scraper against scripts/stub_linkedin_server.py:
+
+1. the concurrent crawl returns exactly the rows of the sequential one
+   (in completion order, not crawl order);
+2. a client rate within the server's limit never draws a 429, and one
+   above it recovers through Retry-After (clamped to SCRAPER_MAX_DELAY);
+3. injected 503s are retried away without losing rows;
+4. a run killed mid-way resumes from its checkpoint, without duplicates,
+   and Ctrl-C stops a concurrent crawl without draining its queue;
+5. throughput of both modes.
+
+    python scripts/check_scraper.py
+"""
+import argparse
+import json
+import os
+import signal
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+from urllib.parse import urlsplit
+
+import pandas as pd
+import requests
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT_DIR))
+from scripts import linkedin_scraper as scraper
+from scripts.scrape_http import PoliteSession
+from scripts.scrape_store import ScrapeStore, job_key
+from scripts.stub_linkedin_server import SEARCH_PATH, make_server
+
+ROLES = ["Data Scientist", "Civil Engineer", "Accountant", "Graphic Designer"]
+
+
+def serve(**options):
+    server = make_server(**options)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}{SEARCH_PATH}"
+
+
+def crawl(sequential=False, roles=ROLES, pages=1, **options):
+    """(rows, seconds, server stats) for one crawl against a fresh stub."""
+    client = {k: options.pop(k) for k in ("workers", "rate", "burst") if k in options}
+    server, base_url = serve(**options)
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            store = ScrapeStore(Path(tmp))
+            store.start_run(roles, pages)
+            t0 = time.perf_counter()
+            if sequential:
+                scraper.scrape_sequential(roles, store, base_url)
+            else:
+                scraper.scrape_concurrent(roles, store, base_url=base_url, **client)
+            elapsed = time.perf_counter() - t0
+            store.finish()
+            return store.rows(), elapsed, dict(server.state.stats)
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def check_resume(check, cards=10, roles=4):
+    """Kill the CLI after a couple of checkpoints, tear the segment's last line, rerun."""
+    server, base_url = serve(cards_per_page=cards, latency=0.05)
+    with tempfile.TemporaryDirectory() as tmp:
+        out, scrape_dir = Path(tmp) / "jobs.csv", Path(tmp) / "scraped"
+        cmd = [sys.executable, str(ROOT_DIR / "scripts" / "linkedin_scraper.py"), "--roles", str(roles),
+               "--workers", "4", "--rate", "10", "--burst", "2", "--output", str(out), "--scrape-dir", str(scrape_dir)]
+        env = {**os.environ, "LINKEDIN_BASE_URL": base_url}
+        state_path = scrape_dir / "state.json"
+
+        proc = subprocess.Popen(cmd, env=env, stdout=subprocess.DEVNULL)
+        while proc.poll() is None:
+            if state_path.exists():
+                run = json.loads(state_path.read_text())["current"] or {}
+                if sum(map(len, run.get("pages_done", {}).values())) >= 2:
+                    proc.kill()
+                    break
+            time.sleep(0.02)
+        proc.wait()
+        run = json.loads(state_path.read_text())["current"]
+        check(run is not None and not out.exists(), "killed mid-run: checkpoint kept, CSV not written yet")
+        if run is None:
+            return
+        with open(scrape_dir / "segments" / f"{run['run_id']}.jsonl", "a", encoding="utf-8") as f:
+            f.write('{"Title": "half a li')  # a write torn by the crash
+
+        before = server.state.stats["requests"]
+        subprocess.run(cmd, env=env, stdout=subprocess.DEVNULL, check=True)
+        resumed = server.state.stats["requests"] - before
+        keys = [job_key(u) for u in pd.read_csv(out)["URL"]]
+        expected = {str(server.state.job_id(role, 0, slot)) for role in run["roles"] for slot in range(cards)}
+        check(len(keys) == len(set(keys)) and set(keys) == expected,
+              f"resumed run: {len(keys)} unique jobs, the same as an uninterrupted run")
+        total = roles * (cards + 1)
+        check(resumed < total, f"resume re-fetched {resumed} of {total} requests")
+    server.shutdown()
+    server.server_close()
+
+
+def check_retry_after(check):
+    """Retry-After is honoured up to max_delay, like the backoff; garbage falls back to the backoff."""
+    http = PoliteSession(backoff=1.0, max_delay=5.0)
+    res = requests.Response()
+    delays = {}
+    for value in ("2", "86400", "-3", "soon"):
+        res.headers["Retry-After"] = value
+        delays[value] = http._retry_delay(res, attempt=6)
+    http.close()
+    check(delays == {"2": 2.0, "86400": 5.0, "-3": 0.0, "soon": 5.0},
+          f"Retry-After clamped to max_delay=5s: {delays}")
+
+
+def check_interrupt(check, cards=25, roles=4):
+    """SIGINT a concurrent crawl once a page is written: it returns promptly, with its checkpoints intact."""
+    server, base_url = serve(cards_per_page=cards, latency=0.1)
+    with tempfile.TemporaryDirectory() as tmp:
+        store = ScrapeStore(Path(tmp))
+        store.start_run(ROLES[:roles], 1)
+        add = store.add
+        sent = []
+
+        def add_then_interrupt(row):
+            written = add(row)
+            if len(store.seen) == cards + 5:
+                sent.append(time.perf_counter())
+                os.kill(os.getpid(), signal.SIGINT)
+            return written
+
+        store.add = add_then_interrupt
+        try:
+            scraper.scrape_concurrent(ROLES[:roles], store, workers=4, rate=20, burst=4, base_url=base_url)
+            interrupted = False
+        except KeyboardInterrupt:
+            interrupted = True
+        stopped = time.perf_counter() - sent[0] if sent else float("inf")
+        store.close()
+        rows = store.rows()
+        done = {role: pages for role, pages in store.run["pages_done"].items() if pages}
+        complete = all(
+            {str(server.state.job_id(role, 0, slot)) for slot in range(cards)} <= {job_key(r["URL"]) for r in rows}
+            for role in done
+        )
+        total = roles * (cards + 1) / 20  # seconds for the whole crawl at 20 req/s
+    server.shutdown()
+    server.server_close()
+    check(interrupted and stopped < 1 and done and complete,
+          f"Ctrl-C after {len(rows)} jobs: stopped {stopped:.2f}s later (whole crawl ~{total:.1f}s), "
+          f"{len(done)} checkpointed page(s) complete on disk")
+
+
+def same_rows(a, b) -> bool:
+    """Equal up to the stub's port in the job URLs and the order they were written in."""
+    strip = lambda rows: sorted(json.dumps({**r, "URL": urlsplit(r["URL"]).path}, sort_keys=True) for r in rows)
+    return strip(a) == strip(b)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline check of the concurrent scraper.")
+    parser.add_argument("--cards", type=int, default=3, help="cards per search page (the sequential crawl sleeps ~1.3s per card)")
+    args = parser.parse_args()
+    failures = 0
+
+    def check(ok, label):
+        nonlocal failures
+        failures += not ok
+        print(f"{'✅' if ok else '❌'} {label}")
+
+    # 1. Sequential vs concurrent
+    print(f"🐢 Sequential crawl: {len(ROLES)} roles x {args.cards} cards ...")
+    baseline, seq_time, _ = crawl(sequential=True, cards_per_page=args.cards, latency=0.02)
+    conc, conc_time, _ = crawl(cards_per_page=args.cards, latency=0.02, workers=8, rate=50, burst=10)
+    check(len(baseline) == len(ROLES) * args.cards and all(r["Description"] for r in baseline),
+          f"sequential crawl got {len(baseline)} rows with descriptions")
+    check(same_rows(baseline, conc), "concurrent crawl returns the same rows")
+
+    # 2. Politeness: bucket (rate + burst per second) within the server's 10 req/s
+    rows, _, stats = crawl(cards_per_page=10, max_rps=10, workers=8, rate=5, burst=3)
+    check(stats.get("status_429", 0) == 0 and len(rows) == len(ROLES) * 10,
+          f"within the limit: {stats.get('status_429', 0)} x 429, peak {stats.get('peak_rps')} req/s")
+    rows, _, stats = crawl(cards_per_page=10, max_rps=10, workers=8, rate=100, burst=20)
+    check(stats.get("status_429", 0) > 0 and len(rows) == len(ROLES) * 10 and all(r["Description"] for r in rows),
+          f"over the limit: {stats['status_429']} x 429, all {len(rows)} rows recovered via Retry-After")
+    check_retry_after(check)
+
+    # 3. Injected server errors
+    rows, _, stats = crawl(cards_per_page=args.cards, error_rate=0.2, seed=7, workers=8, rate=50, burst=10)
+    check(stats.get("status_503", 0) > 0 and same_rows(baseline, rows),
+          f"{stats.get('status_503', 0)} x 503 retried, rows unchanged")
+
+    # 4. Crash + resume, Ctrl-C
+    check_resume(check)
+    check_interrupt(check)
+
+    # 5. Throughput (100ms per response, 20 req/s per host)
+    rows, elapsed, _ = crawl(cards_per_page=25, latency=0.1, workers=8, rate=20, burst=8)
+    print(f"\n⏱️  sequential: {len(baseline) / seq_time:.2f} jobs/s ({len(baseline)} jobs in {seq_time:.1f}s)")
+    print(f"⏱️  concurrent: {len(rows) / elapsed:.2f} jobs/s ({len(rows)} jobs in {elapsed:.1f}s, "
+          f"8 workers, 20 req/s, 100ms latency)")
+
+    print("\n✅ All checks passed" if not failures else f"\n❌ {failures} check(s) failed")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+"""
+Check semantic match mode offline, with the hashing encoder
+(EMBEDDING_ENCODER=hashing, no model download).
+
+1. build_semantic_index writes unit-length float16 vectors, every row in
+   exactly one IVF list, and the same vectors on a rebuild.
+2. IVF search probing every list returns exactly the brute-force cosine
+   top-k (similarities; duplicate postings tie); at SEMANTIC_NPROBE its
+   recall@k is reported.
+3. semantic mode blends each candidate as
+   (1 - SEMANTIC_WEIGHT) * keyword fit + SEMANTIC_WEIGHT * cosine, keeps
+   domain-rejected jobs at -1, and equals keyword mode at weight 0.
+4. Rebuilding the embeddings changes the ranking cache key: the next
+   request re-ranks with the new vectors instead of serving the old ranking.
+
+Uses the same throwaway SQLite copy of the scraped CSV as
+check_pdf_extract.py (no server needed).
+
+    python scripts/check_semantic.py
+"""
+import os
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import create_engine
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+from check_pdf_extract import CSV_PATH, TMP_DIR  # also points the app at a temp database
+
+os.environ["EMBEDDING_ENCODER"] = "hashing"
+os.environ["SEMANTIC_DIR"] = str(TMP_DIR / "embeddings")
+NUM_CVS = 30
+TOP_K = 10
+
+
+def main():
+    jobs = pd.read_csv(CSV_PATH).rename(columns=str.lower)
+    jobs.insert(0, "id", range(1, len(jobs) + 1))
+    jobs.to_sql("linkedin_jobs", create_engine(os.environ["DATABASE_URL"]), index=False)
+
+    import app.main as main_module
+    from app.main import JobRecommender
+    from app.semantic import SEMANTIC_DIR, HashingEncoder, SemanticIndex, build_semantic_index
+
+    ok = True
+
+    def check(cond, good, bad):
+        nonlocal ok
+        print(f"✅ {good}" if cond else f"❌ {bad}")
+        ok = ok and cond
+
+    # 1. Build
+    meta = build_semantic_index(jobs, SEMANTIC_DIR, HashingEncoder())
+    semantic = SemanticIndex(SEMANTIC_DIR)
+    vectors = np.asarray(semantic.vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=1)
+    listed = np.sort(np.asarray(semantic.list_rows))
+    first = vectors.copy()
+    build_semantic_index(jobs, SEMANTIC_DIR, HashingEncoder())
+    rebuilt = np.asarray(SemanticIndex(SEMANTIC_DIR).vectors, dtype=np.float32)
+    check(meta["count"] == len(jobs) and meta["encoder"] == "hashing-512"
+          and np.allclose(norms[norms > 0], 1, atol=1e-2) and np.array_equal(listed, np.arange(len(jobs)))
+          and np.array_equal(first, rebuilt),
+          f"{meta['count']} x {meta['dim']} vectors ({meta['encoder']}), {meta['nlist']} IVF lists, "
+          f"deterministic rebuild",
+          f"bad build: {meta}, norms {norms.min():.3f}..{norms.max():.3f}, "
+          f"rows listed once: {np.array_equal(listed, np.arange(len(jobs)))}")
+
+    # 2. IVF vs brute force
+    semantic = SemanticIndex(SEMANTIC_DIR)
+    vectors = np.asarray(semantic.vectors, dtype=np.float32)
+    cvs = jobs["description"].dropna().sample(NUM_CVS, random_state=3).tolist()
+    exact, recall = True, []
+    for cv in cvs:
+        query = semantic.encode_query(cv)
+        sims = vectors @ query
+        brute = np.argsort(-sims, kind="stable")[:TOP_K]
+        rows, got = semantic.search(query, TOP_K, semantic.meta["nlist"])
+        # duplicate postings tie, so compare similarities rather than row ids
+        exact = exact and np.allclose(got, sims[brute]) and np.allclose(sims[rows], got)
+        rows, _ = semantic.search(query, TOP_K, main_module.SEMANTIC_NPROBE)
+        recall.append(len(set(rows) & set(brute)) / TOP_K)
+    check(exact, f"IVF probing all {semantic.meta['nlist']} lists == brute-force cosine top-{TOP_K} "
+                 f"({NUM_CVS} CVs); recall@{TOP_K} at nprobe={main_module.SEMANTIC_NPROBE}: {np.mean(recall):.0%}",
+          "IVF search over every list differs from brute-force cosine")
+
+    # 3. Blend
+    reco = JobRecommender()
+    index = reco.index
+    weight = main_module.SEMANTIC_WEIGHT
+    rows_for_pos, _ = reco._embedding_alignment(index)
+    bad = []
+    for domain in (None, "Software Web Developer", "Food Technologist Bio Science"):
+        for cv in cvs[:10]:
+            cand_vec = index.skill_vector(reco.profile(cv, "check:" + cv)[1])
+            positions, blended = reco.semantic_scores(index, cv, cand_vec, domain)
+            kw_positions, keyword = reco.score_candidates(index, cv, cand_vec, domain, extra=positions)
+            cos = np.clip(vectors[rows_for_pos[positions]] @ semantic.encode_query(cv), 0, 1)
+            expected = np.where(keyword < 0, -1.0, (1 - weight) * keyword + weight * cos)
+            if (not np.array_equal(kw_positions, positions) or not np.allclose(blended, expected, atol=1e-6)
+                    or (rows_for_pos[positions] < 0).any()):
+                bad.append((domain, cv[:40]))
+    check(not bad, f"blend = {1 - weight:g} * keyword fit + {weight:g} * cosine, rejected jobs stay -1",
+          f"blended scores differ for {bad[:3]}")
+
+    main_module.SEMANTIC_WEIGHT = 0.0
+    reco.ranking_cache.clear()
+    same = all(
+        [j["job_id"] for j in reco.compute(cv, top_k=TOP_K, mode="semantic")["top_jobs"]]
+        == [j["job_id"] for j in reco.compute(cv, top_k=TOP_K)["top_jobs"]]
+        for cv in cvs
+    )
+    main_module.SEMANTIC_WEIGHT = weight
+    check(same, "SEMANTIC_WEIGHT=0 ranks exactly like keyword mode", "SEMANTIC_WEIGHT=0 differs from keyword mode")
+
+    # 4. Ranking cache vs embedding rebuilds
+    reco.ranking_cache.clear()
+    cv = cvs[0]
+    before = reco.compute(cv, top_k=TOP_K, mode="semantic")
+    reco.compute(cv, top_k=TOP_K, mode="semantic")
+    hits = reco.ranking_cache.stats()["hits"]
+    build_semantic_index(jobs, SEMANTIC_DIR, HashingEncoder(dim=64))
+    reco.refresh()  # the refresher's poll: picks up the new build
+    misses = reco.ranking_cache.stats()["misses"]
+    after = reco.compute(cv, top_k=TOP_K, mode="semantic")
+    fresh = JobRecommender().compute(cv, top_k=TOP_K, mode="semantic")
+    check(hits == 1 and reco.ranking_cache.stats()["misses"] == misses + 1 and reco.semantic.meta["dim"] == 64
+          and after == fresh and after != before,
+          "rebuilt embeddings (hashing-64) are picked up on refresh and re-rank instead of hitting the cache",
+          f"cache hits {hits}, misses {misses} -> {reco.ranking_cache.stats()['misses']}, "
+          f"dim {reco.semantic.meta['dim']}, same as a fresh process: {after == fresh}")
+    return ok
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
@@ -0,0 +1,89 @@
+"""
+Parity check: the shared SkillMatcher must return exactly what the old
+per-skill regex loop returned.
+
+Runs over every description in the scraped CSVs plus a set of boundary edge
+cases, and exits non-zero on the first mismatch.
+
+    python scripts/check_skill_matcher.py
+"""
+import re
+import sys
+import time
+from pathlib import Path
+
+import pandas as pd
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT_DIR))
+from app.skills import SkillMatcher, load_skills_vocab
+
+DATA_DIR = ROOT_DIR / "data"
+CSV_FILES = ["linkedin_jobs_india.csv", "linkedin_jobs_indonesia.csv"]
+
+EDGE_CASES = [
+    "",
+    "C++ and C# developer, knows c, r and go.",
+    "Built CI/CD pipelines; TCP/IP networking; UI/UX design.",
+    "scikit-learn, e-learning, non-profit management",
+    "javascript is not java; reactjs is not react",
+    "machine learning, deep learning and learning",
+    "python3 python_dev _python python",
+    "ASP.NET / .NET Core / node.js",
+    "Skills:Python,SQL,Excel.",
+    "c++x c++ c++\nc++",
+]
+
+
+def regex_extract(skills_vocab, text):
+    """The original loop from JobRecommender.extract_skills."""
+    text_low = text.lower()
+    skills_found = []
+    for skill in sorted(skills_vocab, key=len, reverse=True):
+        if re.search(r"\b" + re.escape(skill) + r"\b", text_low):
+            skills_found.append(skill)
+    return sorted(list(set(skills_found)))
+
+
+def load_texts():
+    texts = list(EDGE_CASES)
+    for name in CSV_FILES:
+        path = DATA_DIR / name
+        if not path.exists():
+            continue
+        df = pd.read_csv(path)
+        for col in ("Description", "Title"):
+            if col in df.columns:
+                texts.extend(str(t) for t in df[col].dropna())
+    return texts
+
+
+def main():
+    skills_vocab = load_skills_vocab()
+    matcher = SkillMatcher(skills_vocab)
+    texts = load_texts()
+    print(f"Checking {len(texts)} texts against {len(matcher)} skills...")
+
+    t0 = time.perf_counter()
+    expected = [regex_extract(skills_vocab, t) for t in texts]
+    t_regex = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    actual = [matcher.find_all(t) for t in texts]
+    t_matcher = time.perf_counter() - t0
+
+    for text, exp, got in zip(texts, expected, actual):
+        if exp != got:
+            print("❌ MISMATCH")
+            print(f"   text:     {text[:120]!r}")
+            print(f"   regex:    {exp}")
+            print(f"   matcher:  {got}")
+            sys.exit(1)
+
+    print(f"✅ All {len(texts)} texts match.")
+    print(f"   regex loop: {t_regex:.3f}s   matcher: {t_matcher:.3f}s   "
+          f"speedup: {t_regex / max(t_matcher, 1e-9):.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,200 @@
+"""
+Check the front ends' API client (ui/api_client.py) against a stub backend.
+
+1. Connections are reused (keep-alive) across calls.
+2. A repeat analysis of the same resume, domain and top_k never reaches
+   the backend.
+3. A hung backend costs at most the read timeout.
+4. While the backend is down the circuit breaker opens and calls fail in
+   microseconds; after the reset period one trial call closes it again,
+   also when an earlier trial ended in an unexpected error.
+5. 4xx answers surface their detail (a JSON body that is not an object
+   falls back to the reason) without opening the breaker, and a 503 with
+   Retry-After is retried.
+
+    python scripts/check_ui_client.py
+"""
+import json
+import sys
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT_DIR / "ui"))
+from api_client import ApiError, ApiUnavailable, CircuitBreaker, MatchClient, TTLCache
+
+RESULT = {"ats_score": 0.5, "candidate_skills": ["python"], "top_jobs": []}
+
+
+class Backend:
+    """What the stub answers, and what it saw."""
+
+    def __init__(self):
+        self.mode = "ok"  # ok | slow | down | bad_pdf | busy_once | redirect_loop | list_body
+        self.stats = Counter()
+        self.lock = threading.Lock()
+
+
+def make_handler(backend):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"  # keep-alive
+
+        def setup(self):
+            super().setup()
+            with backend.lock:
+                backend.stats["connections"] += 1
+
+        def do_POST(self):
+            self.rfile.read(int(self.headers.get("Content-Length") or 0))
+            with backend.lock:
+                backend.stats[self.path.split("?")[0]] += 1
+                mode = backend.mode
+                if mode == "busy_once":
+                    backend.mode = "ok"
+            if mode == "slow":
+                time.sleep(2)
+            if mode == "down":
+                return self.reply(500, {"detail": "Internal Server Error"})
+            if mode == "busy_once":
+                return self.reply(503, {"detail": "Too many requests in flight"}, {"Retry-After": "0.1"})
+            if mode == "bad_pdf":
+                return self.reply(413, {"detail": "PDF larger than 10 bytes"})
+            if mode == "redirect_loop":
+                return self.reply(307, {}, {"Location": self.path})
+            if mode == "list_body":
+                return self.reply(422, ["cv_text is required"])
+            self.reply(200, {"text": "resume text"} if self.path == "/extract" else RESULT)
+
+        def reply(self, status, body, headers=None):
+            data = json.dumps(body).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            for k, v in (headers or {}).items():
+                self.send_header(k, v)
+            self.end_headers()
+            try:
+                self.wfile.write(data)
+            except BrokenPipeError:  # the client gave up on a slow answer
+                pass
+
+        def log_message(self, *args):
+            pass
+
+    return Handler
+
+
+def main():
+    backend = Backend()
+    server = ThreadingHTTPServer(("127.0.0.1", 0), make_handler(backend))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    client = MatchClient(
+        base_url=f"http://127.0.0.1:{server.server_port}", read_timeout=0.5,
+        breaker=CircuitBreaker(failures=3, reset_seconds=0.5), cache=TTLCache(max_entries=64, ttl_seconds=60),
+    )
+    ok = True
+
+    def check(cond, good, bad):
+        nonlocal ok
+        print(f"✅ {good}" if cond else f"❌ {bad}")
+        ok = ok and cond
+
+    # 1. Keep-alive
+    for i in range(20):
+        client.match(f"cv number {i}", top_k=5)
+    check(backend.stats["connections"] == 1, "20 distinct /match calls over 1 connection",
+          f"20 calls opened {backend.stats['connections']} connections")
+
+    # 2. Content-addressed cache
+    pdf = b"%PDF-1.4 fake resume"
+    for _ in range(5):
+        client.match_pdf(pdf, top_k=5, domain="Software Web Developer")
+        client.extract(pdf)
+        client.match("cv number 3", top_k=5)
+    client.match_pdf(pdf, top_k=3, domain="Software Web Developer")
+    check(backend.stats["/match/pdf"] == 2 and backend.stats["/extract"] == 1 and backend.stats["/match"] == 20,
+          "repeat analyses served from the cache (a new top_k is a new entry)",
+          f"repeat analyses reached the backend: {dict(backend.stats)}")
+
+    # 3. Read timeout
+    backend.mode = "slow"
+    t0 = time.perf_counter()
+    try:
+        client.match("a slow one")
+        check(False, "", "hung backend did not time out")
+    except ApiUnavailable:
+        elapsed = time.perf_counter() - t0
+        check(elapsed < 1.0, f"hung backend gave up after {elapsed:.2f}s (read timeout 0.5s)",
+              f"hung backend took {elapsed:.2f}s")
+
+    # 4. Circuit breaker
+    backend.mode = "down"
+    for i in range(3):
+        try:
+            client.match(f"down {i}")
+        except ApiUnavailable:
+            pass
+    seen = sum(backend.stats.values())
+    t0 = time.perf_counter()
+    for i in range(100):
+        try:
+            client.match(f"short circuit {i}")
+        except ApiUnavailable:
+            pass
+    fast = (time.perf_counter() - t0) / 100
+    check(client.breaker.state == "open" and sum(backend.stats.values()) == seen,
+          f"breaker open after 3 failures: 100 calls failed in {fast * 1e6:.0f} µs each without reaching the backend",
+          f"breaker {client.breaker.state}, backend saw {sum(backend.stats.values()) - seen} calls while open")
+    backend.mode = "ok"
+    time.sleep(0.6)
+    check(client.match("recovered")["ats_score"] == 0.5 and client.breaker.state == "closed",
+          "one trial call after the reset period closed the breaker", f"breaker still {client.breaker.state}")
+
+    backend.mode = "down"
+    for i in range(3):
+        try:
+            client.match(f"down again {i}")
+        except ApiUnavailable:
+            pass
+    time.sleep(0.6)
+    backend.mode = "redirect_loop"
+    try:
+        client.match("redirect loop")
+    except Exception as e:  # requests.TooManyRedirects: neither a success nor a counted failure
+        error = type(e).__name__
+    backend.mode = "ok"
+    try:
+        recovered = client.match("after the loop")["ats_score"] == 0.5 and client.breaker.state == "closed"
+    except ApiUnavailable:
+        recovered = False
+    check(recovered, f"a trial call that raised {error} did not keep the breaker open",
+          f"breaker stuck {client.breaker.state} after a trial call raised {error}")
+
+    # 5. 4xx and 503 handling
+    backend.mode = "bad_pdf"
+    try:
+        client.match_pdf(b"%PDF big")
+        check(False, "", "413 did not raise ApiError")
+    except ApiError as e:
+        check(e.status == 413 and "larger" in e.detail and client.breaker.state == "closed",
+              "413 surfaces its detail and leaves the breaker closed", f"413 handled as {e.status} {e.detail}")
+    backend.mode = "list_body"
+    try:
+        client.match("no cv")
+        check(False, "", "422 did not raise ApiError")
+    except ApiError as e:
+        check(e.status == 422 and e.detail == "Unprocessable Entity",
+              "422 with a JSON list body falls back to the reason", f"422 handled as {e.status} {e.detail}")
+    backend.mode = "busy_once"
+    check(client.match("busy")["ats_score"] == 0.5, "503 with Retry-After retried", "503 not retried")
+
+    print(f"ℹ️  {client.status()}")
+    server.shutdown()
+    return ok
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
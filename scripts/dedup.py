@@ -0,0 +1,361 @@
+"""
+Near-duplicate job postings: canonical URLs plus MinHash / LSH.
+
+LinkedIn links carry per-click refId / trackingId / position parameters, and
+reposts of the same role by the same company come back under new posting
+IDs. Both inflate the corpus the API scans on every request. Before an
+ingest merges rows into linkedin_jobs, `Deduper`:
+
+1. canonicalizes URLs (https://<host>/jobs/view/<posting id>), so one posting
+   seen under different tracking parameters is one row;
+2. computes a MinHash signature per posting over hashed 8-byte shingles of
+   its normalized title, company and description (one-permutation hashing:
+   each shingle lands in one of DEDUP_BINS bins, the bin keeps its minimum);
+3. buckets signatures with LSH banding (same company and an identical band
+   of bins), so only postings sharing a bucket are ever compared: the work
+   grows linearly with the corpus, not quadratically;
+4. links postings whose estimated Jaccard similarity is at least
+   DEDUP_THRESHOLD (and whose titles share at least TITLE_THRESHOLD of their
+   words, as boilerplate descriptions make different roles look alike) and
+   keeps one posting per cluster.
+
+    python scripts/dedup.py                    # report on the scraped CSV
+    python scripts/dedup.py --table [--prune]  # report on (and clean up) linkedin_jobs
+"""
+import argparse
+import os
+from typing import Dict, Iterable, List, Optional
+from urllib.parse import urlsplit
+
+import numpy as np
+import pandas as pd
+
+from scrape_store import _JOB_ID_RE
+
+# Estimated Jaccard similarity at which two postings count as the same job
+DEDUP_THRESHOLD = float(os.getenv("DEDUP_THRESHOLD", "0.8"))
+# Word Jaccard two titles need as well ("Lab Analyst (8235)" ~ "Lab Analyst (8236)", not "Technologist - Water")
+TITLE_THRESHOLD = 0.5
+# Signature size; LSH splits it into DEDUP_BANDS bands of DEDUP_BINS // DEDUP_BANDS bins
+DEDUP_BINS = 64
+DEDUP_BANDS = 16
+# Hash 1 in DEDUP_SAMPLE shingles (the same ones in every posting, so Jaccard is preserved)
+DEDUP_SAMPLE = int(os.getenv("DEDUP_SAMPLE", "4"))
+SHINGLE_BYTES = 8
+SIGN_BATCH = 1000  # postings hashed at once
+
+EMPTY = np.uint32(0xFFFFFFFF)  # a bin no shingle fell into
+_BIN_SHIFT = np.uint64(64 - (DEDUP_BINS.bit_length() - 1))
+_MUL = np.uint64(0x9E3779B97F4A7C15)  # multiply-shift hashing of 8-byte shingles
+_SAMPLE_MUL = np.uint64(0xC2B2AE3D27D4EB4F)
+_BAND_MUL = np.uint64(0x100000001B3)
+
+# UTF-8 bytes: lowercase ASCII letters, keep digits, non-ASCII and NUL (separator); the rest becomes a space
+_NORMALIZE = bytes(
+    b + 32 if 65 <= b <= 90 else b if (b == 0 or 48 <= b <= 57 or 97 <= b <= 122 or b >= 128) else 32
+    for b in range(256)
+)
+
+
+def canonical_url(url) -> Optional[str]:
+    """A job URL without tracking parameters: https://<host>/jobs/view/<posting id> for LinkedIn."""
+    url = _text(url).strip()
+    if not url:
+        return None
+    parts = urlsplit(url)
+    m = _JOB_ID_RE.search(url)
+    if m:
+        return f"{parts.scheme or 'https'}://{parts.netloc.lower()}/jobs/view/{m.group(1)}"
+    return f"{parts.scheme}://{parts.netloc.lower()}{parts.path.rstrip('/')}" if parts.netloc else url.split("?", 1)[0]
+
+
+def _text(value) -> str:
+    return "" if value is None or value != value else str(value)  # NULL / NaN -> ""
+
+
+def normalize(text) -> bytes:
+    """Lowercase, punctuation-free, single-spaced UTF-8 of a text."""
+    return normalize_many([_text(text)])[0]
+
+
+def normalize_many(texts: Iterable[str]) -> List[bytes]:
+    """`normalize` of many texts in one pass over their NUL-separated concatenation."""
+    data = np.frombuffer("\0".join(t.replace("\0", "") for t in texts).encode("utf-8", "replace")
+                         .translate(_NORMALIZE), dtype=np.uint8)
+    keep = np.ones(len(data), dtype=bool)
+    keep[1:] = (data[1:] != 32) | (data[:-1] != 32)  # drop the second space of a pair
+    data = data[keep]
+    return [t.strip(b" ") for t in data.tobytes().split(b"\0")]
+
+
+def signatures(texts: List[bytes]) -> np.ndarray:
+    """(len(texts), DEDUP_BINS) one-permutation MinHash signatures of normalized texts (EMPTY bins for tiny texts)."""
+    sig = np.full((len(texts), DEDUP_BINS), EMPTY, dtype=np.uint32)
+    for i in range(0, len(texts), SIGN_BATCH):  # bounds the temporary arrays
+        sig[i:i + SIGN_BATCH] = _signatures(texts[i:i + SIGN_BATCH])
+    return sig
+
+
+def _signatures(texts: List[bytes]) -> np.ndarray:
+    n = len(texts)
+    sig = np.full((n, DEDUP_BINS), EMPTY, dtype=np.uint32)
+    # Every text followed by SHINGLE_BYTES zero bytes, so no window spans two texts
+    pad = b"\0" * SHINGLE_BYTES
+    buf = b"".join(t + pad for t in texts)
+    lengths = np.fromiter(map(len, texts), dtype=np.int64, count=n)
+    starts = np.concatenate(([0], np.cumsum(lengths + SHINGLE_BYTES)[:-1]))
+    windows = np.where(lengths >= SHINGLE_BYTES, lengths - SHINGLE_BYTES + 1, (lengths > 0).astype(np.int64))
+
+    # All 8-byte windows as uint64, without copying the text; sample first, then
+    # keep the windows that start inside a text and do not run into its padding
+    # (texts shorter than a window keep their one padded window)
+    shingles = np.ndarray((len(buf) - SHINGLE_BYTES + 1,), dtype="<u8", buffer=buf, strides=(1,))
+    positions = np.flatnonzero(shingles * _SAMPLE_MUL < np.uint64(2**64 // DEDUP_SAMPLE))
+    docs = np.searchsorted(starts, positions, side="right") - 1
+    inside = positions - starts[docs] < windows[docs]
+    positions, docs = positions[inside], docs[inside].astype(np.uint64)
+    h = shingles[positions] * _MUL
+
+    # Minimum of each (text, bin): sort (text, bin, value) keys, keep the first of every cell
+    keys = (docs << np.uint64(38)) | ((h >> _BIN_SHIFT) << np.uint64(32)) | ((h >> np.uint64(26)) & np.uint64(0xFFFFFFFF))
+    if len(keys) == 0:
+        return sig
+    keys.sort()
+    cells = keys >> np.uint64(32)
+    first = np.flatnonzero(np.concatenate(([True], cells[1:] != cells[:-1])))
+    sig.reshape(-1)[cells[first].astype(np.int64)] = (keys[first] & np.uint64(0xFFFFFFFF)).astype(np.uint32)
+    return sig
+
+
+def similarity(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """Estimated Jaccard similarity of paired signature rows: equal bins / bins used by either."""
+    used = (a != EMPTY) | (b != EMPTY)
+    same = (a == b) & used
+    return np.divide(same.sum(axis=1), used.sum(axis=1), out=np.zeros(len(a)), where=used.any(axis=1))
+
+
+def title_similarity(a: bytes, b: bytes) -> float:
+    wa, wb = set(a.split()), set(b.split())
+    return len(wa & wb) / len(wa | wb) if wa or wb else 1.0
+
+
+def _hash_strings(values: Iterable[str]) -> np.ndarray:
+    return np.array([hash(v) & 0xFFFFFFFFFFFFFFFF for v in values], dtype=np.uint64)
+
+
+class _Postings:
+    """Signatures, company hashes, normalized titles and canonical URLs of a group of postings."""
+
+    def __init__(self):
+        self.sigs: List[np.ndarray] = []
+        self.companies: List[np.ndarray] = []
+        self.titles: List[bytes] = []
+        self.urls: List[Optional[str]] = []
+
+    def add(self, frame: pd.DataFrame):
+        col = lambda c: frame[c].tolist() if c in frame.columns else [None] * len(frame)
+        titles, companies, descriptions = col("title"), col("company"), col("description")
+        self.sigs.append(signatures(normalize_many(
+            f"{_text(t)} | {_text(c)} | {_text(d)}" for t, c, d in zip(titles, companies, descriptions)
+        )))
+        self.companies.append(_hash_strings(normalize_many(map(_text, companies))))
+        self.titles += normalize_many(map(_text, titles))
+        self.urls += [canonical_url(u) for u in col("url")]
+
+
+class Deduper:
+    """
+    Clusters postings: `add` the rows being ingested (in read order) and
+    `add_existing` the stored rows they may repeat (in id order), then
+    `cluster`. A cluster keeps its oldest stored row if it has one (ids stay
+    stable), else the last row read, like the upsert does for a repeated URL.
+    """
+
+    def __init__(self, threshold: float = DEDUP_THRESHOLD):
+        self.threshold = threshold
+        self._existing = _Postings()
+        self._added = _Postings()
+        self.companies = set()  # of the added rows, as written
+        self.stored_urls: List[str] = []  # per existing posting
+        self.existing_ids: List[int] = []
+        self.keep = None
+
+    @property
+    def n_existing(self) -> int:
+        return len(self.existing_ids)
+
+    def add_existing(self, frame: pd.DataFrame):
+        """Rows already in linkedin_jobs (id, url, title, company, description), in id order."""
+        self._existing.add(frame)
+        self.stored_urls += frame["url"].tolist()
+        self.existing_ids += frame["id"].astype(int).tolist()
+
+    def add(self, frame: pd.DataFrame):
+        """A chunk of rows to ingest, in read order."""
+        frame = frame.rename(columns=str.lower)
+        self._added.add(frame)
+        if "company" in frame.columns:
+            self.companies.update(frame["company"].dropna())
+
+    def cluster(self) -> Dict:
+        """Find the clusters; sets `keep` / `kept_urls` for the added rows and returns a report."""
+        # Stored postings first, by id, so a cluster's earliest posting is its oldest stored one
+        groups = (self._existing, self._added)
+        sig = np.concatenate([s for g in groups for s in g.sigs] or [np.zeros((0, DEDUP_BINS), dtype=np.uint32)])
+        company = np.concatenate([c for g in groups for c in g.companies] or [np.zeros(0, dtype=np.uint64)])
+        self.urls = self._existing.urls + self._added.urls
+        self.titles = self._existing.titles + self._added.titles
+        by_id = np.argsort(self.existing_ids, kind="stable")
+        order = np.concatenate([by_id, np.arange(self.n_existing, len(sig))]).astype(np.int64)
+        sig, company = sig[order], company[order]
+        self.urls = [self.urls[i] for i in order]
+        self.titles = [self.titles[i] for i in order]
+        self.stored_urls = [self.stored_urls[i] for i in by_id]
+        self.existing_ids = [self.existing_ids[i] for i in by_id]
+        n = len(sig)
+        parent = np.arange(n)
+
+        def find(i):
+            root = i
+            while parent[root] != root:
+                root = parent[root]
+            while parent[i] != root:
+                parent[i], i = root, parent[i]
+            return root
+
+        def union(i, j):
+            ri, rj = find(i), find(j)
+            if ri != rj:
+                parent[max(ri, rj)] = min(ri, rj)  # roots are the earliest posting
+
+        # 1. Exact duplicates: same canonical URL
+        codes, _ = pd.factorize(pd.Series(self.urls, dtype=object))
+        first_of = {}
+        url_pairs = 0
+        for i, c in enumerate(codes):
+            if c >= 0:
+                j = first_of.setdefault(c, i)
+                if j != i:
+                    union(j, i)
+                    url_pairs += 1
+
+        # 2. Near duplicates: LSH candidates (same company, same band), then verify
+        rows = DEDUP_BINS // DEDUP_BANDS
+        leaders, members = [], []
+        for b in range(DEDUP_BANDS):
+            band = sig[:, b * rows:(b + 1) * rows].astype(np.uint64)
+            key = company.copy()
+            for r in range(rows):
+                key = key * _BAND_MUL + band[:, r]
+            idx = np.flatnonzero(~(band == EMPTY).all(axis=1))
+            order = idx[np.argsort(key[idx], kind="stable")]
+            sorted_keys = key[order]
+            new_group = np.concatenate(([True], sorted_keys[1:] != sorted_keys[:-1]))
+            leader = order[np.flatnonzero(new_group)][np.cumsum(new_group) - 1]
+            pair = leader != order
+            leaders.append(leader[pair])
+            members.append(order[pair])
+        candidates = np.unique(np.stack([np.concatenate(leaders), np.concatenate(members)], axis=1), axis=0) \
+            if leaders and sum(map(len, leaders)) else np.zeros((0, 2), dtype=np.int64)
+        similar = similarity(sig[candidates[:, 0]], sig[candidates[:, 1]]) >= self.threshold
+        for i, j in candidates[similar].tolist():
+            if title_similarity(self.titles[i], self.titles[j]) >= TITLE_THRESHOLD:
+                union(i, j)
+
+        # 3. One posting per cluster
+        roots = np.array([find(i) for i in range(n)], dtype=np.int64)
+        rep = np.full(n, -1, dtype=np.int64)
+        has_stored = roots < self.n_existing  # the root is the earliest posting, stored ones come first
+        np.maximum.at(rep, roots, np.arange(n))  # default: the last one read
+        rep[roots[has_stored]] = roots[has_stored]
+        rep = rep[roots]
+
+        # Added rows that survive: cluster representatives, plus the last
+        # re-read of a stored representative's URL (an update to that row,
+        # under its stored URL)
+        added = n - self.n_existing
+        self.keep = np.zeros(added, dtype=bool)
+        self.kept_urls: List[Optional[str]] = list(self.urls[self.n_existing:])
+        updated = set()
+        for i in range(n - 1, self.n_existing - 1, -1):
+            r, k = rep[i], i - self.n_existing
+            if r == i:
+                self.keep[k] = True
+            elif r < self.n_existing and r not in updated and self.urls[i] is not None and self.urls[i] == self.urls[r]:
+                updated.add(r)
+                self.keep[k] = True
+                self.kept_urls[k] = self.stored_urls[r]
+        self.clusters = rep
+
+        kept = int(self.keep.sum())
+        new_urls = self.urls[self.n_existing:]
+        distinct = len({u for u in new_urls if u is not None}) + sum(u is None for u in new_urls)
+        return {
+            "postings": added,
+            "kept": kept,
+            "url_duplicates": added - distinct,
+            "near_duplicates": distinct - kept,
+            "reduction": 1 - kept / added if added else 0.0,
+            "candidate_pairs": len(candidates),
+            "stored_duplicates": int((rep[:self.n_existing] != np.arange(self.n_existing)).sum()),
+        }
+
+    def filtered(self, chunks: Iterable[pd.DataFrame]) -> Iterable[pd.DataFrame]:
+        """The same chunks as were added, re-read: only kept rows, with canonical (or stored) URLs."""
+        offset = 0
+        for chunk in chunks:
+            frame = chunk.rename(columns=str.lower)
+            keep = self.keep[offset:offset + len(frame)]
+            frame = frame.assign(url=self.kept_urls[offset:offset + len(frame)])[keep]
+            offset += len(chunk)
+            yield frame
+
+    def stored_duplicate_ids(self) -> List[int]:
+        """Stored rows that duplicate an older stored row (what --prune deletes)."""
+        rep = self.clusters[:self.n_existing]
+        return [self.existing_ids[i] for i in np.flatnonzero(rep != np.arange(self.n_existing))]
+
+
+def print_report(report: Dict, label: str):
+    print(f"🧬 Dedup of {report['postings']} {label}: kept {report['kept']} "
+          f"(-{report['url_duplicates']} same URL, -{report['near_duplicates']} near-duplicate reposts, "
+          f"{report['reduction']:.1%} smaller; {report['candidate_pairs']} LSH candidate pairs)")
+
+
+if __name__ == "__main__":
+    import sys
+    from pathlib import Path
+
+    from sqlalchemy import bindparam, create_engine, inspect, text
+
+    ROOT_DIR = Path(__file__).resolve().parents[1]
+    parser = argparse.ArgumentParser(description="Report (and optionally remove) duplicate job postings.")
+    parser.add_argument("--csv", default=str(ROOT_DIR / "data" / "linkedin_jobs_india.csv"))
+    parser.add_argument("--table", action="store_true", help="check linkedin_jobs (DB_URL) instead of the CSV")
+    parser.add_argument("--prune", action="store_true", help="with --table: delete the duplicate rows")
+    args = parser.parse_args()
+
+    deduper = Deduper()
+    if not args.table:
+        for chunk in pd.read_csv(args.csv, chunksize=10_000):
+            deduper.add(chunk)
+        print_report(deduper.cluster(), f"rows in {args.csv}")
+        sys.exit()
+
+    from dotenv import load_dotenv
+    load_dotenv()
+    engine = create_engine(os.environ["DB_URL"])
+    query = "SELECT id, url, title, company, description FROM linkedin_jobs ORDER BY id"
+    for chunk in pd.read_sql(text(query), engine, chunksize=10_000):
+        deduper.add_existing(chunk)
+    deduper.cluster()
+    ids = deduper.stored_duplicate_ids()
+    print(f"🧬 {len(ids)} of {deduper.n_existing} rows in linkedin_jobs duplicate an older row "
+          f"({len(ids) / max(deduper.n_existing, 1):.1%})")
+    if args.prune and ids:
+        with engine.begin() as conn:
+            for table, column in (("job_skills", "job_id"), ("linkedin_jobs", "id")):  # no cascade on SQLite
+                if table == "linkedin_jobs" or inspect(engine).has_table(table):
+                    conn.execute(text(f"DELETE FROM {table} WHERE {column} IN :ids").bindparams(
+                        bindparam("ids", expanding=True)), {"ids": ids})
+        print(f"🗑️ Deleted {len(ids)} rows. Reload the API's corpus (POST /admin/refresh?full=true).")
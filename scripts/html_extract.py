@@ -0,0 +1,185 @@
+"""
+HTML extraction backends for the LinkedIn scraper.
+
+`bs4` builds a full BeautifulSoup tree per page (the original code, kept
+as the reference). `fast` pulls the few fields the scraper needs straight
+out of the markup with precompiled regexes and never builds a tree. Both
+return the same values, down to whitespace and entities;
+scripts/bench_parsing.py checks that and times them.
+"""
+import html as html_lib
+import os
+import re
+from bisect import bisect_right
+from typing import Dict, List, Optional
+
+from bs4 import BeautifulSoup
+
+# Backend used by the scraper (see EXTRACTORS)
+SCRAPER_PARSER = os.getenv("SCRAPER_PARSER", "fast")
+
+# (tag, class) of each field
+CARD_TITLE = ("h3", "base-search-card__title")
+CARD_COMPANY = ("h4", "base-search-card__subtitle")
+CARD_LOCATION = ("span", "job-search-card__location")
+CARD_LINK = ("a", "base-card__full-link")
+DESCRIPTION = ("div", "show-more-less-html__markup")
+
+
+class Bs4Extractor:
+    """Full BeautifulSoup (html.parser) tree per page."""
+
+    name = "bs4"
+
+    def cards(self, page: str) -> List[Dict[str, Optional[str]]]:
+        """Search-result cards with a title and a link: title, company, location, url (None if absent)."""
+        soup = BeautifulSoup(page, "html.parser")
+        out = []
+        for card in soup.find_all("li"):
+            title = card.find(CARD_TITLE[0], {"class": CARD_TITLE[1]})
+            company = card.find(CARD_COMPANY[0], {"class": CARD_COMPANY[1]})
+            location = card.find(CARD_LOCATION[0], {"class": CARD_LOCATION[1]})
+            link = card.find(CARD_LINK[0], {"class": CARD_LINK[1]})
+            if title and link and link.has_attr("href"):
+                out.append({
+                    "title": title.get_text(strip=True),
+                    "company": company.get_text(strip=True) if company else None,
+                    "location": location.get_text(strip=True) if location else None,
+                    "url": link["href"],
+                })
+        return out
+
+    def description(self, page: str) -> str:
+        """Text of a job page's description block ("" if there is none)."""
+        soup = BeautifulSoup(page, "html.parser")
+        div = soup.find(DESCRIPTION[0], class_=DESCRIPTION[1])
+        return div.get_text(separator=" ", strip=True) if div else ""
+
+
+# --- Targeted extraction ---
+# Markup that is not text: CDATA (its content is), comments, doctype, tags
+_MARKUP_RE = re.compile(r"<!\[CDATA\[(.*?)\]\]>|<!--.*?-->|<![^>]*>|<\?[^>]*>|</?[a-zA-Z][^>]*>", re.S)
+_HIDDEN_RE = re.compile(r"<(script|style)\b[^>]*>.*?</\1\s*>", re.S | re.I)
+_ATTR_RE = re.compile(r"""([^\s=/>]+)(?:\s*=\s*(?:"([^"]*)"|'([^']*)'|([^\s>]+)))?""")
+_HIDDEN_BLOCK_RE = re.compile(r"<!--.*?(?:-->|$)|<(script|style)\b.*?(?:</\1\s*>|$)", re.S | re.I)
+_TAG_NAME_RE = re.compile(r"<[^\s>/]+")
+_LI_RE = re.compile(r"<li[\s>]", re.I)
+_LI_END_RE = re.compile(r"</li\s*>", re.I)
+
+
+def _open_tag_re(tag: str, cls: str) -> re.Pattern:
+    """Opening <tag> whose class list contains `cls`."""
+    return re.compile(
+        rf"""<{tag}\s(?:[^>]*?\s)?class\s*=\s*(["'])(?:[^"']*?\s)?{re.escape(cls)}(?:\s[^"']*)?\1[^>]*>""", re.I
+    )
+
+
+def _text(fragment: str, sep: str) -> str:
+    """BeautifulSoup's get_text(separator=sep, strip=True) of an HTML fragment."""
+    if "<script" in fragment or "<style" in fragment:
+        fragment = _HIDDEN_RE.sub("<x>", fragment)
+    parts = _MARKUP_RE.split(fragment)  # text, CDATA group, text, CDATA group, ...
+    strings = (html_lib.unescape(p).strip() for p in parts if p)
+    return sep.join(s for s in strings if s)
+
+
+class _Hidden:
+    """Spans of a text inside comments, <script> or <style>, where markup is just text."""
+
+    def __init__(self, text: str):
+        self.starts, self.ends = [], []
+        for m in _HIDDEN_BLOCK_RE.finditer(text):
+            self.starts.append(m.start())
+            self.ends.append(m.end())
+
+    def __contains__(self, pos: int) -> bool:
+        i = bisect_right(self.starts, pos) - 1
+        return i >= 0 and pos < self.ends[i]
+
+
+def _attrs(tag: str) -> Dict[str, str]:
+    """Attributes of an opening tag, unescaped; a repeated attribute keeps its last value."""
+    start = _TAG_NAME_RE.match(tag).end()
+    return {
+        name.lower(): html_lib.unescape(dq or sq or bare)
+        for name, dq, sq, bare in _ATTR_RE.findall(tag, start, len(tag) - 1)
+    }
+
+
+class _Field:
+    """First element matching (tag, class) in a fragment; its text up to the closing tag."""
+
+    def __init__(self, tag: str, cls: str):
+        self.open_re = _open_tag_re(tag, cls)
+        self.nested_re = re.compile(rf"<{tag}[\s>]|</{tag}\s*>", re.I)
+
+    def find(self, fragment: str, hidden: Optional[_Hidden] = None):
+        """(opening tag, inner markup) or None."""
+        for m in self.open_re.finditer(fragment):
+            hidden = hidden or _Hidden(fragment)
+            if m.start() not in hidden:
+                return m.group(0), fragment[m.end():self._close(fragment, m.end(), hidden)]
+        return None
+
+    def _close(self, fragment: str, pos: int, hidden: _Hidden) -> int:
+        """Start of the matching closing tag, counting nested same-name elements."""
+        depth = 1
+        for m in self.nested_re.finditer(fragment, pos):
+            if m.start() in hidden:
+                continue
+            depth += -1 if m.group(0)[1] == "/" else 1
+            if depth == 0:
+                return m.start()
+        return len(fragment)  # unclosed: runs to the end, like the tree builder
+
+
+class FastExtractor:
+    """Regex extraction of just the needed elements; no tree is built."""
+
+    name = "fast"
+
+    def __init__(self):
+        self.title = _Field(*CARD_TITLE)
+        self.company = _Field(*CARD_COMPANY)
+        self.location = _Field(*CARD_LOCATION)
+        self.link = _Field(*CARD_LINK)
+        self.desc = _Field(*DESCRIPTION)
+
+    def cards(self, page: str) -> List[Dict[str, Optional[str]]]:
+        hidden = _Hidden(page)
+        starts = [m.start() for m in _LI_RE.finditer(page) if m.start() not in hidden] + [len(page)]
+        out = []
+        for start, nxt in zip(starts, starts[1:]):
+            card = page[start:nxt]
+            card_hidden = _Hidden(card)
+            for end in _LI_END_RE.finditer(card):
+                if end.start() not in card_hidden:
+                    card = card[:end.start()]
+                    break
+            title = self.title.find(card, card_hidden)
+            link = self.link.find(card, card_hidden)
+            href = _attrs(link[0]).get("href") if link else None
+            if title is None or href is None:
+                continue
+            company = self.company.find(card, card_hidden)
+            location = self.location.find(card, card_hidden)
+            out.append({
+                "title": _text(title[1], ""),
+                "company": _text(company[1], "") if company else None,
+                "location": _text(location[1], "") if location else None,
+                "url": href,
+            })
+        return out
+
+    def description(self, page: str) -> str:
+        found = self.desc.find(page)
+        return _text(found[1], " ") if found else ""
+
+
+EXTRACTORS = {"bs4": Bs4Extractor, "fast": FastExtractor}
+
+
+def get_extractor(name: str = SCRAPER_PARSER):
+    if name not in EXTRACTORS:
+        raise ValueError(f"Unknown HTML parser '{name}' (expected one of: {', '.join(EXTRACTORS)})")
+    return EXTRACTORS[name]()
@@ -1,9 +1,19 @@
+import argparse
+import io
 import os
+import sys
 import pandas as pd
-from sqlalchemy import create_engine, text
+from sqlalchemy import bindparam, create_engine, inspect, text
 from dotenv import load_dotenv
 from pathlib import Path
 
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))  # the repo root, for `app`
+from build_embeddings import build_embeddings
+from build_snapshot import build_snapshot
+from scrape_store import SCRAPE_DIR, ScrapeStore
+from dedup import Deduper, print_report
+from app.index import split_skills
+
 # Load environment variables
 load_dotenv()
 
@@ -13,47 +23,342 @@ if not DB_URL:
     print("❌ ERROR: DB_URL not found in .env file")
     exit()
 
+# Precompute job embeddings for semantic matching after each ingest
+BUILD_EMBEDDINGS = os.getenv("BUILD_EMBEDDINGS", "1") == "1"
+# Prebuild the API's matching index so it starts without scanning the table
+BUILD_SNAPSHOT = os.getenv("BUILD_SNAPSHOT", "1") == "1"
+# "upsert": merge new/changed rows into the sql/schema.sql table (keeps ids and loaded_at)
+# "replace": the old drop-and-reload of the whole CSV
+INGEST_MODE = os.getenv("INGEST_MODE", "upsert")
+# Drop tracking-parameter copies and near-duplicate reposts before the upsert (scripts/dedup.py)
+DEDUP = os.getenv("DEDUP", "1") == "1"
+# Rows per chunk streamed into the staging table
+INGEST_CHUNK_ROWS = int(os.getenv("INGEST_CHUNK_ROWS", "5000"))
+
 # Setup Paths
 BASE_DIR = Path(__file__).resolve().parents[1]
 DATA_DIR = BASE_DIR / "data"
 CSV_PATH = DATA_DIR / "linkedin_jobs_india.csv"
+SCHEMA_PATH = BASE_DIR / "sql" / "schema.sql"
+
+JOB_COLUMNS = ["title", "company", "location", "url", "description", "skills_required"]
+STAGE_TABLE = "linkedin_jobs_stage"
+DELTA_TABLE = "linkedin_jobs_delta"
+SKILL_TABLES = ("skills", "job_skills")
+
+def csv_chunks(path=CSV_PATH):
+    yield from pd.read_csv(path, chunksize=INGEST_CHUNK_ROWS)
+
+def segment_chunks(store, run_ids):
+    """Rows of the given scraper runs (their JSONL segments), INGEST_CHUNK_ROWS at a time."""
+    rows = []
+    for run_id in run_ids:
+        for row in store.run_rows(run_id):
+            rows.append(row)
+            if len(rows) >= INGEST_CHUNK_ROWS:
+                yield pd.DataFrame(rows)
+                rows = []
+    if rows:
+        yield pd.DataFrame(rows)
+
+def dedup_chunks(engine, read):
+    """
+    The dedup stage: clusters the input (`read()`, called once to cluster and
+    once to stream the kept rows) with itself and with the stored rows of the
+    same companies, and yields only one row per cluster, under a canonical URL.
+    """
+    deduper = Deduper()
+    for chunk in read():
+        deduper.add(chunk)
+    companies = sorted(deduper.companies)
+    query = text("SELECT id, url, title, company, description FROM linkedin_jobs WHERE company IN :companies")
+    query = query.bindparams(bindparam("companies", expanding=True))
+    for i in range(0, len(companies), 500):
+        deduper.add_existing(pd.read_sql(query, engine, params={"companies": companies[i:i + 500]}))
+    report = deduper.cluster()
+    print_report(report, "rows read")
+    if report["stored_duplicates"]:
+        print(f"   {report['stored_duplicates']} rows already stored repeat an older one; "
+              "remove them with 'python scripts/dedup.py --table --prune'")
+    yield from deduper.filtered(read())
+
+def _check_jobs_table(insp):
+    """Raise if linkedin_jobs lacks the id / loaded_at columns or the UNIQUE url the upsert relies on."""
+    columns = {c["name"] for c in insp.get_columns("linkedin_jobs")}
+    missing = {"id", "loaded_at", *JOB_COLUMNS} - columns
+    url_unique = any(u["column_names"] == ["url"] for u in insp.get_unique_constraints("linkedin_jobs")) or any(
+        i["unique"] and i["column_names"] == ["url"] for i in insp.get_indexes("linkedin_jobs")
+    )
+    if missing or not url_unique:
+        problem = f"missing columns {sorted(missing)}" if missing else "no UNIQUE constraint on url"
+        raise RuntimeError(
+            f"'linkedin_jobs' does not match sql/schema.sql ({problem}); it was probably created by a "
+            "replace ingest. Drop it and run scripts/db_init.py, or ingest with --mode replace."
+        )
+
+def check_schema(engine) -> bool:
+    """
+    The upsert needs the sql/schema.sql table: an id, loaded_at and a unique
+    url. Returns whether the skills / job_skills tables exist as well
+    (created on PostgreSQL; without them the prefilter mode has no data).
+    """
+    insp = inspect(engine)
+    missing_tables = [t for t in ("linkedin_jobs", *SKILL_TABLES) if not insp.has_table(t)]
+    if "linkedin_jobs" not in missing_tables:
+        # Before job_skills is created against it: a replace ingest leaves no id to reference
+        _check_jobs_table(insp)
+    if missing_tables and engine.dialect.name == "postgresql":
+        print(f"🛠 Creating {', '.join(missing_tables)} from sql/schema.sql ...")
+        with engine.begin() as conn:
+            conn.exec_driver_sql(SCHEMA_PATH.read_text(encoding="utf-8"))
+        _check_jobs_table(inspect(engine))
+        return True
+    if "linkedin_jobs" in missing_tables:
+        raise RuntimeError("Table 'linkedin_jobs' does not exist; create it from sql/schema.sql first")
+    if missing_tables:
+        print(f"⚠️ WARNING: no {', '.join(missing_tables)} table; job skills are not synced (prefilter mode needs them)")
+        return False
+    return True
+
+def _job_frame(chunk, first_seq):
+    """Scraper/CSV columns -> JOB_COLUMNS (lowercase) plus a running `seq`; NaN -> NULL."""
+    frame = chunk.rename(columns=str.lower).reindex(columns=JOB_COLUMNS)
+    frame = frame.astype(object).where(frame.notna(), None)
+    frame.insert(0, "seq", range(first_seq, first_seq + len(frame)))
+    return frame
+
+# PostgreSQL drivers whose cursors can COPY: psycopg2 (copy_expert) and psycopg 3 (cursor.copy)
+COPY_DRIVERS = ("psycopg2", "psycopg")
+
+def _stage_copy(conn, frame):
+    """PostgreSQL with psycopg2 or psycopg 3: stream the chunk in with COPY."""
+    buf = io.StringIO()
+    frame.to_csv(buf, index=False, header=False)
+    buf.seek(0)
+    cols = ", ".join(frame.columns)
+    copy = f"COPY {STAGE_TABLE} ({cols}) FROM STDIN WITH (FORMAT csv)"
+    with conn.connection.cursor() as cur:
+        if conn.dialect.driver == "psycopg2":
+            cur.copy_expert(copy, buf)
+        else:
+            with cur.copy(copy) as pipe:
+                pipe.write(buf.getvalue())
+
+def _stage_insert(conn, frame):
+    """Other databases and drivers (e.g. SQLite in development, pg8000): batched INSERT."""
+    cols = list(frame.columns)
+    conn.execute(
+        text(f"INSERT INTO {STAGE_TABLE} ({', '.join(cols)}) VALUES ({', '.join(':' + c for c in cols)})"),
+        frame.to_dict("records"),
+    )
+
+def sync_job_skills(conn, jobs) -> int:
+    """
+    Rewrite the job_skills links of `jobs` ((id, skills_required) pairs),
+    adding new names to the skills dictionary. Returns the links written.
+    """
+    links = {(int(job_id), s) for job_id, value in jobs for s in split_skills(value)}
+    names = sorted({s for _, s in links})
+    ids = {}
+    if names:
+        conn.execute(text("INSERT INTO skills (name) VALUES (:name) ON CONFLICT (name) DO NOTHING"),
+                     [{"name": n} for n in names])
+        query = text("SELECT name, id FROM skills WHERE name IN :names").bindparams(bindparam("names", expanding=True))
+        ids = dict(conn.execute(query, {"names": names}).all())
+    job_ids = sorted({int(job_id) for job_id, _ in jobs})
+    if job_ids:
+        conn.execute(text("DELETE FROM job_skills WHERE job_id IN :ids").bindparams(bindparam("ids", expanding=True)),
+                     {"ids": job_ids})
+    if links:
+        conn.execute(text("INSERT INTO job_skills (job_id, skill_id) VALUES (:job_id, :skill_id)"),
+                     [{"job_id": j, "skill_id": ids[s]} for j, s in sorted(links)])
+    return len(links)
+
+def _sync_skills(conn, query) -> int:
+    """sync_job_skills over the (id, skills_required) rows of `query`, INGEST_CHUNK_ROWS jobs at a time."""
+    rows = conn.execute(text(query)).all()
+    return sum(
+        sync_job_skills(conn, rows[i:i + INGEST_CHUNK_ROWS]) for i in range(0, len(rows), INGEST_CHUNK_ROWS)
+    )
+
+def upsert_jobs(engine, chunks, sync_skills=True):
+    """
+    Stage `chunks` in a temp table and merge them into linkedin_jobs by url.
+    Only new or changed rows are written (with a fresh loaded_at); ids of
+    existing jobs are kept. With `sync_skills`, the job_skills links of the
+    written rows are rebuilt in the same transaction (of every row, while
+    job_skills is still empty). Returns the row counts.
+    """
+    same = " AND ".join(f"j.{c} IS NOT DISTINCT FROM {DELTA_TABLE}.{c}" for c in JOB_COLUMNS)
+    with engine.begin() as conn:
+        copies = conn.dialect.name == "postgresql" and conn.dialect.driver in COPY_DRIVERS
+        stage = _stage_copy if copies else _stage_insert
+        for table in (STAGE_TABLE, DELTA_TABLE):
+            conn.execute(text(f"DROP TABLE IF EXISTS {table}"))
+        conn.execute(text(f"CREATE TEMP TABLE {STAGE_TABLE} (seq BIGINT, {', '.join(c + ' TEXT' for c in JOB_COLUMNS)})"))
+
+        # 1. Stream everything into the staging table
+        read = 0
+        for chunk in chunks:
+            frame = _job_frame(chunk, read)
+            read += len(frame)
+            stage(conn, frame)
 
-def ingest_data():
+        # 2. One row per url (the last one read)
+        conn.execute(text(f"""
+            CREATE TEMP TABLE {DELTA_TABLE} AS
+            SELECT s.* FROM {STAGE_TABLE} s
+            JOIN (SELECT url, MAX(seq) AS seq FROM {STAGE_TABLE} WHERE url IS NOT NULL GROUP BY url) last
+              ON last.seq = s.seq
+        """))
+        staged = conn.execute(text(f"SELECT COUNT(*) FROM {DELTA_TABLE}")).scalar()
+
+        # 3. Drop rows identical to what is stored; what is left is the delta
+        conn.execute(text(f"""
+            DELETE FROM {DELTA_TABLE} WHERE EXISTS (
+                SELECT 1 FROM linkedin_jobs j WHERE j.url = {DELTA_TABLE}.url AND {same}
+            )
+        """))
+        changed = conn.execute(text(f"SELECT COUNT(*) FROM {DELTA_TABLE}")).scalar()
+        updated = conn.execute(text(
+            f"SELECT COUNT(*) FROM {DELTA_TABLE} d WHERE EXISTS (SELECT 1 FROM linkedin_jobs j WHERE j.url = d.url)"
+        )).scalar()
+
+        # 4. Merge: insert new urls, update changed ones in place (ids stay)
+        cols = ", ".join(JOB_COLUMNS)
+        updates = ", ".join(f"{c} = excluded.{c}" for c in JOB_COLUMNS if c != "url")
+        # loaded_at comes from the database clock, the one refresh watermarks are compared with
+        conn.execute(text(f"""
+            INSERT INTO linkedin_jobs ({cols}, loaded_at)
+            SELECT {cols}, CURRENT_TIMESTAMP FROM {DELTA_TABLE} WHERE true
+            ON CONFLICT (url) DO UPDATE SET {updates}, loaded_at = excluded.loaded_at
+        """))
+
+        # 5. Normalized skills of the written jobs (the first sync backfills the whole table)
+        links = 0
+        if sync_skills:
+            backfill = conn.execute(text("SELECT 1 FROM job_skills LIMIT 1")).first() is None
+            links = _sync_skills(conn, "SELECT id, skills_required FROM linkedin_jobs" if backfill else
+                                 f"SELECT id, skills_required FROM linkedin_jobs WHERE url IN (SELECT url FROM {DELTA_TABLE})")
+        for table in (STAGE_TABLE, DELTA_TABLE):
+            conn.execute(text(f"DROP TABLE {table}"))
+
+    return {
+        "read": read,
+        "inserted": changed - updated,
+        "updated": updated,
+        "unchanged": staged - changed,
+        "skipped": read - staged,  # repeated or missing urls
+        "skill_links": links,
+    }
+
+def ingest_data(mode=INGEST_MODE, source="auto"):
+    print("🔌 Connecting to Database...")
+    engine = create_engine(DB_URL)
+    with engine.connect() as conn:
+        conn.execute(text("SELECT 1"))
+        print("✅ Database connection successful.")
+
+    if mode == "replace":
+        if not replace_jobs(engine):
+            return
+    else:
+        try:
+            sync_skills = check_schema(engine)
+            counts = ingest_upsert(engine, source, sync_skills)
+        except Exception as e:
+            print(f"❌ CRITICAL ERROR during ingestion: {e}")
+            return
+        if counts is None or not (counts["inserted"] or counts["updated"]):
+            print("Nothing changed; embeddings and snapshot are left as they are.")
+            return
+
+    # Build from what the API will load (with DB ids), not the raw CSV
+    if BUILD_EMBEDDINGS or BUILD_SNAPSHOT:
+        loaded = pd.read_sql("SELECT * FROM linkedin_jobs", engine)
+    if BUILD_EMBEDDINGS:
+        try:
+            build_embeddings(loaded)
+        except Exception as e:
+            print(f"⚠️ WARNING: Could not build embeddings (semantic mode stays on the old ones): {e}")
+    if BUILD_SNAPSHOT:
+        try:
+            build_snapshot(loaded)
+        except Exception as e:
+            print(f"⚠️ WARNING: Could not build the index snapshot (the API will load from the DB): {e}")
+
+def ingest_upsert(engine, source, sync_skills=True):
+    """Upsert from the scraper's not-yet-ingested runs ("segments") or the whole CSV."""
+    store = ScrapeStore(SCRAPE_DIR)
+    if source == "auto":
+        with engine.connect() as conn:
+            has_rows = conn.execute(text("SELECT 1 FROM linkedin_jobs LIMIT 1")).first() is not None
+        # Segments only hold what the scraper added since; the first load needs the full history
+        source = "segments" if has_rows and store.state_path.exists() else "csv"
+
+    if source == "segments":
+        run_ids = store.pending_ingest()
+        if not run_ids:
+            print("📭 No new scraper runs to ingest.")
+            return None
+        print(f"📖 Upserting {len(run_ids)} scraper run(s) from {store.segments_dir} ...")
+        read = lambda: segment_chunks(store, run_ids)
+    else:
+        if not CSV_PATH.exists():
+            print(f"❌ ERROR: CSV file not found at {CSV_PATH}")
+            print("   Please run 'python scripts/linkedin_scraper.py' first.")
+            return None
+        print(f"📖 Upserting {CSV_PATH} ...")
+        run_ids = store.state["exported"]  # already in the CSV
+        read = csv_chunks
+
+    chunks = dedup_chunks(engine, read) if DEDUP else read()
+    counts = upsert_jobs(engine, chunks, sync_skills)
+    if run_ids:
+        store.mark_ingested(run_ids)
+    print(f"🎉 SUCCESS: read {counts['read']} rows -> {counts['inserted']} inserted, {counts['updated']} updated, "
+          f"{counts['unchanged']} unchanged, {counts['skipped']} skipped (repeated or missing URL); "
+          f"{counts['skill_links']} job skills synced")
+    return counts
+
+def replace_jobs(engine):
+    """The old full reload: drops linkedin_jobs (ids, constraints, loaded_at) and re-inserts the CSV."""
     print(f"📂 Looking for data at: {CSV_PATH}")
 
     if not CSV_PATH.exists():
         print(f"❌ ERROR: CSV file not found at {CSV_PATH}")
         print("   Please run 'python scripts/linkedin_scraper.py' first.")
-        return
+        return False
 
     try:
         # Read CSV
         print("📖 Reading CSV file...")
         jobs = pd.read_csv(CSV_PATH)
         print(f"✅ CSV Loaded Successfully. Rows: {len(jobs)}")
-        
+
         if len(jobs) < 100:
             print("⚠️ WARNING: CSV has very few rows. Did the scraper finish?")
 
-        # Connect to DB
-        print("🔌 Connecting to Database...")
-        engine = create_engine(DB_URL)
-        
-        # Test Connection
-        with engine.connect() as conn:
-            conn.execute(text("SELECT 1"))
-            print("✅ Database connection successful.")
-
         # Ingest Data
         print("🚀 Uploading data to 'linkedin_jobs' table...")
-        # 'replace' drops the table if it exists and creates a new one
+        # 'replace' drops the table if it exists and creates a new one; job_skills
+        # references its ids, so it goes too (the next upsert ingest rebuilds it)
+        with engine.begin() as conn:
+            conn.execute(text("DROP TABLE IF EXISTS job_skills"))
         jobs.to_sql("linkedin_jobs", engine, if_exists="replace", index=False)
-        
+
         print("🎉 SUCCESS: Data ingestion complete.")
         print(f"   Total Jobs in DB: {len(jobs)}")
+        return True
 
     except Exception as e:
         print(f"❌ CRITICAL ERROR during ingestion: {e}")
+        return False
 
 if __name__ == "__main__":
-    ingest_data()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Load scraped jobs into the linkedin_jobs table.")
+    parser.add_argument("--mode", choices=["upsert", "replace"], default=INGEST_MODE)
+    parser.add_argument("--source", choices=["auto", "segments", "csv"], default="auto",
+                        help="upsert input: new scraper runs, the whole CSV, or segments once the table has data")
+    args = parser.parse_args()
+    ingest_data(args.mode, args.source)
@@ -1,14 +1,20 @@
+import argparse
 import requests
-import pandas as pd
 import time
 import random
-from bs4 import BeautifulSoup
-import re
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
 import os
+import sys
 
 # --- SETUP PATHS ---
 ROOT_DIR = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT_DIR))
+from app.skills import SkillMatcher, load_skills_vocab
+from scripts.html_extract import EXTRACTORS, SCRAPER_PARSER, get_extractor
+from scripts.scrape_http import SCRAPER_BURST, SCRAPER_RATE, PoliteSession
+from scripts.scrape_store import SCRAPE_DIR, ScrapeStore, job_key
+
 DATA_DIR = ROOT_DIR / "data"
 DATA_DIR.mkdir(exist_ok=True)
 
@@ -18,6 +24,8 @@ OUTPUT_CSV = DATA_DIR / "linkedin_jobs_india.csv"
 # --- CONFIGURATION: UNIVERSAL INDIA SEARCH ---
 LOCATION = "India"
 MAX_PAGES_PER_ROLE = 1 
+# Concurrent mode: threads sharing one pooled session (rate limits are in scrape_http)
+SCRAPER_WORKERS = int(os.getenv("SCRAPER_WORKERS", "8"))
 
 # THE MEGA LIST (55+ Roles for Maximum Diversity)
 JOB_ROLES = [
@@ -49,7 +57,8 @@ JOB_ROLES = [
     "Food Technologist", "Environmental Scientist", "Lab Technician"
 ]
 
-BASE_URL = "https://www.linkedin.com/jobs-guest/jobs/api/seeMoreJobPostings/search"
+# Overridable so the scraper can run against scripts/stub_linkedin_server.py
+BASE_URL = os.getenv("LINKEDIN_BASE_URL", "https://www.linkedin.com/jobs-guest/jobs/api/seeMoreJobPostings/search")
 
 HEADERS = {
     "User-Agent": (
@@ -64,97 +73,68 @@ def load_skill_vocab():
     if not SKILL_DICT_PATH.exists():
         print(f"[WARN] skills_dict.txt not found at: {SKILL_DICT_PATH}")
         return []
-    with SKILL_DICT_PATH.open("r", encoding="utf-8") as f:
-        return [s.strip().lower() for s in f.readlines() if s.strip()]
+    return load_skills_vocab(str(SKILL_DICT_PATH))
+
+extractor = get_extractor(SCRAPER_PARSER)  # see scripts/html_extract.py
 
 skills_vocab = load_skill_vocab()
+skill_matcher = SkillMatcher(skills_vocab)
 print(f"Loaded {len(skills_vocab)} skills from dictionary")
 
 def extract_skills_from_text(text: str) -> str:
     if not isinstance(text, str) or not text.strip():
         return ""
-    text_low = text.lower()
-    found = []
-    for skill in skills_vocab:
-        if re.search(r"\b" + re.escape(skill) + r"\b", text_low):
-            found.append(skill)
-    return ";".join(sorted(set(found)))
-
-def fetch_page(query: str, start: int) -> str | None:
+    return ";".join(skill_matcher.find_all(text))
+
+def http_get(url: str, params=None, http: PoliteSession | None = None) -> requests.Response:
+    """Through the shared session when given (rate limit + retries), else a bare request."""
+    if http is not None:
+        return http.get(url, params=params)
+    res = requests.get(url, params=params, headers=HEADERS, timeout=10)
+    res.raise_for_status()
+    return res
+
+def fetch_page(query: str, start: int, http: PoliteSession | None = None, base_url: str = BASE_URL) -> str | None:
     params = {"keywords": query, "location": LOCATION, "start": start}
     try:
-        res = requests.get(BASE_URL, params=params, headers=HEADERS, timeout=10)
-        res.raise_for_status()
-        return res.text
+        return http_get(base_url, params, http).text
     except Exception as e:
         print(f"[ERROR] Fetching {query} (start={start}): {e}")
         return None
 
 def parse_job_list(html: str):
-    soup = BeautifulSoup(html, "html.parser")
-    cards = soup.find_all("li")
     jobs = []
-    for card in cards:
-        try:
-            title_tag = card.find("h3", {"class": "base-search-card__title"})
-            company_tag = card.find("h4", {"class": "base-search-card__subtitle"})
-            loc_tag = card.find("span", {"class": "job-search-card__location"})
-            link_tag = card.find("a", {"class": "base-card__full-link"})
-            
-            if title_tag and link_tag:
-                jobs.append({
-                    "Title": title_tag.get_text(strip=True),
-                    "Company": company_tag.get_text(strip=True) if company_tag else "Unknown",
-                    "Location": loc_tag.get_text(strip=True) if loc_tag else "India",
-                    "URL": link_tag["href"]
-                })
-        except:
-            continue
+    for card in extractor.cards(html):
+        jobs.append({
+            "Title": card["title"],
+            "Company": card["company"] if card["company"] is not None else "Unknown",
+            "Location": card["location"] if card["location"] is not None else "India",
+            "URL": card["url"]
+        })
     return jobs
 
-def fetch_job_description(url: str) -> str:
+def fetch_job_description(url: str, http: PoliteSession | None = None) -> str:
     if not url: return ""
     try:
-        res = requests.get(url, headers=HEADERS, timeout=10)
-        res.raise_for_status()
-        soup = BeautifulSoup(res.text, "html.parser")
-        desc_div = soup.find("div", class_="show-more-less-html__markup")
-        if desc_div:
-            return desc_div.get_text(separator=" ", strip=True)
+        res = http_get(url, http=http)
+        return extractor.description(res.text)
     except:
         pass
     return ""
 
-def scrape_universal_jobs():
-    print(f"🚀 Starting Universal Scraper for {len(JOB_ROLES)} Roles...")
-    
-    # 1. LOAD EXISTING DATA (Smart Appending)
-    existing_urls = set()
-    all_rows = []
-    
-    if OUTPUT_CSV.exists():
-        try:
-            df_existing = pd.read_csv(OUTPUT_CSV)
-            all_rows = df_existing.to_dict('records')
-            existing_urls = set(df_existing["URL"].tolist())
-            print(f"Loaded {len(all_rows)} existing jobs. Searching for fresh ones...")
-        except Exception as e:
-            print(f"Could not load existing CSV (starting fresh): {e}")
-            all_rows = []
-
-    # 2. SCRAPE NEW JOBS
-    random.shuffle(JOB_ROLES) # Shuffle to vary requests and avoid pattern detection
-    
-    for i, role in enumerate(JOB_ROLES):
-        print(f"[{i+1}/{len(JOB_ROLES)}] Searching: {role}")
+def scrape_sequential(roles, store, base_url=BASE_URL):
+    """The original one-request-at-a-time crawl with fixed sleeps; jobs added to `store`."""
+    added = 0
+    for i, role in enumerate(roles):
+        print(f"[{i+1}/{len(roles)}] Searching: {role}")
         
-        for page in range(MAX_PAGES_PER_ROLE):
+        for page in store.pages_todo(role):
             start = page * 25
-            html = fetch_page(role, start)
+            html = fetch_page(role, start, base_url=base_url)
             if not html: continue
             
             new_jobs = parse_job_list(html)
-            unique_new_jobs = [j for j in new_jobs if j["URL"] not in existing_urls]
+            unique_new_jobs = [j for j in new_jobs if j["URL"] not in store]
             
             print(f"   found {len(new_jobs)} listings -> {len(unique_new_jobs)} are new")
             
@@ -163,21 +143,127 @@ def scrape_universal_jobs():
                 job['Description'] = desc
                 job['skills_required'] = extract_skills_from_text(desc)
                 
-                all_rows.append(job)
-                existing_urls.add(job['URL'])
+                added += store.add(job)
                 
                 # Random sleep to mimic human behavior
                 time.sleep(random.uniform(0.8, 1.8))
             
+            store.page_done(role, page)
             time.sleep(1) # Pause between pages
+    return added
 
-    # 3. SAVE UPDATED DATABASE
-    df_final = pd.DataFrame(all_rows)
-    df_final.drop_duplicates(subset=["URL"], inplace=True)
-    df_final.to_csv(OUTPUT_CSV, index=False, encoding="utf-8-sig")
-    
-    print(f"\n✅ SUCCESS: Database updated. Total Jobs: {len(df_final)}")
-    print(f"   Saved to: {OUTPUT_CSV}")
+def scrape_concurrent(roles, store, workers=SCRAPER_WORKERS, rate=SCRAPER_RATE, burst=SCRAPER_BURST,
+                      base_url=BASE_URL):
+    """
+    Same crawl on a thread pool. All requests share one keep-alive session
+    and a per-host token bucket (instead of the fixed sleeps), and 429/5xx
+    are retried with backoff. Jobs reach `store` as their descriptions come
+    in, and a search page is checkpointed once all its jobs are on disk. On
+    Ctrl-C or an error the queued fetches are cancelled, not waited for.
+    """
+    http = PoliteSession(rate=rate, burst=burst, pool_size=workers, headers=HEADERS)
+    pool = ThreadPoolExecutor(max_workers=workers)
+    added = 0
+    try:
+        # 1. Every search page at once; parse each as soon as it is in and queue its descriptions
+        searches = {pool.submit(fetch_page, role, page * 25, http, base_url): (role, page)
+                    for role in roles for page in store.pages_todo(role)}
+        descriptions = {}
+        unwritten = {}  # (role, page) -> jobs of that page not on disk yet
+        queued = set()
+        for search in as_completed(searches):
+            role, page = searches[search]
+            html = search.result()
+            if not html: continue
+            new_jobs = parse_job_list(html)
+            unique_new_jobs = []
+            for job in new_jobs:
+                key = job_key(job["URL"])
+                if key in queued or job["URL"] in store: continue
+                queued.add(key)
+                unique_new_jobs.append(job)
+            print(f"   {role}: found {len(new_jobs)} listings -> {len(unique_new_jobs)} are new")
+            if not unique_new_jobs:
+                store.page_done(role, page)
+            unwritten[(role, page)] = len(unique_new_jobs)
+            for job in unique_new_jobs:
+                descriptions[pool.submit(fetch_job_description, job["URL"], http)] = (role, page, job)
+
+        # 2. Write each job as soon as its description is in; checkpoint a page once all its jobs are on disk
+        for desc in as_completed(descriptions):
+            role, page, job = descriptions[desc]
+            job['Description'] = desc.result()
+            job['skills_required'] = extract_skills_from_text(job['Description'])
+            added += store.add(job)
+            unwritten[(role, page)] -= 1
+            if not unwritten[(role, page)]:
+                store.page_done(role, page)
+        pool.shutdown()
+    except BaseException:
+        # Only the fetches already running finish (closing the session cuts their retries short)
+        pool.shutdown(wait=False, cancel_futures=True)
+        raise
+    finally:
+        http.close()
+
+    stats = dict(http.stats)
+    print(f"   HTTP: {stats.get('requests', 0)} requests, {stats.get('retries', 0)} retries, "
+          f"{stats.get('failed', 0)} failed")
+    return added
+
+def scrape_universal_jobs(sequential=False, workers=SCRAPER_WORKERS, rate=SCRAPER_RATE, burst=SCRAPER_BURST,
+                          max_roles=None, pages=MAX_PAGES_PER_ROLE, output=OUTPUT_CSV, base_url=BASE_URL,
+                          scrape_dir=SCRAPE_DIR, restart=False):
+    # 1. OPEN THE RUN (dedup index instead of loading the CSV; resumes an interrupted run)
+    output = Path(output)
+    store = ScrapeStore(scrape_dir, bootstrap_csv=output)
+    print(f"{len(store.seen)} jobs already scraped. Searching for fresh ones...")
+    roles = list(JOB_ROLES)
+    random.shuffle(roles) # Shuffle to vary requests and avoid pattern detection
+    roles = roles[:max_roles] if max_roles else roles
+    roles = store.start_run(roles, pages, restart=restart)
+    mode = "sequential" if sequential else f"concurrent ({workers} workers, {rate:g} req/s per host)"
+    print(f"🚀 Starting Universal Scraper for {len(roles)} Roles, {mode}...")
+
+    # 2. SCRAPE NEW JOBS (each one is on disk as soon as it is fetched)
+    t0 = time.perf_counter()
+    try:
+        if sequential:
+            added = scrape_sequential(roles, store, base_url)
+        else:
+            added = scrape_concurrent(roles, store, workers, rate, burst, base_url)
+    except BaseException:
+        store.close()
+        print(f"[WARN] Run {store.run['run_id']} interrupted; rerun to resume it")
+        raise
+    store.finish()
+    print(f"   scraped {added} new jobs in {time.perf_counter() - t0:.1f}s")
+
+    # 3. APPEND FINISHED RUNS TO THE CSV
+    exported = store.export_csv(output)
+    print(f"\n✅ SUCCESS: Database updated. {exported} new jobs appended.")
+    print(f"   Saved to: {output}")
+
+def positive_float(value):
+    """argparse type for --rate: a token bucket cannot refill at 0 or less per second."""
+    rate = float(value)
+    if not rate > 0:
+        raise argparse.ArgumentTypeError(f"must be positive, got {value}")
+    return rate
 
 if __name__ == "__main__":
-    scrape_universal_jobs()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Scrape LinkedIn guest job listings into the jobs CSV.")
+    parser.add_argument("--sequential", action="store_true", help="one request at a time with fixed sleeps (legacy)")
+    parser.add_argument("--workers", type=int, default=SCRAPER_WORKERS)
+    parser.add_argument("--rate", type=positive_float, default=SCRAPER_RATE, help="requests per second per host")
+    parser.add_argument("--burst", type=int, default=SCRAPER_BURST)
+    parser.add_argument("--roles", type=int, default=None, help="only scrape this many (shuffled) roles")
+    parser.add_argument("--pages", type=int, default=MAX_PAGES_PER_ROLE, help="search pages per role")
+    parser.add_argument("--output", default=str(OUTPUT_CSV))
+    parser.add_argument("--scrape-dir", default=str(SCRAPE_DIR), help="segments, dedup index and checkpoints")
+    parser.add_argument("--parser", choices=sorted(EXTRACTORS), default=SCRAPER_PARSER, help="HTML extraction backend")
+    parser.add_argument("--restart", action="store_true", help="close an interrupted run instead of resuming it")
+    args = parser.parse_args()
+    extractor = get_extractor(args.parser)
+    scrape_universal_jobs(args.sequential, args.workers, args.rate, args.burst, args.roles, args.pages, args.output,
+                          scrape_dir=args.scrape_dir, restart=args.restart)
@@ -0,0 +1,140 @@
+"""
+Shared HTTP plumbing for the scrapers: one pooled `requests.Session`, a
+per-host token-bucket rate limiter, and retry with backoff on 429/5xx.
+"""
+import os
+import random
+import threading
+import time
+from collections import Counter
+from typing import Dict, Optional
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+# --- Politeness defaults (per host) ---
+SCRAPER_RATE = float(os.getenv("SCRAPER_RATE", "2.0"))  # requests per second
+SCRAPER_BURST = int(os.getenv("SCRAPER_BURST", "4"))
+SCRAPER_RETRIES = int(os.getenv("SCRAPER_RETRIES", "4"))
+SCRAPER_BACKOFF = float(os.getenv("SCRAPER_BACKOFF", "1.0"))  # seconds, doubled per attempt
+# Longest wait before a retry, whether from the backoff or a server's Retry-After
+SCRAPER_MAX_DELAY = float(os.getenv("SCRAPER_MAX_DELAY", "60"))
+SCRAPER_TIMEOUT = float(os.getenv("SCRAPER_TIMEOUT", "10"))
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class TokenBucket:
+    """
+    Allows `rate` acquisitions per second on average and bursts of up to
+    `burst`. `acquire` blocks the calling thread until a token is free.
+    """
+
+    def __init__(self, rate: float, burst: int):
+        if not rate > 0:
+            raise ValueError(f"rate must be positive, got {rate}")
+        self.rate = rate
+        self.capacity = max(1, burst)
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+class PoliteSession:
+    """
+    Thread-safe GET client shared by all scraper workers.
+
+    Connections are pooled (keep-alive) through a single Session, every
+    request first takes a token from its host's bucket, and 429/5xx or
+    connection errors are retried with exponential backoff (honouring
+    Retry-After), never waiting more than `max_delay` seconds. `stats` counts requests, retries and failures. After
+    `close`, requests waiting to retry give up instead of sleeping on.
+    """
+
+    def __init__(self, rate: float = SCRAPER_RATE, burst: int = SCRAPER_BURST, pool_size: int = 16,
+                 retries: int = SCRAPER_RETRIES, backoff: float = SCRAPER_BACKOFF,
+                 timeout: float = SCRAPER_TIMEOUT, headers: Optional[Dict] = None,
+                 max_delay: float = SCRAPER_MAX_DELAY):
+        self.rate = rate
+        self.burst = burst
+        self.retries = retries
+        self.backoff = backoff
+        self.max_delay = max_delay
+        self.timeout = timeout
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        if headers:
+            self.session.headers.update(headers)
+        self.stats = Counter()
+        self._buckets: Dict[str, TokenBucket] = {}
+        self._lock = threading.Lock()
+        self._closed = threading.Event()
+
+    def _bucket(self, url: str) -> TokenBucket:
+        host = urlsplit(url).netloc
+        with self._lock:
+            bucket = self._buckets.get(host)
+            if bucket is None:
+                bucket = self._buckets[host] = TokenBucket(self.rate, self.burst)
+            return bucket
+
+    def _count(self, key: str):
+        with self._lock:
+            self.stats[key] += 1
+
+    def get(self, url: str, params: Optional[Dict] = None) -> requests.Response:
+        """GET with rate limiting and retries; raises once retries are exhausted."""
+        bucket = self._bucket(url)
+        for attempt in range(self.retries + 1):
+            if self._closed.is_set():
+                raise requests.ConnectionError("Session closed")
+            bucket.acquire()
+            self._count("requests")
+            last = attempt == self.retries
+            try:
+                res = self.session.get(url, params=params, timeout=self.timeout)
+            except requests.RequestException:
+                res = None
+                if last:
+                    self._count("failed")
+                    raise
+            else:
+                if res.status_code not in RETRY_STATUSES:
+                    res.raise_for_status()
+                    return res
+                self._count(f"status_{res.status_code}")
+                if last:
+                    self._count("failed")
+                    res.raise_for_status()
+            self._count("retries")
+            self._closed.wait(self._retry_delay(res, attempt))
+
+    def _retry_delay(self, res: Optional[requests.Response], attempt: int) -> float:
+        delay = self.backoff * (2 ** attempt) * random.uniform(0.5, 1.0)
+        retry_after = res.headers.get("Retry-After") if res is not None else None
+        if retry_after:
+            try:
+                delay = max(float(retry_after), 0.0)
+            except ValueError:
+                pass
+        # A huge Retry-After would otherwise park a worker thread for as long as the server asks
+        return min(delay, self.max_delay)
+
+    def close(self):
+        self._closed.set()
+        self.session.close()
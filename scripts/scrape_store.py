@@ -0,0 +1,277 @@
+"""
+Crash-safe, append-only output for the scrapers.
+
+Every scraped job is appended to the run's JSONL segment as soon as it is
+fetched, and its key to a persistent dedup index, so neither the old CSV
+nor the new rows are ever held in memory. Per-role page checkpoints let a
+rerun after a crash pick up the same run where it stopped. Finished runs
+are appended to the CSV, and `ingest_data.py` can load just the runs it
+has not seen yet.
+
+    data/scraped/
+      segments/<run_id>.jsonl   one job per line
+      seen_jobs.txt             dedup index, one job key per line
+      state.json                current run checkpoint + finished/exported/ingested runs
+"""
+import json
+import os
+import re
+import time
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional
+
+import pandas as pd
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+SCRAPE_DIR = Path(os.getenv("SCRAPE_DIR", str(ROOT_DIR / "data" / "scraped")))
+# Rows per chunk when appending segments to the CSV
+EXPORT_CHUNK_ROWS = 1000
+
+# LinkedIn job URLs end in the posting ID: /jobs/view/<slug>-4341653305?trackingId=...
+_JOB_ID_RE = re.compile(r"/jobs/view/(?:[^/?#]*-)?(\d+)/?(?:[?#]|$)")
+
+
+def job_key(url: str) -> str:
+    """Dedup key for a job URL: the posting ID, else the URL without its (tracking) query."""
+    m = _JOB_ID_RE.search(url)
+    return m.group(1) if m else url.split("?", 1)[0].split("#", 1)[0]
+
+
+def _write_json(path: Path, data: Dict):
+    """Atomic: readers (and a crash) see either the old file or the new one."""
+    tmp = path.with_suffix(".tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=1)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+def _open_append(path: Path):
+    """Open for appending, first cutting off a line left half-written by a crash."""
+    if path.exists():
+        with open(path, "rb+") as f:
+            end = f.seek(0, os.SEEK_END)
+            if end:
+                f.seek(-1, os.SEEK_END)
+                if f.read(1) != b"\n":
+                    # Only the partial line is read, backwards a block at a time
+                    pos = end
+                    while pos > 0:
+                        start = max(0, pos - 64 * 1024)
+                        f.seek(start)
+                        cut = f.read(pos - start).rfind(b"\n")
+                        if cut >= 0:
+                            break
+                        pos = start
+                    f.truncate(start + cut + 1)  # no newline at all: cut is -1, start 0
+    return open(path, "a", encoding="utf-8")
+
+
+def read_segment(path: Path) -> Iterator[Dict]:
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if line.endswith("\n"):  # a trailing partial line is a crashed write
+                yield json.loads(line)
+
+
+class ScrapeStore:
+    """
+    Output of one scraper run plus the state shared across runs.
+
+    `start_run` opens a new run or resumes the unfinished one; `add` writes
+    a job unless its key was already scraped; `page_done` checkpoints a
+    search page once its jobs are on disk; `finish` closes the run and
+    `export_csv` appends the finished runs to the CSV.
+    """
+
+    def __init__(self, root: Path = SCRAPE_DIR, bootstrap_csv: Optional[Path] = None):
+        self.root = Path(root)
+        self.segments_dir = self.root / "segments"
+        self.segments_dir.mkdir(parents=True, exist_ok=True)
+        self.seen_path = self.root / "seen_jobs.txt"
+        self.state_path = self.root / "state.json"
+        self.state = self._load_state()
+        self._bootstrap_csv = bootstrap_csv
+        self._seen: Optional[set] = None
+        self.run: Optional[Dict] = None
+        self._segment = None
+        self._seen_file = None
+
+    def _load_state(self) -> Dict:
+        state = {"current": None, "finished": [], "exported": [], "ingested": [], "export_pending": None}
+        if self.state_path.exists():
+            with open(self.state_path, encoding="utf-8") as f:
+                state.update(json.load(f))
+        return state
+
+    @property
+    def seen(self) -> set:
+        """Keys of every job scraped so far (loaded on first use)."""
+        if self._seen is None:
+            self._seen = self._load_seen(self._bootstrap_csv)
+        return self._seen
+
+    def _load_seen(self, bootstrap_csv: Optional[Path]) -> set:
+        if not self.seen_path.exists():
+            # First run: index the jobs already in the CSV (URL column only)
+            keys = []
+            if bootstrap_csv is not None and Path(bootstrap_csv).exists():
+                for chunk in pd.read_csv(bootstrap_csv, usecols=["URL"], chunksize=10_000):
+                    keys += [job_key(u) for u in chunk["URL"].dropna().astype(str)]
+                print(f"Indexed {len(keys)} existing jobs from {bootstrap_csv}")
+            with open(self.seen_path, "w", encoding="utf-8") as f:
+                f.writelines(k + "\n" for k in keys)
+            return set(keys)
+        with open(self.seen_path, encoding="utf-8") as f:
+            return {line[:-1] for line in f if line.endswith("\n")}
+
+    def _segment_path(self, run_id: str) -> Path:
+        return self.segments_dir / f"{run_id}.jsonl"
+
+    def start_run(self, roles: List[str], pages: int, restart: bool = False) -> List[str]:
+        """
+        Open a run over `roles` x `pages` search pages; the roles left to do.
+        If a run was interrupted, it is resumed instead (same roles, order and pages).
+        """
+        current = self.state["current"]
+        if current is not None and restart:
+            self.state["finished"].append(current["run_id"])  # keep what it scraped
+            current = None
+        self.run = current
+        if current is not None:
+            done = sum(1 for r in current["roles"] if not self.pages_todo(r))
+            print(f"Resuming run {current['run_id']}: {done}/{len(current['roles'])} roles complete")
+            # The index may trail the segment by the rows written right before a crash
+            path = self._segment_path(current["run_id"])
+            if path.exists():
+                missing = [k for k in (job_key(r["URL"]) for r in read_segment(path)) if k not in self.seen]
+                if missing:
+                    with open(self.seen_path, "a", encoding="utf-8") as f:
+                        f.writelines(k + "\n" for k in missing)
+                    self.seen.update(missing)
+        else:
+            current = {
+                "run_id": f"{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}",
+                "started_at": time.strftime("%Y-%m-%d %H:%M:%S"),
+                "roles": list(roles),
+                "pages": pages,
+                "pages_done": {},
+            }
+            self.state["current"] = current
+            self._save_state()
+        self.run = current
+        self._segment = _open_append(self._segment_path(current["run_id"]))
+        self._seen_file = _open_append(self.seen_path)
+        return [r for r in current["roles"] if self.pages_todo(r)]
+
+    def __contains__(self, url: str) -> bool:
+        return job_key(url) in self.seen
+
+    def add(self, row: Dict) -> bool:
+        """Append a job to the run (False if it was already scraped)."""
+        key = job_key(row["URL"])
+        if key in self.seen:
+            return False
+        # Segment first: a crash in between is repaired from the segment on resume
+        self._segment.write(json.dumps(row, ensure_ascii=False) + "\n")
+        self._segment.flush()
+        self._seen_file.write(key + "\n")
+        self._seen_file.flush()
+        self.seen.add(key)
+        return True
+
+    def pages_todo(self, role: str) -> List[int]:
+        done = self.run["pages_done"].get(role, [])
+        return [p for p in range(self.run["pages"]) if p not in done]
+
+    def page_done(self, role: str, page: int):
+        """Checkpoint: every job of this search page is written."""
+        for f in (self._segment, self._seen_file):
+            os.fsync(f.fileno())
+        self.run["pages_done"].setdefault(role, []).append(page)
+        self._save_state()
+
+    def finish(self):
+        """Close the run; its segment becomes eligible for export."""
+        self.close()
+        self.state["finished"].append(self.run["run_id"])
+        self.state["current"] = None
+        self._save_state()
+
+    def close(self):
+        for f in (self._segment, self._seen_file):
+            if f is not None:
+                f.close()
+        self._segment = self._seen_file = None
+
+    def rows(self, run_id: Optional[str] = None) -> List[Dict]:
+        """All jobs of a run (default: the current/last one)."""
+        run_id = run_id or (self.run or {}).get("run_id")
+        path = self._segment_path(run_id)
+        return list(read_segment(path)) if run_id and path.exists() else []
+
+    def pending_ingest(self) -> List[str]:
+        """Finished runs not yet loaded into the database."""
+        return [r for r in self.state["finished"] if r not in self.state["ingested"]]
+
+    def run_rows(self, run_id: str) -> Iterator[Dict]:
+        return read_segment(self._segment_path(run_id))
+
+    def mark_ingested(self, run_ids: List[str]):
+        self.state["ingested"] += [r for r in run_ids if r not in self.state["ingested"]]
+        self._save_state()
+
+    def export_csv(self, csv_path: Path) -> int:
+        """
+        Append every finished, not yet exported run to `csv_path`; rows added.
+        The CSV size is recorded first, so an export cut short is rolled back
+        and redone rather than appended twice.
+        """
+        csv_path = Path(csv_path)
+        pending = self.state["export_pending"]
+        if pending is not None and csv_path.exists():
+            with open(csv_path, "rb+") as f:
+                f.truncate(pending["csv_bytes"])
+        added = 0
+        for run_id in self.state["finished"]:
+            if run_id in self.state["exported"]:
+                continue
+            self.state["export_pending"] = {"run_id": run_id, "csv_bytes": csv_path.stat().st_size if csv_path.exists() else 0}
+            self._save_state()
+            added += _append_csv(csv_path, read_segment(self._segment_path(run_id)))
+            self.state["exported"].append(run_id)
+            self.state["export_pending"] = None
+            self._save_state()
+        return added
+
+    def _save_state(self):
+        _write_json(self.state_path, self.state)
+
+
+def _append_csv(csv_path: Path, rows: Iterator[Dict]) -> int:
+    """Append rows in the CSV's own column order (header + BOM only for a new file)."""
+    columns = None
+    if csv_path.exists() and csv_path.stat().st_size > 0:
+        columns = pd.read_csv(csv_path, nrows=0, encoding="utf-8-sig").columns.tolist()
+    n = 0
+    chunk = []
+
+    def flush():
+        nonlocal columns
+        frame = pd.DataFrame(chunk)
+        new = columns is None
+        columns = columns or frame.columns.tolist()
+        frame.reindex(columns=columns).to_csv(
+            csv_path, mode="w" if new else "a", header=new, index=False, encoding="utf-8-sig" if new else "utf-8"
+        )
+        chunk.clear()
+
+    for row in rows:
+        chunk.append(row)
+        n += 1
+        if len(chunk) >= EXPORT_CHUNK_ROWS:
+            flush()
+    if chunk:
+        flush()
+    return n
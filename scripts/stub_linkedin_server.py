@@ -0,0 +1,179 @@
+"""
+Local stand-in for the LinkedIn guest endpoints the scraper uses, so its
+throughput and politeness can be tested offline.
+
+Serves fixture search-result cards at
+/jobs-guest/jobs/api/seeMoreJobPostings/search?keywords=...&start=...
+and detail pages at /jobs/view/<id>, both rendered from
+data/fixtures/linkedin/. It can add latency, enforce a server-side rate
+limit (429 + Retry-After) and inject 503s; GET /__stats reports what it saw.
+
+    python scripts/stub_linkedin_server.py --port 8765 --max-rps 20
+    LINKEDIN_BASE_URL=http://127.0.0.1:8765/jobs-guest/jobs/api/seeMoreJobPostings/search \
+        python scripts/linkedin_scraper.py --roles 5 --output /tmp/jobs.csv
+"""
+import argparse
+import html
+import json
+import random
+import threading
+import time
+import zlib
+from collections import Counter, deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, urlsplit
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+FIXTURES_DIR = ROOT_DIR / "data" / "fixtures" / "linkedin"
+SEARCH_PATH = "/jobs-guest/jobs/api/seeMoreJobPostings/search"
+VIEW_PATH = "/jobs/view/"
+
+
+class StubState:
+    """Fixtures, fault settings and request counters shared by the handler threads."""
+
+    def __init__(self, cards_per_page=25, latency=0.0, max_rps=0.0, error_rate=0.0, seed=0):
+        self.jobs = json.loads((FIXTURES_DIR / "jobs.json").read_text(encoding="utf-8"))
+        self.card_template = (FIXTURES_DIR / "search_card.html").read_text(encoding="utf-8")
+        self.page_template = (FIXTURES_DIR / "job_page.html").read_text(encoding="utf-8")
+        self.cards_per_page = cards_per_page
+        self.latency = latency
+        self.max_rps = max_rps
+        self.error_rate = error_rate
+        self.rng = random.Random(seed)
+        self.stats = Counter()
+        self.recent = deque()  # arrival times within the last second
+        self.lock = threading.Lock()
+
+    def admit(self) -> int:
+        """Count a request; the status to answer with (200, 429 or 503)."""
+        now = time.monotonic()
+        with self.lock:
+            self.stats["requests"] += 1
+            recent = self.recent
+            while recent and now - recent[0] >= 1.0:
+                recent.popleft()
+            if self.max_rps and len(recent) >= self.max_rps:
+                self.stats["status_429"] += 1
+                return 429
+            recent.append(now)
+            self.stats["peak_rps"] = max(self.stats["peak_rps"], len(recent))
+            if self.error_rate and self.rng.random() < self.error_rate:
+                self.stats["status_503"] += 1
+                return 503
+            self.stats["status_200"] += 1
+            return 200
+
+    def job_id(self, keywords: str, start: int, slot: int) -> int:
+        """Stable ID per (query, position), so reruns and both scraper modes see the same jobs."""
+        return zlib.crc32(f"{keywords}|{start + slot}".encode()) % 10**9
+
+    def search_page(self, base: str, keywords: str, start: int) -> str:
+        cards = []
+        for slot in range(self.cards_per_page):
+            job_id = self.job_id(keywords, start, slot)
+            job = self.jobs[job_id % len(self.jobs)]
+            cards.append(self.card_template.format(
+                job_id=job_id,
+                url=f"{base}{VIEW_PATH}{job_id}",
+                title=html.escape(f"{keywords} - {job['title']}"),
+                company=html.escape(job["company"]),
+                location=html.escape(job["location"]),
+            ))
+        return "\n".join(cards)
+
+    def job_page(self, job_id: int) -> str:
+        job = self.jobs[job_id % len(self.jobs)]
+        # Paragraphs of three sentences, as the real markup breaks them up
+        sentences = html.escape(job["description"]).split(". ")
+        paragraphs = [". ".join(sentences[i:i + 3]) for i in range(0, len(sentences), 3)]
+        return self.page_template.format(
+            job_id=job_id,
+            title=html.escape(job["title"]),
+            company=html.escape(job["company"]),
+            location=html.escape(job["location"]),
+            description=".<br><br>\n".join(paragraphs),
+        )
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    state: StubState = None
+    protocol_version = "HTTP/1.1"  # keep-alive, like the real site
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        state = self.state
+        if url.path == "/__stats":
+            with state.lock:
+                return self._send(200, json.dumps(dict(state.stats)), "application/json")
+
+        status = state.admit()
+        if state.latency:
+            time.sleep(state.latency)
+        if status == 429:
+            return self._send(429, "Too Many Requests", headers={"Retry-After": "1"})
+        if status == 503:
+            return self._send(503, "Service Unavailable")
+
+        if url.path == SEARCH_PATH:
+            query = parse_qs(url.query)
+            keywords = query.get("keywords", [""])[0]
+            start = int(query.get("start", ["0"])[0])
+            base = f"http://{self.headers.get('Host')}"
+            return self._send(200, state.search_page(base, keywords, start))
+        if url.path.startswith(VIEW_PATH):
+            try:
+                job_id = int(url.path[len(VIEW_PATH):])
+            except ValueError:
+                return self._send(404, "Not Found")
+            return self._send(200, state.job_page(job_id))
+        self._send(404, "Not Found")
+
+    def _send(self, status: int, body: str, content_type: str = "text/html; charset=utf-8", headers=None):
+        data = body.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        for k, v in (headers or {}).items():
+            self.send_header(k, v)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass  # one line per request drowns the scraper's own output
+
+
+def make_server(port=0, **options) -> ThreadingHTTPServer:
+    """A ready-to-serve stub on 127.0.0.1 (port 0 = any free port); `server.state` holds the stats."""
+    handler = type("Handler", (StubHandler,), {"state": StubState(**options)})
+    server = ThreadingHTTPServer(("127.0.0.1", port), handler)
+    server.daemon_threads = True
+    server.state = handler.state
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--cards", type=int, default=25, help="cards per search page")
+    parser.add_argument("--latency", type=float, default=0.05, help="seconds added to every response")
+    parser.add_argument("--max-rps", type=float, default=0.0, help="answer 429 above this rate (0 = no limit)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of requests answered 503")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    server = make_server(args.port, cards_per_page=args.cards, latency=args.latency, max_rps=args.max_rps,
+                         error_rate=args.error_rate, seed=args.seed)
+    print(f"🧪 Stub LinkedIn on http://127.0.0.1:{server.server_address[1]}{SEARCH_PATH}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        print(json.dumps(dict(server.state.stats)))
+
+
+if __name__ == "__main__":
+    main()
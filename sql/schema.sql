@@ -8,4 +8,18 @@ CREATE TABLE IF NOT EXISTS linkedin_jobs (
     description TEXT,
     skills_required TEXT,
     loaded_at TIMESTAMP DEFAULT NOW()
-);
\ No newline at end of file
+);
+-- Skills dictionary + job <-> skill links (filled at ingest from skills_required)
+CREATE TABLE IF NOT EXISTS skills (
+    id SERIAL PRIMARY KEY,
+    name TEXT UNIQUE NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS job_skills (
+    job_id INTEGER NOT NULL REFERENCES linkedin_jobs(id) ON DELETE CASCADE,
+    skill_id INTEGER NOT NULL REFERENCES skills(id),
+    PRIMARY KEY (job_id, skill_id)
+);
+
+-- Prefilter: skill ID -> jobs (the primary key covers job ID -> skills)
+CREATE INDEX IF NOT EXISTS job_skills_skill_idx ON job_skills (skill_id, job_id);
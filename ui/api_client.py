@@ -0,0 +1,274 @@
+"""
+Shared client from the front ends (ui/app.py, ui/dashboard.py) to the
+matching API.
+
+One keep-alive connection pool per process, connect and read timeouts, a
+circuit breaker that fails fast while the backend is down, and a small
+content-addressed cache: PDF text by file hash, /match results by text or
+file hash plus domain, top_k and mode. A resume analysed again is
+answered without calling the backend.
+"""
+import hashlib
+import os
+import random
+import threading
+import time
+from collections import Counter, OrderedDict
+from typing import Any, Dict, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+# The API's /match endpoint (Render sets this); the other endpoints live next to it
+API_URL = os.getenv("API_URL", "http://localhost:8000/match")
+API_BASE_URL = os.getenv("API_BASE_URL", API_URL[: -len("/match")] if API_URL.endswith("/match") else API_URL)
+API_CONNECT_TIMEOUT = float(os.getenv("API_CONNECT_TIMEOUT", "3"))
+# Long enough for a cold /match on a large PDF; a hung backend frees the worker after this
+API_READ_TIMEOUT = float(os.getenv("API_READ_TIMEOUT", "30"))
+# Retries after a refused connection or a 503 (requests are idempotent)
+API_RETRIES = int(os.getenv("API_RETRIES", "2"))
+API_POOL_SIZE = int(os.getenv("API_POOL_SIZE", "10"))
+# Consecutive failures that open the breaker, and how long it stays open
+BREAKER_FAILURES = int(os.getenv("BREAKER_FAILURES", "5"))
+BREAKER_RESET_SECONDS = float(os.getenv("BREAKER_RESET_SECONDS", "30"))
+# Cached PDF texts and /match results (0 disables)
+UI_CACHE_SIZE = int(os.getenv("UI_CACHE_SIZE", "256"))
+UI_CACHE_TTL = float(os.getenv("UI_CACHE_TTL", "600"))
+
+
+class ApiError(Exception):
+    """The API rejected the request (4xx): bad PDF, too large, no text..."""
+
+    def __init__(self, status: int, detail: str):
+        super().__init__(detail)
+        self.status = status
+        self.detail = detail
+
+
+class ApiUnavailable(Exception):
+    """The API is down, timed out, overloaded, or the breaker is open."""
+
+    def __init__(self, message: str, status: Optional[int] = None):
+        super().__init__(message)
+        self.status = status  # the 5xx the API answered, None if nothing answered
+
+
+def content_key(data: Any) -> str:
+    if isinstance(data, str):
+        data = data.encode("utf-8", "surrogatepass")
+    return hashlib.sha256(data).hexdigest()
+
+
+class CircuitBreaker:
+    """
+    Closed: requests go through. After `failures` consecutive failures it
+    opens and every request fails at once for `reset_seconds`. Then one
+    trial request is let through (half-open): success closes it again,
+    failure re-opens it.
+    """
+
+    def __init__(self, failures: int = BREAKER_FAILURES, reset_seconds: float = BREAKER_RESET_SECONDS):
+        self.failures = failures
+        self.reset_seconds = reset_seconds
+        self.consecutive = 0
+        self.opened_at: Optional[float] = None
+        self._trial: Optional[int] = None  # the thread making the half-open trial request
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self.opened_at is None:
+                return "closed"
+            return "half-open" if time.monotonic() - self.opened_at >= self.reset_seconds else "open"
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self.opened_at is None:
+                return True
+            if time.monotonic() - self.opened_at < self.reset_seconds or self._trial is not None:
+                return False
+            self._trial = threading.get_ident()  # one request probes the backend
+            return True
+
+    def success(self):
+        with self._lock:
+            self.consecutive = 0
+            self.opened_at = None
+            self._trial = None
+
+    def failure(self):
+        with self._lock:
+            self.consecutive += 1
+            if self._trial is not None or self.consecutive >= self.failures:
+                self.opened_at = time.monotonic()
+            self._trial = None
+
+    def release(self):
+        """After every request: a trial that ended in neither success() nor failure() lets the next one probe."""
+        with self._lock:
+            if self._trial == threading.get_ident():
+                self._trial = None
+
+
+class TTLCache:
+    """Small thread-safe LRU with a per-entry TTL (0 = no expiry)."""
+
+    def __init__(self, max_entries: int = UI_CACHE_SIZE, ttl_seconds: float = UI_CACHE_TTL):
+        self.max_entries = max_entries
+        self.ttl = ttl_seconds
+        self._data: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            stored_at, value = item
+            if self.ttl and time.monotonic() - stored_at > self.ttl:
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: Any):
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._data[key] = (time.monotonic(), value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def __len__(self):
+        return len(self._data)
+
+
+class MatchClient:
+    """
+    Thread-safe client for /extract, /match and /match/pdf. Share one per
+    process (`get_client()`): the Session pools connections across Flask
+    threads and Streamlit sessions.
+    """
+
+    def __init__(self, base_url: str = API_BASE_URL, connect_timeout: float = API_CONNECT_TIMEOUT,
+                 read_timeout: float = API_READ_TIMEOUT, retries: int = API_RETRIES,
+                 pool_size: int = API_POOL_SIZE, breaker: Optional[CircuitBreaker] = None,
+                 cache: Optional[TTLCache] = None):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = (connect_timeout, read_timeout)
+        self.retries = retries
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.breaker = breaker or CircuitBreaker()
+        self.cache = cache or TTLCache()
+        self.stats = Counter()
+        self._lock = threading.Lock()
+
+    def _count(self, key: str):
+        with self._lock:
+            self.stats[key] += 1
+
+    def _post(self, path: str, **kwargs) -> Dict:
+        """POST with timeouts, retries and the breaker; returns the JSON body."""
+        for attempt in range(self.retries + 1):
+            if not self.breaker.allow():
+                self._count("short_circuited")
+                raise ApiUnavailable("The matching service is unavailable; retrying shortly")
+            self._count("requests")
+            try:
+                res = self.session.post(self.base_url + path, timeout=self.timeout, **kwargs)
+            except requests.ConnectionError as e:
+                # Nothing reached the backend: safe to try again
+                self.breaker.failure()
+                error = ApiUnavailable(f"Could not connect to the matching service: {e}")
+                delay = 0.2 * (2 ** attempt)
+            except requests.Timeout:
+                self.breaker.failure()
+                raise ApiUnavailable(f"The matching service did not answer within {self.timeout[1]:g}s")
+            else:
+                if res.status_code < 400:
+                    self.breaker.success()
+                    return res.json()
+                if res.status_code < 500:
+                    self.breaker.success()  # the backend is healthy, the input is not
+                    raise ApiError(res.status_code, _detail(res))
+                self.breaker.failure()
+                error = ApiUnavailable(f"The matching service answered {res.status_code}: {_detail(res)}",
+                                       res.status_code)
+                if res.status_code != 503:
+                    raise error
+                delay = min(float(res.headers.get("Retry-After") or 1), 2.0)
+            finally:
+                self.breaker.release()
+            if attempt == self.retries:
+                self._count("failed")
+                raise error
+            self._count("retries")
+            time.sleep(delay * random.uniform(0.5, 1.0))
+
+    def _cached(self, key: str, fetch) -> Dict:
+        hit = self.cache.get(key)
+        if hit is not None:
+            self._count("cache_hits")
+            return hit
+        self._count("cache_misses")
+        value = fetch()
+        self.cache.set(key, value)
+        return value
+
+    def extract(self, pdf: bytes) -> str:
+        """Text of a PDF (POST /extract)."""
+        return self._cached(f"text:{content_key(pdf)}", lambda: self._post(
+            "/extract", data=pdf, headers={"Content-Type": "application/pdf"})["text"])
+
+    def match(self, cv_text: str, top_k: int = 5, domain: Optional[str] = None, mode: str = "keyword") -> Dict:
+        """POST /match for a CV's text."""
+        body = {"cv_text": cv_text, "top_k": top_k, "domain": domain, "mode": mode}
+        key = f"match:{content_key(cv_text)}:{top_k}:{domain}:{mode}"
+        return self._cached(key, lambda: self._post("/match", json=body))
+
+    def more(self, cursor: str, cv_text: Optional[str] = None, top_k: int = 5) -> Dict:
+        """The next page of a /match or /match/pdf result (its `next_cursor`); not cached."""
+        body = {"cursor": cursor, "top_k": top_k, "cv_text": cv_text}
+        return self._post("/match", json=body)
+
+    def match_pdf(self, pdf: bytes, top_k: int = 5, domain: Optional[str] = None, mode: str = "keyword") -> Dict:
+        """POST /match/pdf for a resume file."""
+        params = {"top_k": top_k, "mode": mode, **({"domain": domain} if domain else {})}
+        key = f"match_pdf:{content_key(pdf)}:{top_k}:{domain}:{mode}"
+        return self._cached(key, lambda: self._post(
+            "/match/pdf", params=params, data=pdf, headers={"Content-Type": "application/pdf"}))
+
+    def status(self) -> Dict:
+        with self._lock:
+            stats = dict(self.stats)
+        return {"base_url": self.base_url, "breaker": self.breaker.state, "cached": len(self.cache), **stats}
+
+    def close(self):
+        self.session.close()
+
+
+def _detail(res: requests.Response) -> str:
+    try:
+        body = res.json()
+    except ValueError:
+        body = None
+    detail = body.get("detail") if isinstance(body, dict) else None
+    return str(detail or res.reason or res.status_code)
+
+
+_client: Optional[MatchClient] = None
+_client_lock = threading.Lock()
+
+
+def get_client() -> MatchClient:
+    """The process-wide client, created on first use."""
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = MatchClient()
+        return _client
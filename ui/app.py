@@ -1,11 +1,11 @@
 from flask import Flask, render_template, request, jsonify
-from pypdf import PdfReader
-from io import BytesIO
-import requests
+from api_client import ApiError, ApiUnavailable, get_client
 
 app = Flask(__name__)
 
-API_URL = "http://localhost:8000/match"
+# The API (API_URL, default http://localhost:8000/match) is reached through
+# api_client.py: pooled connections, timeouts, a circuit breaker and a cache
+client = get_client()
 
 @app.route('/')
 def index():
@@ -22,11 +22,12 @@ def extract_pdf():
         return jsonify({'error': 'No file selected'}), 400
     
     try:
-        pdf_bytes = BytesIO(file.read())
-        reader = PdfReader(pdf_bytes)
-        pages = [p.extract_text() or "" for p in reader.pages]
-        text = "\n".join(pages)
-        return jsonify({'text': text})
+        # The API extracts the text (page/size limits); this app only forwards the bytes
+        return jsonify({'text': client.extract(file.read())})
+    except ApiError as e:
+        return jsonify({'error': e.detail}), e.status
+    except ApiUnavailable as e:
+        return jsonify({'error': str(e)}), e.status or 503
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -41,13 +42,8 @@ def analyze():
         if not cv_text.strip():
             return jsonify({'error': 'CV text is empty'}), 400
         
-        # Call your existing backend API
-        response = requests.post(API_URL, json={
-            'cv_text': cv_text,
-            'top_k': top_k
-        })
-        
-        result = response.json()
+        # Call your existing backend API (repeat analyses are served from the cache)
+        result = dict(client.match(cv_text, top_k=top_k))
         
         # Build strengths and weaknesses (ENGLISH TRANSLATION)
         strengths, weaknesses = build_strengths_weaknesses(result)
@@ -55,6 +51,10 @@ def analyze():
         result['weaknesses'] = weaknesses
         
         return jsonify(result)
+    except ApiError as e:
+        return jsonify({'error': e.detail}), e.status
+    except ApiUnavailable as e:
+        return jsonify({'error': str(e)}), e.status or 503
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -1,9 +1,6 @@
-import os  # ← CHANGE 1: Added for environment variable reading
 import streamlit as st
 import pandas as pd
-import requests
-from pypdf import PdfReader
-from io import BytesIO
+from api_client import ApiError, ApiUnavailable, UI_CACHE_SIZE, UI_CACHE_TTL, get_client
 import base64
 
 
@@ -143,19 +140,16 @@ st.markdown("""
 
 
 # --- CHANGE 2: API URL from environment variable (Render will set this) ---
-# OLD: API_URL = "http://localhost:8000/match"
-# NEW: Read from environment with fallback for local development
-API_URL = os.getenv(
-    "API_URL", 
-    "http://localhost:8000/match"  # Local fallback
-)
+# API_URL (default http://localhost:8000/match) is read by api_client.py, which
+# pools connections, applies timeouts and a circuit breaker, and caches results
 
 
 # --- HELPER FUNCTIONS ---
-def extract_pdf(file):
-    reader = PdfReader(file)
-    pages = [p.extract_text() or "" for p in reader.pages]
-    return "\n".join(pages)
+@st.cache_data(max_entries=UI_CACHE_SIZE, ttl=UI_CACHE_TTL or None, show_spinner=False)
+def analyze_pdf(pdf_bytes, top_k, domain):
+    """/match/pdf for an uploaded resume; reruns with the same file and options never reach the API."""
+    # The PDF goes to the API unparsed; it extracts the text (page/size limits, cache)
+    return get_client().match_pdf(pdf_bytes, top_k=top_k, domain=domain)
 
 
 def build_strengths_weaknesses(data):
@@ -271,8 +265,6 @@ else:
     if analyze_btn:
         with st.spinner("⚡ AI is analyzing career vectors..."):
             try:
-                cv_text = extract_pdf(BytesIO(uploaded.read()))
-                
                 # Map dropdown selection to backend keywords
                 domain_map = {
                     "General (Auto-Detect)": None,
@@ -286,16 +278,19 @@ else:
                 }
                 
                 # --- CHANGE 3: Updated API call to pass domain parameter ---
-                res = requests.post(API_URL, json={
-                    "cv_text": cv_text, 
-                    "top_k": top_k,
-                    "domain": domain_map.get(selected_domain)  # ← Added domain filtering
-                })
-                
-                if res.status_code != 200:
-                    st.error("❌ Failed to connect to AI Brain. Ensure backend is running.")
-                else:
-                    data = res.json()
+                try:
+                    data = analyze_pdf(uploaded.getvalue(), top_k, domain_map.get(selected_domain))  # ← Added domain filtering
+                except ApiError as e:
+                    data = None
+                    st.error(f"❌ Could not read this PDF: {e.detail}")
+                except ApiUnavailable as e:
+                    data = None
+                    if e.status in (503, 504):  # busy, or this file took too long: the input may be fine
+                        st.warning("⏳ The server is busy or took too long to read this PDF. Please try again in a moment.")
+                    else:
+                        st.error("❌ Failed to connect to AI Brain. Ensure backend is running.")
+
+                if data is not None:
                     strengths, weaknesses = build_strengths_weaknesses(data)
                     
                     # HEADER
@@ -326,6 +321,12 @@ else:
                         </div>
                         """, unsafe_allow_html=True)
 
+                        breakdown = data.get("ats_breakdown")
+                        if breakdown:
+                            with st.expander("ATS breakdown"):
+                                for name, points in breakdown["components"].items():
+                                    st.markdown(f"<div style='font-size:0.85rem; color: #E0E7FF;'>{name.replace('_', ' ').title()}: <b>{points:+.2f}</b></div>", unsafe_allow_html=True)
+
 
                     with m2:
                         # Insights Card (Clean Lists)